@@ -0,0 +1,217 @@
+# commission/analytics.py
+
+import json
+import os
+import shutil
+import threading
+import time
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import Commission, InsuranceCompany, Product, Transaction
+
+# Dictionary-encoded columns hold int32 codes into the snapshot's dictionary of
+# raw values; `month` is months since year 0 and `amount` is in cents.
+ENCODED = ('agent', 'product', 'company', 'commission_type', 'status')
+TABLES = {
+    'transactions': {
+        'columns': ('agent', 'product', 'month', 'amount'),
+        'rows': lambda: Transaction.objects.order_by().annotate(m=TruncMonth('created_at')).values_list(
+            'agent_id', 'product_id', 'm', 'amount'
+        ),
+    },
+    'commissions': {
+        'columns': ('agent', 'product', 'company', 'commission_type', 'status', 'month', 'amount'),
+        'rows': lambda: Commission.objects.order_by().annotate(m=TruncMonth('expected_payment_date')).values_list(
+            'transaction__agent_id', 'transaction__product_id', 'commission_structure__agreement__company_id',
+            'commission_structure__commission_type', 'status', 'm', 'amount'
+        ),
+    },
+}
+LABELS = {'product': (Product, 'name'), 'company': (InsuranceCompany, 'name')}
+CURRENT = 'CURRENT'
+
+def encode_month(day):
+    return day.year * 12 + day.month - 1
+
+def decode_month(month):
+    return f'{month // 12:04d}-{month % 12 + 1:02d}'
+
+def parse_month(value):
+    try:
+        year, month = (int(part) for part in str(value).split('-')[:2])
+    except ValueError:
+        return None
+    return year * 12 + month - 1 if 1 <= month <= 12 else None
+
+def _write_table(directory, name, spec, chunk_size):
+    rows = spec['rows']()
+    capacity = rows.count()
+    columns = {
+        column: np.lib.format.open_memmap(
+            os.path.join(directory, f'{name}.{column}.npy'), mode='w+',
+            dtype=np.int64 if column == 'amount' else np.int32, shape=(capacity,)
+        )
+        for column in spec['columns']
+    }
+    dictionaries = {column: {} for column in spec['columns'] if column in ENCODED}
+    written = 0
+    chunk = []
+
+    def flush():
+        nonlocal written
+        size = min(len(chunk), capacity - written)  # rows inserted after count() wait for the next build
+        for index, column in enumerate(spec['columns']):
+            values = [row[index] for row in chunk[:size]]
+            if column in dictionaries:
+                codes = dictionaries[column]
+                values = [codes.setdefault(value, len(codes)) for value in values]
+            elif column == 'month':
+                values = [encode_month(value) for value in values]
+            elif column == 'amount':
+                values = [int((value * 100).to_integral_value()) for value in values]
+            columns[column][written:written + size] = values
+        written += size
+        chunk.clear()
+
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    for array in columns.values():
+        array.flush()
+    return {'rows': written, 'dictionaries': {column: list(codes) for column, codes in dictionaries.items()}}
+
+def build_snapshot(directory=None, chunk_size=20000, keep=2):
+    """
+    Export transactions and commissions into a new columnar snapshot under
+    `directory` (one .npy file per column) and make it the current one.
+    Readers keep using the previous snapshot until they next look it up, so
+    the `keep` newest snapshots are left on disk.
+    """
+    directory = str(directory or settings.ANALYTICS_SNAPSHOT_DIR)
+    generation = str(time.time_ns())
+    staging = os.path.join(directory, f'{generation}.tmp')
+    os.makedirs(staging)
+    try:
+        # One read transaction, so both tables reflect the same moment
+        with db_transaction.atomic():
+            meta = {
+                'generation': generation,
+                'built_at': timezone.now().isoformat(),
+                'tables': {name: _write_table(staging, name, spec, chunk_size) for name, spec in TABLES.items()},
+                'labels': {
+                    column: {str(pk): label for pk, label in model.objects.values_list('pk', field)}
+                    for column, (model, field) in LABELS.items()
+                },
+            }
+        with open(os.path.join(staging, 'meta.json'), 'w') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(staging, os.path.join(directory, generation))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(directory, f'{CURRENT}.tmp')
+    with open(pointer, 'w') as pointer_file:
+        pointer_file.write(generation)
+    os.replace(pointer, os.path.join(directory, CURRENT))
+
+    generations = sorted(entry for entry in os.listdir(directory) if entry.isdigit())
+    for old in generations[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return meta
+
+class Snapshot:
+    """A read-only, memory-mapped snapshot with a vectorized group-by."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            self.meta = json.load(meta_file)
+        self.tables = {}
+        self.dictionaries = {}
+        for name, spec in TABLES.items():
+            table = self.meta['tables'][name]
+            self.tables[name] = {
+                column: np.load(os.path.join(path, f'{name}.{column}.npy'), mmap_mode='r')[:table['rows']]
+                for column in spec['columns']
+            }
+            self.dictionaries[name] = table['dictionaries']
+        self._codes = {
+            name: {column: {value: code for code, value in enumerate(values)} for column, values in dictionaries.items()}
+            for name, dictionaries in self.dictionaries.items()
+        }
+
+    def codes(self, table, column, values):
+        # Values that never occur in the snapshot have no code and match nothing
+        codes = self._codes[table][column]
+        return [codes[value] for value in values if value in codes]
+
+    def aggregate(self, table, group_by=(), filters=()):
+        """
+        Sum `amount` and count rows of `table`, grouped by the `group_by`
+        columns, over the rows passing every `(column, lookup, value)` in
+        `filters`. Lookups are `in` (a list of raw values) for encoded
+        columns and `gte`/`lt`/`lte` on encoded months.
+        """
+        columns = self.tables[table]
+        mask = np.ones(len(columns['amount']), dtype=bool)
+        for column, lookup, value in filters:
+            if lookup == 'in':
+                mask &= np.isin(columns[column], self.codes(table, column, value))
+            elif lookup == 'gte':
+                mask &= columns[column] >= value
+            elif lookup == 'lt':
+                mask &= columns[column] < value
+            elif lookup == 'lte':
+                mask &= columns[column] <= value
+            else:
+                raise ValueError(f'Unknown lookup: {lookup}')
+
+        amounts = columns['amount'][mask]
+        if not group_by:
+            return [{'total': _cents(amounts.sum()), 'count': int(amounts.size)}]
+
+        # Pack the group columns into one integer key so grouping is a single unique/bincount pass
+        keys = [columns[column][mask].astype(np.int64) for column in group_by]
+        offsets = [int(key.min()) if key.size else 0 for key in keys]
+        dims = [int(key.max()) - offset + 1 if key.size else 1 for key, offset in zip(keys, offsets)]
+        packed = np.ravel_multi_index([key - offset for key, offset in zip(keys, offsets)], dims)
+        groups, inverse = np.unique(packed, return_inverse=True)
+        totals = np.bincount(inverse, weights=amounts, minlength=groups.size)
+        counts = np.bincount(inverse, minlength=groups.size)
+
+        results = []
+        for group, total, count in zip(zip(*np.unravel_index(groups, dims)), totals, counts):
+            row = {}
+            for column, code, offset in zip(group_by, group, offsets):
+                value = int(code) + offset
+                row[column] = decode_month(value) if column == 'month' else self.dictionaries[table][column][value]
+            results.append({**row, 'total': _cents(total), 'count': int(count)})
+        return sorted(results, key=lambda result: tuple(result[column] for column in group_by))
+
+def _cents(cents):
+    return str(Decimal(int(round(float(cents)))).scaleb(-2))
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+def get_snapshot(directory=None):
+    """The current snapshot under `directory`, or None before the first build."""
+    directory = str(directory or settings.ANALYTICS_SNAPSHOT_DIR)
+    try:
+        with open(os.path.join(directory, CURRENT)) as pointer_file:
+            generation = pointer_file.read().strip()
+    except FileNotFoundError:
+        return None
+    snapshot = _snapshots.get(directory)
+    if snapshot is None or snapshot.meta['generation'] != generation:
+        with _snapshots_lock:
+            snapshot = _snapshots.get(directory)
+            if snapshot is None or snapshot.meta['generation'] != generation:
+                snapshot = _snapshots[directory] = Snapshot(os.path.join(directory, generation))
+    return snapshot
@@ -0,0 +1,75 @@
+# commission/chunking.py
+
+import json
+import re
+from collections import Counter
+
+# Rough average for English text; good enough to stay well inside the context window
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _pieces(text, max_tokens):
+    # Prefer paragraph, then sentence, then word boundaries
+    for paragraph in re.split(r'\n\s*\n', text):
+        if estimate_tokens(paragraph) <= max_tokens:
+            yield paragraph
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                yield sentence
+                continue
+            words = []
+            for word in sentence.split():
+                if words and estimate_tokens(' '.join(words + [word])) > max_tokens:
+                    yield ' '.join(words)
+                    words = []
+                words.append(word)
+            if words:
+                yield ' '.join(words)
+
+def split_into_chunks(text, max_tokens):
+    """Split `text` into chunks of at most roughly `max_tokens` tokens each."""
+    chunks = []
+    current = ''
+    for piece in _pieces(text, max_tokens):
+        piece = piece.strip()
+        if not piece:
+            continue
+        candidate = f'{current}\n\n{piece}' if current else piece
+        if current and estimate_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+def _is_known(value):
+    return value not in (None, '', 0, 'Unknown')
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip().casefold()
+    if isinstance(value, (int, float)):
+        return value
+    return json.dumps(value, sort_keys=True, default=str)
+
+def merge_extracted_info(results, defaults):
+    """
+    Merge per-chunk extractions into one record. For each field the value
+    found in the most chunks wins; ties go to the value seen first, so the
+    result does not depend on which chunk finished first.
+    """
+    merged = dict(defaults)
+    fields = list(defaults) + [field for result in results for field in result if field not in defaults]
+    for field in dict.fromkeys(fields):
+        values = [result[field] for result in results if _is_known(result.get(field))]
+        if not values:
+            continue
+        counts = Counter(_normalize(value) for value in values)
+        best = max(counts.values())
+        merged[field] = next(value for value in values if counts[_normalize(value)] == best)
+    return merged
@@ -0,0 +1,206 @@
+# commission/entity_index.py
+
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from .models import Product, Client, ProductAlias, ClientAlias
+
+def normalize_name(name):
+    # "  JOHN  Smith." and "john smith" are the same entity; so are "Jose" and "José"
+    name = unicodedata.normalize('NFKD', str(name or ''))
+    name = ''.join(char for char in name if not unicodedata.combining(char)).casefold()
+    return ' '.join(re.sub(r'[^\w]+', ' ', name).split())
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _sorted_tokens(key):
+    return ' '.join(sorted(key.split()))
+
+def distinguishing_tokens(key):
+    # Years, plan numbers and letters ("2023", "plan b") tell apart names that are otherwise near-identical
+    return sorted(token for token in key.split() if len(token) == 1 or any(char.isdigit() for char in token))
+
+def _entity_field(alias_model):
+    return next(field.name for field in alias_model._meta.fields if field.is_relation)
+
+class EntityIndex:
+    """
+    In-memory map from normalized names (and their token-sorted form, so
+    "Smith John" finds "John Smith") to entity ids, with a trigram index for
+    near misses. A near miss must reach `threshold` similarity and have the
+    same digit and single-letter tokens; a `threshold` of None turns near
+    misses off. Only committed aliases are loaded: the index refreshes from
+    the alias table outside of transactions and learns new aliases on commit,
+    and reloads in full when aliases were deleted by another process.
+    """
+
+    def __init__(self, alias_model, threshold=0.85, refresh_interval=30):
+        self.alias_model = alias_model
+        self.entity_field = _entity_field(alias_model)
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._ids = {}
+        self._grams = {}
+        self._keys_by_gram = defaultdict(set)
+        self._last_alias_id = 0
+        self._loaded = 0
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def add(self, alias, entity_id):
+        with self._lock:
+            for key in (alias, _sorted_tokens(alias)):
+                self._ids.setdefault(key, entity_id)
+            if alias not in self._grams:
+                self._grams[alias] = trigrams(alias)
+                for gram in self._grams[alias]:
+                    self._keys_by_gram[gram].add(alias)
+
+    def discard(self, alias, entity_id):
+        with self._lock:
+            for key in (alias, _sorted_tokens(alias)):
+                if self._ids.get(key) == entity_id:
+                    del self._ids[key]
+            for gram in self._grams.pop(alias, ()):
+                self._keys_by_gram[gram].discard(alias)
+
+    def refresh(self):
+        aliases = self.alias_model.objects.order_by('id').values_list('id', 'alias', f'{self.entity_field}_id')
+        for alias_id, alias, entity_id in aliases.filter(id__gt=self._last_alias_id):
+            self.add(alias, entity_id)
+            self._last_alias_id = alias_id
+            self._loaded += 1
+        # Rows below the high-water mark only change count when an alias (or its
+        # entity) was deleted elsewhere, or committed late; either way, reload it all
+        if aliases.filter(id__lte=self._last_alias_id).count() != self._loaded:
+            self._reload(aliases)
+        self._refreshed_at = time.monotonic()
+
+    def _reload(self, aliases):
+        rows = list(aliases)
+        with self._lock:
+            self._ids = {}
+            self._grams = {}
+            self._keys_by_gram = defaultdict(set)
+        for _, alias, entity_id in rows:
+            self.add(alias, entity_id)
+        self._last_alias_id = rows[-1][0] if rows else 0
+        self._loaded = len(rows)
+
+    def lookup(self, name):
+        """Return the id of the entity `name` refers to, or None."""
+        key = normalize_name(name)
+        if not key:
+            return None
+        due = self._refreshed_at is None or time.monotonic() - self._refreshed_at > self.refresh_interval
+        if due and not connection.in_atomic_block:
+            self.refresh()
+
+        with self._lock:
+            entity_id = self._ids.get(key, self._ids.get(_sorted_tokens(key)))
+            if entity_id is not None:
+                self.hits += 1
+                return entity_id
+            if self.threshold is None:
+                self.misses += 1
+                return None
+
+            grams = trigrams(key)
+            tokens = distinguishing_tokens(key)
+            shared = Counter(candidate for gram in grams for candidate in self._keys_by_gram.get(gram, ()))
+            best, best_similarity = None, 0.0
+            for candidate, count in shared.items():
+                similarity = count / (len(grams) + len(self._grams[candidate]) - count)
+                if similarity > best_similarity and distinguishing_tokens(candidate) == tokens:
+                    best, best_similarity = candidate, similarity
+            if best is not None and best_similarity >= self.threshold:
+                self.fuzzy_hits += 1
+                return self._ids[best]
+            self.misses += 1
+            return None
+
+    def stats(self):
+        lookups = self.hits + self.fuzzy_hits + self.misses
+        return {
+            'aliases': len(self._grams),
+            'hits': self.hits,
+            'fuzzy_hits': self.fuzzy_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+        }
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_entity_index(alias_model):
+    # One index per database, so a swapped-in test database never sees stale ids
+    key = (alias_model._meta.label, str(connection.settings_dict['NAME']))
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = _indexes[key] = EntityIndex(
+                    alias_model,
+                    # A product merged into the wrong one would pick up its commission structures
+                    threshold=settings.ENTITY_MATCH_THRESHOLD if alias_model is ClientAlias else None,
+                    refresh_interval=settings.ENTITY_INDEX_REFRESH_INTERVAL
+                )
+    return index
+
+def register_alias(alias_model, entity_id, name):
+    key = normalize_name(name)
+    if key:
+        alias_model.objects.get_or_create(alias=key, defaults={f'{_entity_field(alias_model)}_id': entity_id})
+
+def _registered_entity_id(alias_model, key):
+    return alias_model.objects.filter(alias=key).values_list(f'{_entity_field(alias_model)}_id', flat=True).first()
+
+def reset_entity_indexes():
+    with _indexes_lock:
+        _indexes.clear()
+
+def _resolve(alias_model, name, build):
+    index = get_entity_index(alias_model)
+    key = normalize_name(name)
+    entity_id = index.lookup(key)
+    if entity_id is not None:
+        # Near misses are not registered as aliases, so a wrong one is never made permanent
+        return entity_id
+
+    entity_id = _registered_entity_id(alias_model, key)
+    if entity_id is not None:
+        # Registered by another process since our last refresh
+        transaction.on_commit(lambda: index.add(key, entity_id))
+        return entity_id
+    try:
+        with transaction.atomic():
+            entity = build()
+            entity._alias_registered = True
+            entity.save()
+            alias_model.objects.create(**{index.entity_field: entity, 'alias': key})
+        return entity.pk
+    except IntegrityError:
+        # Another worker registered the same name between our lookup and insert; use theirs
+        return _registered_entity_id(alias_model, key)
+
+def resolve_product(name, category='INSURANCE'):
+    """Return the id of the product called `name`, creating it only if it is genuinely new."""
+    return _resolve(ProductAlias, name, lambda: Product(name=name.strip(), category=category))
+
+def resolve_client(name):
+    """Return the id of the client called `name`, creating it only if it is genuinely new."""
+    parts = name.split()
+    return _resolve(ClientAlias, name, lambda: Client(
+        display_name=name.strip(), first_name=parts[0] if parts else '', last_name=parts[-1] if parts else ''
+    ))
@@ -0,0 +1,81 @@
+# commission/exporter.py
+
+import csv
+import io
+import json
+import zlib
+from rest_framework.utils.encoders import JSONEncoder
+from .models import Commission
+
+# Column order of each export; NDJSON records use the same keys
+TRANSACTION_COLUMNS = (
+    'id', 'agent', 'client', 'client_name', 'product', 'product_name', 'created_at', 'amount', 'metadata',
+)
+COMMISSION_COLUMNS = (
+    'id', 'transaction', 'commission_structure', 'amount', 'expected_payment_date', 'status',
+)
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+def _row(columns, values):
+    row = dict(zip(columns, values))
+    row['amount'] = str(row['amount'])  # keep money exact in NDJSON too
+    return row
+
+def transaction_rows(transactions, chunk_size=CHUNK_SIZE):
+    rows = transactions.values_list(
+        'id', 'agent_id', 'client_id', 'client__display_name', 'product_id', 'product__name',
+        'created_at', 'amount', 'metadata'
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield _row(TRANSACTION_COLUMNS, row)
+
+def commission_rows(transactions, chunk_size=CHUNK_SIZE):
+    rows = Commission.objects.filter(transaction__in=transactions.values('id')).order_by('id').values_list(
+        'id', 'transaction_id', 'commission_structure_id', 'amount', 'expected_payment_date', 'status'
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield _row(COMMISSION_COLUMNS, row)
+
+def _buffered(pieces):
+    # Join small writes so the response goes out in a few large chunks
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def encode_csv(rows, columns):
+    encoder = JSONEncoder()
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def pieces():
+        writer.writerow(columns)
+        yield line.getvalue()
+        for row in rows:
+            line.seek(0)
+            line.truncate()
+            writer.writerow([
+                encoder.encode(value) if isinstance(value, (dict, list)) else
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in row.values()
+            ])
+            yield line.getvalue()
+    return _buffered(pieces())
+
+def encode_ndjson(rows):
+    encoder = JSONEncoder()
+    return _buffered(encoder.encode(row) + '\n' for row in rows)
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,135 @@
+# commission/extraction_cache.py
+
+import abc
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+def make_cache_key(content, model, prompt_version):
+    # Whitespace differences (retries, forwarded messages) shouldn't miss the cache
+    normalized = re.sub(r'\s+', ' ', content).strip()
+    return hashlib.sha256(f'{model}\0{prompt_version}\0{normalized}'.encode()).hexdigest()
+
+class BaseExtractionCache(abc.ABC):
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @abc.abstractmethod
+    def set(self, key, value):
+        pass
+
+    @abc.abstractmethod
+    def _get(self, key):
+        pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+class MemoryExtractionCache(BaseExtractionCache):
+    """Process-local LRU cache."""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        super().__init__(max_entries, ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class SQLiteExtractionCache(BaseExtractionCache):
+    """LRU cache stored in a SQLite file, so it is shared by every worker on the host."""
+
+    def __init__(self, path=None, max_entries=10000, ttl=None):
+        super().__init__(max_entries, ttl)
+        self.path = str(path or settings.EXTRACTION_CACHE_PATH)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS extraction_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS extraction_cache_accessed_at ON extraction_cache (accessed_at)'
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            self._local.connection = connection
+        return connection
+
+    def _get(self, key):
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute(
+                'SELECT value, created_at FROM extraction_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] + self.ttl < now:
+                connection.execute('DELETE FROM extraction_cache WHERE key = ?', (key,))
+                return None
+            connection.execute('UPDATE extraction_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO extraction_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now, now)
+            )
+            if self.ttl is not None:
+                connection.execute('DELETE FROM extraction_cache WHERE created_at < ?', (now - self.ttl,))
+            connection.execute(
+                'DELETE FROM extraction_cache WHERE key IN ('
+                'SELECT key FROM extraction_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+def load_extraction_cache():
+    config = getattr(settings, 'EXTRACTION_CACHE', None)
+    if not config or not config.get('BACKEND'):
+        return None
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
@@ -0,0 +1,110 @@
+# commission/extractors.py
+
+import re
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .gateways import get_groq_gateway
+
+REQUIRED_FIELDS = ('client_name', 'product_name', 'amount')
+
+class TemplateExtractor:
+    """
+    Reads summaries written with the wizard template, e.g.
+    "Client: John Smith, Product: Term Life, Amount: 1,000".
+    """
+    name = 'template'
+
+    _VALUE = r'\s*[:=\-]\s*(?P<value>[^,;\n]+)'
+    PATTERNS = {
+        'client_name': re.compile(r'\bclient(?:\s+name)?' + _VALUE, re.IGNORECASE),
+        'product_name': re.compile(r'\bproduct(?:\s+name)?' + _VALUE, re.IGNORECASE),
+        'product_category': re.compile(r'\b(?:product\s+)?category' + _VALUE, re.IGNORECASE),
+        'product_type': re.compile(r'\b(?:product\s+)?type' + _VALUE, re.IGNORECASE),
+        'amount': re.compile(r'\bamount\s*[:=\-]\s*[$€£₪]?\s*(?P<value>\d[\d,]*(?:\.\d+)?)', re.IGNORECASE),
+    }
+    CATEGORIES = {'INSURANCE', 'PENSION', 'FINANCIAL'}
+
+    def extract(self, content):
+        extracted_info = {}
+        for field, pattern in self.PATTERNS.items():
+            match = pattern.search(content)
+            if match:
+                extracted_info[field] = match.group('value').strip()
+
+        if 'amount' in extracted_info:
+            try:
+                amount = Decimal(extracted_info['amount'].replace(',', ''))
+            except InvalidOperation:
+                del extracted_info['amount']
+            else:
+                extracted_info['amount'] = int(amount) if amount == amount.to_integral_value() else float(amount)
+        if extracted_info.get('product_category', '').upper() in self.CATEGORIES:
+            extracted_info['product_category'] = extracted_info['product_category'].upper()
+        else:
+            extracted_info.pop('product_category', None)
+
+        confidence = sum(1 for field in REQUIRED_FIELDS if extracted_info.get(field)) / len(REQUIRED_FIELDS)
+        return extracted_info, confidence
+
+class LLMExtractor:
+    name = 'llm'
+
+    def extract(self, content):
+        return get_groq_gateway().extract_meeting_summary_info(content), 1.0
+
+class ExtractorChain:
+    """
+    Tries each extractor in turn and returns the first result whose
+    confidence reaches `min_confidence`; the last tier's answer is always
+    accepted. Hit rates and timings are kept per tier.
+    """
+
+    def __init__(self, extractors, min_confidence=1.0):
+        self.extractors = extractors
+        self.min_confidence = min_confidence
+        self._stats = {extractor.name: {'attempts': 0, 'hits': 0, 'seconds': 0.0} for extractor in extractors}
+        self._lock = threading.Lock()
+
+    def extract(self, content):
+        for index, extractor in enumerate(self.extractors):
+            started_at = time.perf_counter()
+            extracted_info, confidence = extractor.extract(content)
+            hit = confidence >= self.min_confidence or index == len(self.extractors) - 1
+            with self._lock:
+                tier_stats = self._stats[extractor.name]
+                tier_stats['attempts'] += 1
+                tier_stats['hits'] += int(hit)
+                tier_stats['seconds'] += time.perf_counter() - started_at
+            if hit:
+                return extracted_info
+
+    def stats(self):
+        with self._lock:
+            total = sum(tier_stats['hits'] for tier_stats in self._stats.values())
+            return {
+                name: {
+                    'attempts': tier_stats['attempts'],
+                    'hits': tier_stats['hits'],
+                    'hit_rate': tier_stats['hits'] / total if total else 0.0,
+                    'avg_ms': 1000 * tier_stats['seconds'] / tier_stats['attempts'] if tier_stats['attempts'] else 0.0,
+                }
+                for name, tier_stats in self._stats.items()
+            }
+
+
+_chain = None
+_chain_lock = threading.Lock()
+
+def get_extractor_chain():
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                _chain = ExtractorChain(
+                    [import_string(path)() for path in settings.MEETING_SUMMARY_EXTRACTORS],
+                    min_confidence=settings.MEETING_SUMMARY_MIN_CONFIDENCE
+                )
+    return _chain
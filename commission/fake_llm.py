@@ -0,0 +1,151 @@
+# commission/fake_llm.py
+#
+# A local stand-in for the Groq chat-completions API, used to test and
+# benchmark the meeting-summary pipeline without calling the real service.
+# Point GROQ_BASE_URL at `FakeLLMServer.base_url` to use it.
+
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSES = [
+    '{"client_name": "John Smith", "product_name": "Term Life", "product_category": "INSURANCE", '
+    '"product_type": "Term", "amount": 1000}',
+    'Here is the extracted information:\n```json\n{"client_name": "Jane Doe", "product_name": "Pension Plus", '
+    '"product_category": "PENSION", "product_type": "Pension", "amount": 2500}\n```',
+]
+
+def parse_latency(spec):
+    """
+    Build a latency sampler (returning seconds) from a spec such as
+    "constant:0.2", "uniform:0.1,0.5", "normal:0.3,0.1" or "lognormal:0.3,0.5"
+    (median and sigma).
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(value) for value in args.split(',')] if args else []
+    if kind == 'constant':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f'Unknown latency distribution: {spec}')
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.requests.append(request)
+        time.sleep(self.server.latency())
+
+        roll = random.random()
+        if roll < self.server.error_rate:
+            self._send_json(500, {'error': {'message': 'Internal server error', 'type': 'internal_error'}})
+            return
+        if roll < self.server.error_rate + self.server.rate_limit_rate:
+            self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit'}},
+                            {'retry-after': '1'})
+            return
+
+        content = self.server.next_response()
+        if request.get('stream'):
+            self._stream(content)
+            return
+        self._send_json(200, {
+            'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()), 'model': request['model'],
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, content):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        piece_size = self.server.piece_size
+        try:
+            for start in range(0, len(content), piece_size):
+                self._event(content[start:start + piece_size])
+            if self.server.trailer:
+                time.sleep(self.server.trailer_delay)
+                self._event(self.server.trailer)
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def _event(self, piece):
+        chunk = {
+            'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': 'fake',
+            'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}],
+        }
+        self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """
+    Serves /openai/v1/chat/completions, cycling through `responses`. Each
+    request waits for a sample of `latency` (a spec string or callable) and
+    fails with a 500 or 429 at the given rates. Streaming requests get the
+    content as server-sent events, `piece_size` characters at a time,
+    followed by `trailer` after `trailer_delay` seconds.
+    """
+    daemon_threads = True
+
+    def __init__(self, responses=None, latency='constant:0', error_rate=0.0, rate_limit_rate=0.0,
+                 piece_size=8, trailer='', trailer_delay=0, host='127.0.0.1', port=0):
+        super().__init__((host, port), FakeLLMHandler)
+        self.responses = itertools.cycle(responses or DEFAULT_RESPONSES)
+        self.latency = parse_latency(latency) if isinstance(latency, str) else latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.piece_size = piece_size
+        self.trailer = trailer
+        self.trailer_delay = trailer_delay
+        self.connections = 0
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def next_response(self):
+        with self.lock:
+            return next(self.responses)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
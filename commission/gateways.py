@@ -1,14 +1,199 @@
 # commission/gateways.py
 
+import atexit
 import json
-from groq import Groq
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import httpx
+from groq import APIConnectionError, Groq, InternalServerError, RateLimitError
 from django.conf import settings
+from .chunking import merge_extracted_info, split_into_chunks
+from .circuit_breaker import CircuitBreaker
+from .extraction_cache import load_extraction_cache, make_cache_key
+from .json_stream import IncrementalJSONObjectParser
+from .rate_limit import AdaptiveRateLimiter, parse_duration
+
+class LLMUnavailableError(Exception):
+    """The model could not answer within the latency budget, or the circuit is open."""
+
+class CircuitOpenError(LLMUnavailableError):
+    """The circuit is open, so the request was never sent."""
+
+# Timeouts, connection errors, 429s and 5xx may succeed later; anything else
+# (a bad request, a rejected API key) fails the same way every time
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
 
 class GroqGateway:
-    def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+    MODEL = "llama-3.1-8b-instant"
+    # Bump whenever the prompt changes so cached extractions from the old prompt are not reused
+    PROMPT_VERSION = 1
+    # Seconds before retrying a connection error or 5xx, doubled on each attempt
+    RETRY_BACKOFF = 0.5
+    MAX_RETRY_BACKOFF = 8
+    REQUIRED_FIELDS = ("client_name", "product_name", "amount")
+    DEFAULT_EXTRACTED_INFO = {
+        "client_name": "Unknown",
+        "product_name": "Unknown",
+        "product_category": "Unknown",
+        "product_type": "Unknown",
+        "amount": 0
+    }
+
+    def __init__(self, client=None, cache=None, rate_limiter=None, circuit_breaker=None):
+        self.client = client or Groq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL,
+            # Retries happen in _complete, where 429s go through the rate limiter
+            max_retries=0,
+            http_client=httpx.Client(
+                timeout=httpx.Timeout(settings.GROQ_TIMEOUT, connect=settings.GROQ_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY,
+                ),
+            ),
+        )
+        # cache=False disables caching; None uses settings.EXTRACTION_CACHE
+        self.cache = load_extraction_cache() if cache is None else (cache or None)
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            rate=settings.GROQ_REQUESTS_PER_MINUTE / 60,
+            burst=settings.GROQ_MAX_CONCURRENCY
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=settings.GROQ_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.GROQ_CIRCUIT_RESET_TIMEOUT,
+            slow_call_threshold=settings.GROQ_SLOW_CALL_THRESHOLD
+        )
+        self._latencies = deque(maxlen=200)
+        self._executor = ThreadPoolExecutor(max_workers=settings.GROQ_MAX_CONNECTIONS)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.client.close()
 
     def extract_meeting_summary_info(self, content):
+        chunks = split_into_chunks(content, settings.GROQ_CHUNK_TOKENS)
+        if len(chunks) > 1:
+            # Long transcripts are extracted chunk by chunk in parallel and merged
+            results = [extracted_info for _, extracted_info in sorted(self.extract_many(chunks), key=lambda result: result[0])]
+            return merge_extracted_info(results, self.DEFAULT_EXTRACTED_INFO)
+
+        if self.cache is None:
+            return self._extract_meeting_summary_info(content)
+
+        key = make_cache_key(content, self.MODEL, self.PROMPT_VERSION)
+        extracted_info = self.cache.get(key)
+        if extracted_info is None:
+            extracted_info = self._extract_meeting_summary_info(content)
+            # The "Unknown" fallback is not cached so a retry gets another chance
+            if extracted_info != self.DEFAULT_EXTRACTED_INFO:
+                self.cache.set(key, extracted_info)
+        return extracted_info
+
+    def extract_many(self, contents, max_concurrency=None):
+        """
+        Extract many summaries concurrently, yielding (index, extracted_info)
+        pairs as each one completes. Concurrency is bounded by
+        `max_concurrency` and the request rate by the gateway's rate limiter.
+        """
+        contents = list(contents)
+        max_concurrency = max_concurrency or settings.GROQ_MAX_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(contents)))) as executor:
+            futures = {
+                executor.submit(self.extract_meeting_summary_info, content): index
+                for index, content in enumerate(contents)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _complete(self, messages, **options):
+        """
+        Send one completion request. 429s are retried up to
+        GROQ_RATE_LIMIT_RETRIES times once the rate limiter allows it;
+        connection errors and 5xx responses up to GROQ_MAX_RETRIES times
+        with exponential backoff.
+        """
+        rate_limited = failed = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                raw_response = self.client.chat.completions.with_raw_response.create(
+                    model=self.MODEL,
+                    messages=messages,
+                    max_tokens=settings.GROQ_MAX_OUTPUT_TOKENS,
+                    **options
+                )
+            except RateLimitError as e:
+                if rate_limited == settings.GROQ_RATE_LIMIT_RETRIES:
+                    raise
+                rate_limited += 1
+                self.rate_limiter.throttle(parse_duration(e.response.headers.get('retry-after')))
+                continue
+            except (APIConnectionError, InternalServerError):
+                if failed == settings.GROQ_MAX_RETRIES:
+                    raise
+                time.sleep(min(self.RETRY_BACKOFF * 2 ** failed, self.MAX_RETRY_BACKOFF))
+                failed += 1
+                continue
+            self.rate_limiter.update_from_headers(raw_response.headers)
+            return raw_response.parse()
+
+    def _hedge_delay(self):
+        if not settings.GROQ_HEDGE:
+            return None
+        latencies = sorted(self._latencies)
+        if len(latencies) < 20:
+            return settings.GROQ_HEDGE_DELAY
+        return latencies[min(len(latencies) - 1, int(len(latencies) * settings.GROQ_HEDGE_PERCENTILE / 100))]
+
+    def _extract_meeting_summary_info(self, content):
+        """
+        Run the extraction within the latency budget. When hedging is enabled
+        and the first request is slower than the configured percentile of
+        recent latencies, a second identical request is sent and whichever
+        answers first wins. Timeouts and transient errors feed the circuit
+        breaker and raise LLMUnavailableError; other errors are raised as is.
+        """
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError('Circuit is open')
+
+        started_at = time.monotonic()
+        deadline = started_at + settings.GROQ_LATENCY_BUDGET
+        hedge_delay = self._hedge_delay()
+        pending = {self._executor.submit(self._request_extraction, content)}
+        error = None
+
+        while pending and time.monotonic() < deadline:
+            wait_until = deadline
+            if hedge_delay is not None:
+                wait_until = min(wait_until, started_at + hedge_delay)
+            done, pending = wait(pending, timeout=max(0, wait_until - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    latency = time.monotonic() - started_at
+                    self._latencies.append(latency)
+                    self.circuit_breaker.record_success(latency)
+                    return future.result()
+                error = future.exception()
+            if not done and hedge_delay is not None and time.monotonic() < deadline:
+                hedge_delay = None
+                pending.add(self._executor.submit(self._request_extraction, content))
+
+        if pending:
+            self.circuit_breaker.record_failure()
+            raise LLMUnavailableError(f'No answer within {settings.GROQ_LATENCY_BUDGET}s')
+        if not isinstance(error, TRANSIENT_ERRORS):
+            # The provider answered, so the circuit stays closed for everyone else
+            self.circuit_breaker.record_success(time.monotonic() - started_at)
+            raise error
+        self.circuit_breaker.record_failure()
+        raise LLMUnavailableError(str(error)) from error
+
+    def _request_extraction(self, content):
         prompt = f"""
         Extract the following information from the meeting summary:
         - Client Name
@@ -23,33 +208,79 @@ class GroqGateway:
         Please provide the extracted information in JSON format.
         """
 
-        response = self.client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": prompt}
+        ]
+        if settings.GROQ_STREAMING:
+            return self._extract_streaming(messages)
+
+        response = self._complete(messages)
 
         # Extract the content from the response
-        json_str = response.choices[0].message.content.strip()
-        
+        return self._parse_extracted_info(response.choices[0].message.content.strip())
+
+    def _extract_streaming(self, messages):
+        """
+        Read the completion as it is generated and stop as soon as the
+        required keys of the JSON object are complete, without waiting for
+        the remaining keys or any trailing prose.
+        """
+        parser = IncrementalJSONObjectParser()
+        text = []
+        stream = self._complete(messages, stream=True)
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content or ''
+                text.append(piece)
+                parser.feed(piece)
+                if parser.complete or parser.has(self.REQUIRED_FIELDS):
+                    break
+        finally:
+            stream.close()
+
+        if parser.complete or parser.has(self.REQUIRED_FIELDS):
+            return parser.result
+        return self._parse_extracted_info(''.join(text).strip())
+
+    def _parse_extracted_info(self, json_str):
         # Try to parse the entire response as JSON first
         try:
             extracted_info = json.loads(json_str)
         except json.JSONDecodeError:
             # If that fails, try to extract JSON from markdown code blocks
             try:
-                json_str = json_str.split('```')[1]  # This works for both ```json and ``` without a language specifier
-                extracted_info = json.loads(json_str)
+                json_str = json_str.split('```')[1]
+                # Drop the language specifier of ```json fences
+                extracted_info = json.loads(re.sub(r'^[a-zA-Z]*\s*', '', json_str))
             except (IndexError, json.JSONDecodeError):
                 # If JSON parsing fails, return a default structure
-                extracted_info = {
-                    "client_name": "Unknown",
-                    "product_name": "Unknown",
-                    "product_category": "Unknown",
-                    "product_type": "Unknown",
-                    "amount": 0
-                }
-
-        return extracted_info
\ No newline at end of file
+                extracted_info = dict(self.DEFAULT_EXTRACTED_INFO)
+
+        return extracted_info
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_groq_gateway():
+    """
+    Return the process-wide gateway, so every request reuses the same
+    keep-alive connection pool instead of paying for a new TLS handshake.
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = GroqGateway()
+    return _gateway
+
+@atexit.register
+def close_groq_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is not None:
+            _gateway.close()
+            _gateway = None
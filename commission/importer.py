@@ -0,0 +1,202 @@
+# commission/importer.py
+
+import codecs
+import csv
+import logging
+import zipfile
+from datetime import date, datetime
+from itertools import islice
+from django.db import transaction as db_transaction
+from .entity_index import normalize_name, resolve_client
+from .metadata import parse_decimal, sync_metadata_values, transaction_amount
+from .models import ClientAlias, ProductAlias, Transaction
+from .services import create_transaction_commissions
+from .versioning import bump_version, version_key
+
+# Columns with a meaning of their own; every other non-empty column is kept in metadata
+CLIENT_COLUMN = 'client'
+PRODUCT_COLUMN = 'product'
+AMOUNT_COLUMN = 'amount'
+MAX_REPORTED_ERRORS = 1000
+# What a file that isn't the CSV or XLSX it claims to be raises while it is read
+UNREADABLE_ERRORS = (UnicodeDecodeError, csv.Error, zipfile.BadZipFile)
+
+logger = logging.getLogger(__name__)
+
+class ImportFormatError(ValueError):
+    def __init__(self, message, row=None):
+        super().__init__(message)
+        # The first row that could not be read, when the file broke off after its header
+        self.row = row
+
+def _unreadable_message(error):
+    if isinstance(error, UnicodeDecodeError):
+        return 'The file is not UTF-8 encoded; save it as "CSV UTF-8" and upload it again.'
+    return f'The file could not be read: {error}'
+
+def _csv_rows(file):
+    # Iterating the upload yields its lines chunk by chunk, so memory stays flat
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    yield from reader
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('XLSX import needs the openpyxl package; upload a CSV file instead.')
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def read_rows(file, filename):
+    """
+    Return an iterator of `(row_number, {column: value})` for every data row
+    of a CSV or XLSX upload, streaming it rather than loading the whole
+    sheet. The header is checked up front; a file that becomes unreadable
+    further down raises ImportFormatError with the row it stopped at.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        rows = _csv_rows(file)
+    elif extension == 'xlsx':
+        rows = _xlsx_rows(file)
+    else:
+        raise ImportFormatError('Upload a .csv or .xlsx file.')
+
+    try:
+        header = next(rows, None)
+    except UNREADABLE_ERRORS as error:
+        raise ImportFormatError(_unreadable_message(error)) from error
+    if header is None:
+        raise ImportFormatError('The file is empty.')
+    columns = [str(column or '').strip().lower() for column in header]
+    missing = {CLIENT_COLUMN, PRODUCT_COLUMN} - set(columns)
+    if missing:
+        raise ImportFormatError(f'Missing columns: {", ".join(sorted(missing))}.')
+    return _data_rows(rows, columns)
+
+def _data_rows(rows, columns):
+    row_number = 1
+    try:
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, dict(zip(columns, values))
+    except UNREADABLE_ERRORS as error:
+        raise ImportFormatError(_unreadable_message(error), row=row_number + 1) from error
+
+def _clean(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value.strip() if isinstance(value, str) else value
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        return {'rows': self.rows, 'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+def _parse_row(values):
+    values = {column: _clean(value) for column, value in values.items() if column and value not in (None, '')}
+    errors = {}
+    client = values.pop(CLIENT_COLUMN, None)
+    product = values.pop(PRODUCT_COLUMN, None)
+    if not client or not normalize_name(client):
+        errors[CLIENT_COLUMN] = 'This field is required.'
+    if not product or not normalize_name(product):
+        errors[PRODUCT_COLUMN] = 'This field is required.'
+    # parse_decimal also rejects NaN and amounts too large for Transaction.amount
+    if AMOUNT_COLUMN in values and parse_decimal(values[AMOUNT_COLUMN]) is None:
+        errors[AMOUNT_COLUMN] = 'A valid number is required.'
+    return str(client or ''), str(product or ''), values, errors
+
+def _import_chunk(agent, chunk, result):
+    parsed = []
+    for row_number, values in chunk:
+        client, product, metadata, errors = _parse_row(values)
+        if errors:
+            result.add_error(row_number, errors)
+        else:
+            parsed.append((row_number, client, product, metadata))
+    if not parsed:
+        return
+
+    # One query per chunk for each kind of name; only unseen clients go through the resolver
+    client_keys = {normalize_name(client) for _, client, _, _ in parsed}
+    product_keys = {normalize_name(product) for _, _, product, _ in parsed}
+    client_ids = dict(ClientAlias.objects.filter(alias__in=client_keys).values_list('alias', 'client_id'))
+    product_ids = dict(ProductAlias.objects.filter(alias__in=product_keys).values_list('alias', 'product_id'))
+
+    rows = []
+    for row_number, client, product, metadata in parsed:
+        product_id = product_ids.get(normalize_name(product))
+        if product_id is None:
+            result.add_error(row_number, {PRODUCT_COLUMN: f'Unknown product "{product}".'})
+            continue
+        client_key = normalize_name(client)
+        if client_key not in client_ids:
+            # Resolved outside the write below, so a chunk that rolls back can't leave ids of clients that don't exist
+            client_ids[client_key] = resolve_client(client)
+        transaction = Transaction(agent=agent, client_id=client_ids[client_key], product_id=product_id, metadata=metadata)
+        transaction.amount = transaction_amount(transaction)
+        rows.append((row_number, transaction))
+    _save_rows(agent, rows, result)
+
+def _save_rows(agent, rows, result):
+    try:
+        with db_transaction.atomic():
+            # bulk_create skips the save signals, so do their work once for the whole chunk
+            transactions = Transaction.objects.bulk_create([transaction for _, transaction in rows])
+            sync_metadata_values(transactions)
+            create_transaction_commissions(transactions)
+            if transactions:
+                bump_version(version_key(Transaction, agent.id))
+                bump_version(version_key(Transaction))
+    except Exception:
+        for _, transaction in rows:
+            transaction.pk = None
+        if len(rows) > 1:
+            # Save the rows one by one so only the ones at fault are left out
+            for row in rows:
+                _save_rows(agent, [row], result)
+            return
+        logger.exception('Could not import row %s', rows[0][0])
+        result.add_error(rows[0][0], {'non_field_errors': 'This row could not be saved.'})
+        return
+    result.created += len(transactions)
+
+def import_transactions(agent, rows, chunk_size=1000):
+    """
+    Create a transaction for `agent` from every `(row_number, values)` in
+    `rows`, writing `chunk_size` rows per database transaction. Rows that
+    fail validation or can't be saved are reported in the result instead of
+    aborting the import; so is a file that becomes unreadable, after the rows
+    before it are imported.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    while True:
+        chunk = []
+        try:
+            for row in islice(rows, chunk_size):
+                chunk.append(row)
+        except ImportFormatError as error:
+            # The rows read before the file broke off are still imported
+            result.rows += len(chunk)
+            _import_chunk(agent, chunk, result)
+            result.add_error(error.row, {'file': str(error)})
+            return result
+        if not chunk:
+            return result
+        result.rows += len(chunk)
+        _import_chunk(agent, chunk, result)
@@ -0,0 +1,63 @@
+# commission/json_stream.py
+
+import json
+
+class IncrementalJSONObjectParser:
+    """
+    Consumes model output piece by piece and exposes the members of the first
+    top-level JSON object as soon as each one is complete. Anything before the
+    opening brace (prose, a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self.result = {}
+        self.complete = False
+        self._buffer = []
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text):
+        for char in text:
+            if self.complete:
+                return self.result
+            if not self._started:
+                if char == '{':
+                    self._started = True
+                    self._depth = 1
+                    self._buffer.append(char)
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._update(''.join(self._buffer))
+                    self.complete = True
+            elif char == ',' and self._depth == 1:
+                # A top-level member just ended; parse everything read so far
+                self._update(''.join(self._buffer[:-1]) + '}')
+        return self.result
+
+    def _update(self, document):
+        try:
+            parsed = json.loads(document)
+        except json.JSONDecodeError:
+            return
+        if isinstance(parsed, dict):
+            self.result = parsed
+
+    def has(self, keys):
+        return all(key in self.result for key in keys)
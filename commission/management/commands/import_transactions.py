@@ -0,0 +1,40 @@
+import os
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from commission.importer import ImportFormatError, import_transactions, read_rows
+
+class Command(BaseCommand):
+    help = ('Imports transactions for an agent from a CSV or XLSX file with client, product and optional '
+            'amount columns; other columns are stored as metadata')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument('--agent', required=True, help='Username of the agent the transactions belong to')
+        parser.add_argument('--chunk-size', type=int, default=settings.IMPORT_CHUNK_SIZE,
+                            help='Number of rows written per bulk insert and database transaction')
+
+    def handle(self, *args, **options):
+        try:
+            agent = User.objects.get(username=options['agent'])
+        except User.DoesNotExist:
+            raise CommandError(f'Unknown agent: {options["agent"]}')
+        if not os.path.exists(options['path']):
+            raise CommandError(f'No such file: {options["path"]}')
+
+        started_at = time.monotonic()
+        with open(options['path'], 'rb') as file:
+            try:
+                result = import_transactions(
+                    agent, read_rows(file, os.path.basename(options['path'])), chunk_size=options['chunk_size']
+                )
+            except ImportFormatError as error:
+                raise CommandError(str(error))
+
+        for error in result.errors:
+            self.stderr.write(f'Row {error["row"]}: ' + '; '.join(f'{field}: {message}' for field, message in error['errors'].items()))
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} of {result.rows} rows ({result.failed} failed) in {elapsed:.1f}s'
+        ))
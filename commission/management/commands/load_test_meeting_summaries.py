@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from commission.fake_llm import FakeLLMServer
+from commission.gateways import close_groq_gateway
+
+def percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+class Command(BaseCommand):
+    help = ('Pushes concurrent meeting-summary submissions through the Django test client against a '
+            'throwaway test database and a local fake LLM, and reports throughput, latency and query counts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--latency', default='lognormal:0.3,0.5', help='Fake LLM latency distribution')
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+        parser.add_argument('--template-ratio', type=float, default=0.0,
+                            help='Fraction of summaries written with the wizard template')
+
+    def handle(self, *args, **options):
+        server = FakeLLMServer(
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+        ).start()
+        setup_test_environment()
+        if connection.vendor == 'sqlite':
+            # A file database lets the request threads write concurrently
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'load_test.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        close_groq_gateway()
+        try:
+            with override_settings(GROQ_BASE_URL=server.base_url, GROQ_API_KEY='fake', EXTRACTION_CACHE=None,
+                                   GROQ_REQUESTS_PER_MINUTE=60000, GROQ_MAX_CONCURRENCY=options['concurrency']):
+                self._run(options)
+        finally:
+            close_groq_gateway()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            server.stop()
+
+    def _contents(self, count, template_ratio):
+        template_count = int(count * template_ratio)
+        for i in range(count):
+            if i < template_count:
+                yield f'Client: Client {i}, Product: Term Life, Amount: {1000 + i}'
+            else:
+                yield f'Met Client {i} today, discussed a term life policy of about {1000 + i} per year.'
+
+    def _run(self, options):
+        user = User.objects.create_user(username='load-test-agent', password='load-test')
+        token = Token.objects.create(user=user)
+        url = reverse('submit-meeting-summary')
+
+        def submit(content):
+            client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Token {token.key}')
+            with CaptureQueriesContext(connection) as queries:
+                started_at = time.perf_counter()
+                status_code = client.post(url, {'content': content}).status_code
+                latency = time.perf_counter() - started_at
+            connection.close()
+            return status_code, latency, len(queries)
+
+        contents = list(self._contents(options['requests'], options['template_ratio']))
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(submit, contents))
+        elapsed = time.perf_counter() - started_at
+
+        latencies = [latency for _, latency, _ in results]
+        query_counts = [count for _, _, count in results]
+        self.stdout.write(f'Requests:    {len(results)} at concurrency {options["concurrency"]}')
+        self.stdout.write(f'Throughput:  {len(results) / elapsed:.1f} requests/sec')
+        self.stdout.write('Latency:     p50 {:.1f} ms, p95 {:.1f} ms, p99 {:.1f} ms'.format(
+            *(1000 * percentile(latencies, percent) for percent in (50, 95, 99))))
+        self.stdout.write(f'DB queries:  {sum(query_counts) / len(query_counts):.1f} avg, {max(query_counts)} max per request')
+        self.stdout.write(f'Statuses:    {dict(Counter(status for status, _, _ in results))}')
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from commission.workers import MeetingSummaryWorkerPool, drain_meeting_summaries
+
+class Command(BaseCommand):
+    help = 'Runs the meeting summary worker pool outside the web process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.MEETING_SUMMARY_WORKERS)
+        parser.add_argument('--once', action='store_true',
+                            help='Process the PENDING summaries in the foreground and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = drain_meeting_summaries()
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} meeting summaries'))
+            return
+
+        pool = MeetingSummaryWorkerPool(workers=options['workers'])
+        pool.start()
+        self.stdout.write(f'Started {options["workers"]} meeting summary workers')
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pool.stop()
+        self.stdout.write(self.style.SUCCESS('Stopped meeting summary workers'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from commission.models import CommissionRollup
+from commission.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = ('Recomputes the forecast rollups from the commission ledger, e.g. after raw SQL or bulk '
+            'updates that bypassed the services')
+
+    def handle(self, *args, **options):
+        rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {CommissionRollup.objects.count()} rollup rows'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from commission.search import DOCUMENTS, get_search_backend
+
+class Command(BaseCommand):
+    help = ('Rebuilds the full-text search index from the database, e.g. after bulk loads or raw SQL '
+            'that bypassed the save/delete signals')
+
+    def add_arguments(self, parser):
+        parser.add_argument('documents', nargs='*', help=f'Any of {", ".join(DOCUMENTS)}; defaults to all of them')
+
+    def handle(self, *args, **options):
+        unknown = set(options['documents']) - set(DOCUMENTS)
+        if unknown:
+            raise CommandError(f'Unknown documents: {", ".join(sorted(unknown))}')
+        backend = get_search_backend()
+        for document in options['documents'] or DOCUMENTS:
+            with transaction.atomic():
+                backend.rebuild(document)
+            self.stdout.write(f'Rebuilt {document}')
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from commission.models import Transaction
+from commission.services import rebuild_commissions
+
+
+def _init_worker():
+    # Each worker opens its own database connection instead of sharing the parent's
+    django.setup()
+    connections.close_all()
+
+
+def _recompute_partition(first_agent_id, last_agent_id, chunk_size):
+    transactions = Transaction.objects.filter(agent_id__gte=first_agent_id, agent_id__lte=last_agent_id)
+    return rebuild_commissions(transactions, chunk_size=chunk_size)
+
+
+def build_partitions(target_size):
+    """Split the Transaction table into contiguous agent-id ranges of roughly `target_size` rows."""
+    partitions = []
+    first_agent_id = None
+    size = 0
+    counts = Transaction.objects.values('agent_id').annotate(count=Count('id')).order_by('agent_id')
+    for row in counts:
+        if first_agent_id is None:
+            first_agent_id = row['agent_id']
+        size += row['count']
+        if size >= target_size:
+            partitions.append((first_agent_id, row['agent_id'], size))
+            first_agent_id = None
+            size = 0
+    if first_agent_id is not None:
+        partitions.append((first_agent_id, row['agent_id'], size))
+    return partitions
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the commission ledger for all agents using a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes (1 runs in-process)')
+        parser.add_argument('--partition-size', type=int, default=50000,
+                            help='Approximate number of transactions per agent-id partition')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Number of transactions written per bulk operation')
+        parser.add_argument('--checkpoint', default='recompute_commissions.checkpoint.json',
+                            help='File recording completed partitions')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip partitions already recorded in the checkpoint file')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        completed = self._load_checkpoint(checkpoint) if options['resume'] else []
+        if not options['resume'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        partitions = [
+            partition for partition in build_partitions(options['partition_size'])
+            if not any(first <= partition[0] and partition[1] <= last for first, last in completed)
+        ]
+        total = sum(partition[2] for partition in partitions)
+        self.stdout.write(f'Recomputing {total} transactions in {len(partitions)} partitions '
+                          f'({len(completed)} already completed)')
+
+        started_at = time.monotonic()
+        processed = 0
+        for index, (first_agent_id, last_agent_id, count) in enumerate(
+                self._run(partitions, options['workers'], options['chunk_size']), start=1):
+            processed += count
+            completed.append([first_agent_id, last_agent_id])
+            self._save_checkpoint(checkpoint, completed)
+            elapsed = time.monotonic() - started_at
+            self.stdout.write(
+                f'[{index}/{len(partitions)}] agents {first_agent_id}-{last_agent_id}: {count} transactions '
+                f'({processed}/{total}, {processed / elapsed if elapsed else 0:.0f} transactions/sec)'
+            )
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f'Successfully recomputed commissions for {processed} transactions'))
+
+    def _run(self, partitions, workers, chunk_size):
+        if workers <= 1:
+            for first_agent_id, last_agent_id, _ in partitions:
+                yield first_agent_id, last_agent_id, _recompute_partition(first_agent_id, last_agent_id, chunk_size)
+            return
+
+        # Don't let forked workers inherit the parent's open connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(_recompute_partition, first_agent_id, last_agent_id, chunk_size): (first_agent_id, last_agent_id)
+                for first_agent_id, last_agent_id, _ in partitions
+            }
+            for future in as_completed(futures):
+                first_agent_id, last_agent_id = futures[future]
+                yield first_agent_id, last_agent_id, future.result()
+
+    def _load_checkpoint(self, path):
+        if not os.path.exists(path):
+            return []
+        with open(path) as checkpoint_file:
+            return json.load(checkpoint_file)['completed']
+
+    def _save_checkpoint(self, path, completed):
+        with open(path, 'w') as checkpoint_file:
+            json.dump({'completed': completed}, checkpoint_file)
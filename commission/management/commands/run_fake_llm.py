@@ -0,0 +1,35 @@
+import json
+from django.core.management.base import BaseCommand
+from commission.fake_llm import FakeLLMServer
+
+class Command(BaseCommand):
+    help = 'Runs a local fake of the Groq chat-completions API (point GROQ_BASE_URL at it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', default='lognormal:0.3,0.5',
+                            help='constant:S, uniform:A,B, normal:MU,SIGMA or lognormal:MEDIAN,SIGMA (seconds)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+        parser.add_argument('--responses', help='JSON file holding a list of canned completion contents')
+
+    def handle(self, *args, **options):
+        responses = None
+        if options['responses']:
+            with open(options['responses']) as responses_file:
+                responses = json.load(responses_file)
+
+        server = FakeLLMServer(
+            responses=responses,
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            host=options['host'],
+            port=options['port'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Fake LLM listening on {server.base_url}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
@@ -0,0 +1,129 @@
+# commission/metadata.py
+
+import re
+import unicodedata
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import Product, Transaction, TransactionMetadataValue
+from .versioning import bump_version, version_key
+
+COLUMNS = {'decimal': 'decimal_value', 'text': 'text_value', 'date': 'date_value'}
+# Transaction.amount and TransactionMetadataValue.decimal_value
+AMOUNT_MAX_DIGITS = 18
+AMOUNT_DECIMAL_PLACES = 4
+
+def _metadata(transaction):
+    # Metadata posted as a JSON string ends up stored as one
+    return transaction.metadata if isinstance(transaction.metadata, dict) else {}
+
+def parse_decimal(value, max_digits=AMOUNT_MAX_DIGITS, decimal_places=AMOUNT_DECIMAL_PLACES):
+    """
+    Parse amounts such as 300, "1,250.5" or "$5,000" into a Decimal with
+    `decimal_places` places. Returns None for anything that isn't a finite
+    number fitting a DecimalField of `max_digits`.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    # Drop thousands separators, currency symbols and spaces (including non-breaking ones)
+    text = ''.join(char for char in str(value) if char != ',' and unicodedata.category(char) not in ('Sc', 'Zs'))
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return None
+    limit = Decimal(10) ** (max_digits - decimal_places)
+    if not number.is_finite() or abs(number) >= limit:
+        return None
+    # Rounding can carry into one more digit (99.999 -> 100.00)
+    number = number.quantize(Decimal(1).scaleb(-decimal_places))
+    return number if abs(number) < limit else None
+
+def parse_typed(kind, value):
+    if kind == 'decimal':
+        return parse_decimal(value)
+    if kind == 'date':
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            return None
+    if kind == 'text':
+        return None if value is None else str(value)[:255]
+    raise ValueError(f'Unknown metadata type: {kind}')
+
+def transaction_amount(transaction):
+    return parse_decimal(_metadata(transaction).get('amount')) or Decimal(0)
+
+def metadata_values(transaction, hot_keys):
+    metadata = _metadata(transaction)
+    values = []
+    for key, kind in hot_keys.items():
+        value = parse_typed(kind, metadata.get(key))
+        if value is not None:
+            values.append(TransactionMetadataValue(transaction_id=transaction.pk, key=key, **{COLUMNS[kind]: value}))
+    return values
+
+def sync_metadata_values(transactions, hot_keys_by_product=None):
+    """
+    Rewrite the materialized hot metadata of `transactions` (saved Transaction
+    objects) from their JSON metadata, in two queries per batch.
+    """
+    transactions = list(transactions)
+    if hot_keys_by_product is None:
+        hot_keys_by_product = dict(Product.objects.filter(
+            id__in={transaction.product_id for transaction in transactions}
+        ).values_list('id', 'hot_metadata_keys'))
+    values = [
+        value
+        for transaction in transactions
+        for value in metadata_values(transaction, hot_keys_by_product.get(transaction.product_id) or {})
+    ]
+    TransactionMetadataValue.objects.filter(transaction__in=[transaction.pk for transaction in transactions]).delete()
+    TransactionMetadataValue.objects.bulk_create(values, batch_size=1000)
+
+def sync_product_metadata(product, chunk_size=2000):
+    """Re-materialize every transaction of `product` after its hot keys changed."""
+    hot_keys_by_product = {product.pk: product.hot_metadata_keys or {}}
+    rows = list(Transaction.objects.filter(product=product).order_by('id').values_list('id', 'agent_id'))
+    transaction_ids = [transaction_id for transaction_id, _ in rows]
+    for start in range(0, len(transaction_ids), chunk_size):
+        sync_metadata_values(
+            Transaction.objects.filter(id__in=transaction_ids[start:start + chunk_size]).only('id', 'product_id', 'metadata'),
+            hot_keys_by_product
+        )
+    # Metadata filters read the materialized values, so cached transaction lists are stale
+    if rows:
+        for agent_id in sorted({agent_id for _, agent_id in rows}):
+            bump_version(version_key(Transaction, agent_id))
+        bump_version(version_key(Transaction))
+    return len(transaction_ids)
+
+class MetadataFilter(BaseFilterBackend):
+    """
+    Filters transactions on materialized hot metadata, e.g.
+    `?metadata__premium__gte=100` or `?metadata__start_date=2024-01-01`. The
+    key's type comes from the products that declare it.
+    """
+    PARAM = re.compile(r'^metadata__(?P<key>\w+?)(?:__(?P<lookup>exact|gt|gte|lt|lte))?$')
+
+    def filter_queryset(self, request, queryset, view):
+        filters = [(self.PARAM.match(name), value) for name, value in request.query_params.items()]
+        filters = [(match.group('key'), match.group('lookup') or 'exact', value) for match, value in filters if match]
+        if not filters:
+            return queryset
+
+        key_types = {}
+        for hot_keys in Product.objects.exclude(hot_metadata_keys={}).values_list('hot_metadata_keys', flat=True):
+            for key, kind in hot_keys.items():
+                key_types.setdefault(key, kind)
+        for key, lookup, raw in filters:
+            if key not in key_types:
+                raise ValidationError({f'metadata__{key}': 'Not a materialized metadata key.'})
+            value = parse_typed(key_types[key], raw)
+            if value is None:
+                raise ValidationError({f'metadata__{key}': f'Expected a {key_types[key]} value.'})
+            # A range scan on the (key, value) index rather than a probe per transaction
+            queryset = queryset.filter(pk__in=TransactionMetadataValue.objects.filter(
+                key=key, **{f'{COLUMNS[key_types[key]]}__{lookup}': value}
+            ).values('transaction_id'))
+        return queryset
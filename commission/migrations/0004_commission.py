@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0003_alter_commissionstructure_agent_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Commission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('expected_payment_date', models.DateField()),
+                ('status', models.CharField(default='PENDING', max_length=20)),
+                ('commission_structure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commissions', to='commission.commissionstructure')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commissions', to='commission.transaction')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='commission',
+            constraint=models.UniqueConstraint(fields=('transaction', 'commission_structure'), name='unique_commission_per_structure'),
+        ),
+    ]
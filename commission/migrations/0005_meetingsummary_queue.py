@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0004_commission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetingsummary',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='meetingsummary',
+            name='transaction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='commission.transaction'),
+        ),
+        migrations.AlterField(
+            model_name='meetingsummary',
+            name='processed_status',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+    ]
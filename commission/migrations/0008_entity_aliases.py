@@ -0,0 +1,58 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:37
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of entity_index.normalize_name as of this migration
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', str(name or ''))
+    name = ''.join(char for char in name if not unicodedata.combining(char)).casefold()
+    return ' '.join(re.sub(r'[^\w]+', ' ', name).split())
+
+
+def backfill_aliases(apps, schema_editor):
+    # Existing duplicates ("John Smith" / "john smith") resolve to the oldest row
+    for model_name, alias_name, name_field, entity_field in (
+        ('Product', 'ProductAlias', 'name', 'product_id'),
+        ('Client', 'ClientAlias', 'display_name', 'client_id'),
+    ):
+        aliases = {}
+        for entity_id, name in apps.get_model('commission', model_name).objects.order_by('id').values_list('id', name_field):
+            aliases.setdefault(normalize_name(name), entity_id)
+        aliases.pop('', None)
+        alias_model = apps.get_model('commission', alias_name)
+        alias_model.objects.bulk_create(
+            [alias_model(alias=alias, **{entity_field: entity_id}) for alias, entity_id in aliases.items()],
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0007_resourceversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=255, unique=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='commission.client')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=255, unique=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='commission.product')),
+            ],
+        ),
+        migrations.RunPython(backfill_aliases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:02
+
+from django.db import migrations
+
+
+# Frozen copy of search.DOCUMENTS and the SQLiteFTS5Backend table layout as of this migration
+DOCUMENTS = {
+    'client': ('Client', ('display_name', 'first_name', 'last_name', 'email', 'phone_number')),
+    'meetingsummary': ('MeetingSummary', ('content',)),
+}
+TOKENIZER = 'unicode61 remove_diacritics 2'
+PREFIXES = '2 3 4'
+
+
+def fts_table(document):
+    return f'commission_{document}_fts'
+
+
+def create_fts_tables(apps, schema_editor):
+    # Only the FTS5 backend keeps tables of its own; other databases fall back to DatabaseSearchBackend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for document, (model_name, fields) in DOCUMENTS.items():
+            table = fts_table(document)
+            columns = ', '.join(fields)
+            values = ', '.join(f"COALESCE({field}, '')" for field in fields)
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"{columns}, tokenize='{TOKENIZER}', prefix='{PREFIXES}')"
+            )
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(
+                f'INSERT INTO {table}(rowid, {columns}) '
+                f"SELECT id, {values} FROM {apps.get_model('commission', model_name)._meta.db_table}"
+            )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for document in DOCUMENTS:
+            cursor.execute(f'DROP TABLE IF EXISTS {fts_table(document)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0008_entity_aliases'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
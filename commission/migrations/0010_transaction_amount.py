@@ -0,0 +1,100 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:44
+
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of metadata.parse_decimal as of this migration, for DecimalField(max_digits=18, decimal_places=4)
+def parse_decimal(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    text = ''.join(char for char in str(value) if char != ',' and unicodedata.category(char) not in ('Sc', 'Zs'))
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return None
+    limit = Decimal(10) ** 14
+    if not number.is_finite() or abs(number) >= limit:
+        return None
+    number = number.quantize(Decimal('0.0001'))
+    return number if abs(number) < limit else None
+
+
+def backfill_amounts(apps, schema_editor):
+    # No product declares hot metadata keys yet, so only the amount needs backfilling
+    Transaction = apps.get_model('commission', 'Transaction')
+    last_id = 0
+    while True:
+        chunk = list(Transaction.objects.filter(id__gt=last_id).order_by('id').only('id', 'metadata')[:2000])
+        if not chunk:
+            break
+        for transaction in chunk:
+            metadata = transaction.metadata if isinstance(transaction.metadata, dict) else {}
+            transaction.amount = parse_decimal(metadata.get('amount')) or 0
+        Transaction.objects.bulk_update(chunk, ['amount'])
+        last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionMetadataValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50)),
+                ('decimal_value', models.DecimalField(decimal_places=4, max_digits=18, null=True)),
+                ('text_value', models.CharField(max_length=255, null=True)),
+                ('date_value', models.DateField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='hot_metadata_keys',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['agent', 'amount', 'id'], name='transaction_agent_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['amount', 'id'], name='transaction_amount_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='transactionmetadatavalue',
+            name='transaction',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metadata_values', to='commission.transaction'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionmetadatavalue',
+            index=models.Index(fields=['key', 'decimal_value'], name='metadata_decimal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionmetadatavalue',
+            index=models.Index(fields=['key', 'text_value'], name='metadata_text_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionmetadatavalue',
+            index=models.Index(fields=['key', 'date_value'], name='metadata_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='transactionmetadatavalue',
+            constraint=models.UniqueConstraint(fields=('transaction', 'key'), name='unique_metadata_value_per_key'),
+        ),
+        migrations.RunPython(backfill_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Commission = apps.get_model('commission', 'Commission')
+    CommissionRollup = apps.get_model('commission', 'CommissionRollup')
+    totals = Commission.objects.order_by().annotate(
+        agent_id=F('transaction__agent_id'),
+        month=TruncMonth('expected_payment_date'),
+        company_id=F('commission_structure__agreement__company_id'),
+        product_id=F('commission_structure__product_id'),
+        commission_type=F('commission_structure__commission_type'),
+    ).values('agent_id', 'month', 'company_id', 'product_id', 'commission_type').annotate(
+        total=Sum('amount'), count=Count('id')
+    )
+    CommissionRollup.objects.bulk_create([CommissionRollup(**row) for row in totals], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0010_transaction_amount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommissionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('commission_type', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('count', models.PositiveIntegerField()),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='commission.insurancecompany')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='commission.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='rollup_month_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='commissionrollup',
+            constraint=models.UniqueConstraint(fields=('agent', 'month', 'company', 'product', 'commission_type'), name='unique_rollup_per_key'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
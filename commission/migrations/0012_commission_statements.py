@@ -0,0 +1,68 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0011_commission_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommissionStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('client_name', models.CharField(max_length=255)),
+                ('product_name', models.CharField(max_length=255)),
+                ('payment_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='commission',
+            index=models.Index(fields=['expected_payment_date'], name='commission_payment_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='commissionstatement',
+            name='agent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='commissionstatement',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='commission.insurancecompany'),
+        ),
+        migrations.AddField(
+            model_name='statementline',
+            name='client',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='commission.client'),
+        ),
+        migrations.AddField(
+            model_name='statementline',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='commission.product'),
+        ),
+        migrations.AddField(
+            model_name='statementline',
+            name='statement',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='commission.commissionstatement'),
+        ),
+        migrations.AddIndex(
+            model_name='statementline',
+            index=models.Index(fields=['statement', 'client', 'product', 'payment_date'], name='statement_line_match_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0012_commission_statements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetingsummary',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
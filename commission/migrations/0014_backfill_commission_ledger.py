@@ -0,0 +1,108 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:36
+
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+# Frozen copy of services._expected_payment_date as of this migration
+def _on_day(year, month, day):
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _expected_payment_date(payment_terms, today):
+    if payment_terms.payment_type == 'DAY_OF_MONTH':
+        if payment_terms.day_of_month is None:
+            return None
+        expected_payment_date = _on_day(today.year, today.month, payment_terms.day_of_month)
+        if expected_payment_date >= today:
+            return expected_payment_date
+        next_month = today.replace(day=28) + timedelta(days=4)
+        return _on_day(next_month.year, next_month.month, payment_terms.day_of_month)
+    expected_payment_date = payment_terms.specific_date
+    if expected_payment_date is None:
+        return None
+    if expected_payment_date < today:
+        expected_payment_date = _on_day(expected_payment_date.year + 1, expected_payment_date.month, expected_payment_date.day)
+    return expected_payment_date
+
+
+def backfill_ledger(apps, schema_editor):
+    # Transactions saved before the ledger existed (0004) have no Commission rows
+    Transaction = apps.get_model('commission', 'Transaction')
+    CommissionStructure = apps.get_model('commission', 'CommissionStructure')
+    Commission = apps.get_model('commission', 'Commission')
+    CommissionRollup = apps.get_model('commission', 'CommissionRollup')
+
+    structures_by_key = defaultdict(list)
+    for structure in CommissionStructure.objects.select_related('agreement', 'payment_terms').order_by('id'):
+        structures_by_key[(structure.agreement.agent_id, structure.product_id)].append(structure)
+
+    today = timezone.now().date()
+    pending = Transaction.objects.filter(commissions__isnull=True).order_by('id').only('id', 'agent_id', 'product_id', 'amount')
+    created = False
+    last_id = 0
+    while True:
+        chunk = list(pending.filter(id__gt=last_id)[:2000])
+        if not chunk:
+            break
+        commissions = []
+        for transaction in chunk:
+            for structure in structures_by_key.get((transaction.agent_id, transaction.product_id), ()):
+                if structure.commission_type == 'SCOPE':
+                    amount = transaction.amount * (structure.rate / Decimal(100))
+                elif structure.commission_type == 'RECURRING':
+                    amount = structure.rate
+                else:
+                    amount = Decimal(0)
+                expected_payment_date = _expected_payment_date(structure.payment_terms, today)
+                if amount > 0 and expected_payment_date is not None:
+                    commissions.append(Commission(
+                        transaction=transaction, commission_structure=structure, amount=amount,
+                        expected_payment_date=expected_payment_date, status='PENDING',
+                    ))
+        Commission.objects.bulk_create(commissions, batch_size=1000)
+        created = created or bool(commissions)
+        last_id = chunk[-1].id
+
+    if not created:
+        return
+    # Same aggregation as 0011's backfill_rollups, over the whole ledger
+    CommissionRollup.objects.all().delete()
+    totals = Commission.objects.order_by().annotate(
+        agent_id=F('transaction__agent_id'),
+        month=TruncMonth('expected_payment_date'),
+        company_id=F('commission_structure__agreement__company_id'),
+        product_id=F('commission_structure__product_id'),
+        commission_type=F('commission_structure__commission_type'),
+    ).values('agent_id', 'month', 'company_id', 'product_id', 'commission_type').annotate(
+        total=Sum('amount'), count=Count('id')
+    )
+    CommissionRollup.objects.bulk_create([CommissionRollup(**row) for row in totals], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0013_meetingsummary_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commission',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=17),
+        ),
+        migrations.AlterField(
+            model_name='commissionrollup',
+            name='total',
+            field=models.DecimalField(decimal_places=2, max_digits=20),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 # commission/models.py
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -18,6 +19,8 @@ class Product(models.Model):
     ]
     name = models.CharField(max_length=100)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
+    # Transaction metadata keys to materialize for this product, e.g. {"premium": "decimal", "start_date": "date"}
+    hot_metadata_keys = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
@@ -31,6 +34,13 @@ class PaymentTerms(models.Model):
     day_of_month = models.IntegerField(null=True, blank=True)
     specific_date = models.DateField(null=True, blank=True)
 
+    def clean(self):
+        # Days past a month's end are paid on its last day, so 31 means "month end"
+        if self.payment_type == 'DAY_OF_MONTH' and not 1 <= (self.day_of_month or 0) <= 31:
+            raise ValidationError({'day_of_month': 'A day between 1 and 31 is required.'})
+        if self.payment_type == 'SPECIFIC_DATE' and self.specific_date is None:
+            raise ValidationError({'specific_date': 'A date is required.'})
+
     def __str__(self):
         if self.payment_type == 'DAY_OF_MONTH':
             return f"Day {self.day_of_month} of each month"
@@ -64,6 +74,11 @@ class Client(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='client_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.display_name
 
@@ -73,6 +88,16 @@ class Transaction(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     metadata = models.JSONField(default=dict)
+    # Materialized from metadata['amount'] on save (see signals.py)
+    amount = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['agent', 'created_at', 'id'], name='transaction_agent_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='transaction_created_id_idx'),
+            models.Index(fields=['agent', 'amount', 'id'], name='transaction_agent_amount_idx'),
+            models.Index(fields=['amount', 'id'], name='transaction_amount_id_idx'),
+        ]
 
     def __str__(self):
         return f"Transaction for {self.client.display_name} - {self.product.name}"
@@ -81,7 +106,131 @@ class MeetingSummary(models.Model):
     agent = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     content = models.TextField()
-    processed_status = models.CharField(max_length=50)
+    processed_status = models.CharField(max_length=50, db_index=True)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='summary_created_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Meeting Summary for {self.agent.username} on {self.created_at.date()}"
+
+class Commission(models.Model):
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='commissions')
+    commission_structure = models.ForeignKey(CommissionStructure, on_delete=models.CASCADE, related_name='commissions')
+    # Wide enough for the largest Transaction.amount at the largest CommissionStructure.rate
+    amount = models.DecimalField(max_digits=17, decimal_places=2)
+    expected_payment_date = models.DateField()
+    status = models.CharField(max_length=20, default='PENDING')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['transaction', 'commission_structure'], name='unique_commission_per_structure'),
+        ]
+        indexes = [
+            models.Index(fields=['expected_payment_date'], name='commission_payment_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Commission {self.amount} for transaction {self.transaction_id}"
+
+class ResourceVersion(models.Model):
+    # Bumped whenever a row behind `key` (a table, or a table for one agent) changes
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+class ProductAlias(models.Model):
+    # Normalized spellings (see entity_index.normalize_name) that resolve to a product
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return f"{self.alias} -> {self.product_id}"
+
+class ClientAlias(models.Model):
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return f"{self.alias} -> {self.client_id}"
+
+class TransactionMetadataValue(models.Model):
+    # A product's hot metadata key for one transaction, stored in the column matching its type
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='metadata_values')
+    key = models.CharField(max_length=50)
+    decimal_value = models.DecimalField(max_digits=18, decimal_places=4, null=True)
+    text_value = models.CharField(max_length=255, null=True)
+    date_value = models.DateField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['transaction', 'key'], name='unique_metadata_value_per_key'),
+        ]
+        indexes = [
+            models.Index(fields=['key', 'decimal_value'], name='metadata_decimal_idx'),
+            models.Index(fields=['key', 'text_value'], name='metadata_text_idx'),
+            models.Index(fields=['key', 'date_value'], name='metadata_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} for transaction {self.transaction_id}"
+
+class CommissionRollup(models.Model):
+    # Ledger totals per agent and payment month, kept current by rollups.refresh_rollups
+    agent = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()
+    company = models.ForeignKey(InsuranceCompany, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    commission_type = models.CharField(max_length=20)
+    total = models.DecimalField(max_digits=20, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['agent', 'month', 'company', 'product', 'commission_type'], name='unique_rollup_per_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='rollup_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.commission_type} {self.total} for agent {self.agent_id} in {self.month:%Y-%m}"
+
+class CommissionStatement(models.Model):
+    # A company's statement of commissions paid to an agent, staged for reconciliation
+    agent = models.ForeignKey(User, on_delete=models.CASCADE)
+    company = models.ForeignKey(InsuranceCompany, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.company.name} statement for {self.agent.username} ({self.filename})"
+
+class StatementLine(models.Model):
+    statement = models.ForeignKey(CommissionStatement, on_delete=models.CASCADE, related_name='lines')
+    row_number = models.PositiveIntegerField()
+    client_name = models.CharField(max_length=255)
+    product_name = models.CharField(max_length=255)
+    # Resolved through the alias tables on ingest; null when the name is unknown
+    client = models.ForeignKey('commission.Client', on_delete=models.SET_NULL, null=True)
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+    payment_date = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['statement', 'client', 'product', 'payment_date'], name='statement_line_match_idx'),
+        ]
 
     def __str__(self):
-        return f"Meeting Summary for {self.agent.username} on {self.created_at.date()}"
\ No newline at end of file
+        return f"Line {self.row_number} of statement {self.statement_id}"
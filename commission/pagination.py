@@ -0,0 +1,99 @@
+# commission/pagination.py
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the ordering field plus `id`, so rows sharing a
+    timestamp never shift between pages and every page is a single index range
+    scan (`WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC`)
+    regardless of depth. The ordering field can be switched with the view's
+    OrderingFilter; `id` is always added as the tie-breaker.
+    """
+    ordering = '-created_at'
+    page_size = settings.API_PAGE_SIZE
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+        position = self.cursor.position if self.cursor else None
+
+        if reverse:
+            queryset = queryset.order_by(*[_invert(field) for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            field = self.ordering[0]
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            value, pk = position
+            name = field.lstrip('-')
+            try:
+                if len(self.ordering) == 1:
+                    queryset = queryset.filter(**{f'{name}__{lookup}': value})
+                else:
+                    queryset = queryset.filter(
+                        Q(**{f'{name}__{lookup}': value}) | Q(**{name: value, f'id__{lookup}': pk})
+                    )
+            except (ValidationError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        field = super().get_ordering(request, queryset, view)[0]
+        if field.lstrip('-') in ('id', 'pk'):
+            return (field,)
+        return (field, '-id' if field.startswith('-') else 'id')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        value, separator, pk = cursor.position.rpartition('|')
+        if not separator or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=(value, int(pk)))
+
+    def _position(self, instance):
+        return f'{self._get_position_from_instance(instance, self.ordering)}|{instance.pk}'
+
+def _invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
@@ -0,0 +1,79 @@
+# commission/rate_limit.py
+
+import re
+import threading
+import time
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+def parse_duration(value):
+    """
+    Parse a rate-limit duration such as "2m59.56s", "7.66s", "500ms" or a
+    plain number of seconds (as sent in Retry-After). Returns None if unparsable.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or ''.join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket whose refill rate follows the provider's quota.
+
+    The rate is re-derived from the x-ratelimit-remaining/reset headers after
+    every response, halved on a 429 (with all callers paused for Retry-After),
+    and otherwise crept back up towards `max_rate`.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=0.05, max_rate=None, increase=0.05):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self.increase = increase
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        reset = parse_duration(headers.get('x-ratelimit-reset-requests'))
+        with self._lock:
+            if remaining is not None and reset:
+                # Spread what is left of the window evenly over the time until it resets
+                rate = int(remaining) / reset
+            else:
+                rate = self.rate + self.increase
+            self.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def throttle(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0
+            self._updated_at = now
+            self._paused_until = max(self._paused_until, now + (retry_after or 1 / self.rate))
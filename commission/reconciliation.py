@@ -0,0 +1,170 @@
+# commission/reconciliation.py
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+from django.db.models import Max, Min
+from .entity_index import normalize_name
+from .importer import ImportResult
+from .metadata import parse_decimal, parse_typed
+from .models import ClientAlias, Commission, ProductAlias, StatementLine
+from .rollups import add_months, first_of_month
+
+PAYMENT_DATE_COLUMN = 'payment_date'
+AMOUNT_COLUMN = 'amount'
+CENTS = Decimal('0.01')
+# Each bucket and the amounts its entries carry: lines bring `actual`, commissions `expected`
+BUCKETS = {
+    'matched': ('expected', 'actual'),
+    'over_paid': ('expected', 'actual'),
+    'under_paid': ('expected', 'actual'),
+    'missing': ('expected',),
+    'unexpected': ('actual',),
+}
+
+def _alias_ids(alias_model, field, names):
+    keys = {normalize_name(name) for name in names}
+    return dict(alias_model.objects.filter(alias__in=keys).values_list('alias', f'{field}_id'))
+
+def _parse_line(values):
+    # "Payment Date" and "payment_date" name the same column
+    values = {column.replace(' ', '_'): value for column, value in values.items()}
+    client = str(values.get('client') or '').strip()
+    product = str(values.get('product') or '').strip()
+    payment_date = parse_typed('date', values.get(PAYMENT_DATE_COLUMN))
+    # StatementLine.amount holds 12 digits with 2 places; NaN and larger amounts are row errors
+    amount = parse_decimal(values.get(AMOUNT_COLUMN), max_digits=12, decimal_places=2)
+    errors = {}
+    if not normalize_name(client):
+        errors['client'] = 'This field is required.'
+    if not normalize_name(product):
+        errors['product'] = 'This field is required.'
+    if payment_date is None:
+        errors[PAYMENT_DATE_COLUMN] = 'A valid date (YYYY-MM-DD) is required.'
+    if amount is None:
+        errors[AMOUNT_COLUMN] = 'A valid number is required.'
+    return client, product, payment_date, amount, errors
+
+def ingest_statement(statement, rows, chunk_size=1000):
+    """
+    Stage every `(row_number, values)` of a statement file as a
+    StatementLine, resolving client and product names with one alias-table
+    query per chunk. Invalid rows are reported in the result and skipped.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return result
+        result.rows += len(chunk)
+        parsed = []
+        for row_number, values in chunk:
+            client, product, payment_date, amount, errors = _parse_line(values)
+            if errors:
+                result.add_error(row_number, errors)
+            else:
+                parsed.append((row_number, client, product, payment_date, amount))
+
+        client_ids = _alias_ids(ClientAlias, 'client', (line[1] for line in parsed))
+        product_ids = _alias_ids(ProductAlias, 'product', (line[2] for line in parsed))
+        StatementLine.objects.bulk_create([
+            StatementLine(
+                statement=statement, row_number=row_number, client_name=client, product_name=product,
+                client_id=client_ids.get(normalize_name(client)), product_id=product_ids.get(normalize_name(product)),
+                payment_date=payment_date, amount=amount,
+            )
+            for row_number, client, product, payment_date, amount in parsed
+        ])
+        result.created += len(parsed)
+
+class Reconciliation:
+    def __init__(self, statement):
+        self.statement = statement
+        self.buckets = {bucket: [] for bucket in BUCKETS}
+
+    def summary(self):
+        return {
+            bucket: {
+                'count': len(self.buckets[bucket]),
+                **{side: sum((entry[side] for entry in self.buckets[bucket]), Decimal(0)).quantize(CENTS) for side in sides},
+            }
+            for bucket, sides in BUCKETS.items()
+        }
+
+def _months_between(first, last):
+    month = first_of_month(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+def reconcile(statement, amount_tolerance, date_tolerance_days):
+    """
+    Match the statement's lines against the agent's expected commissions
+    from the statement's company.
+
+    Expected commissions are loaded in one query over the statement's date
+    window (widened by the date tolerance) and hashed by (client, product,
+    payment month); each line probes the months its tolerance reaches and
+    takes the closest unmatched commission paid within `date_tolerance_days`.
+    Paired amounts within `amount_tolerance` are matched, others over- or
+    under-paid; leftover commissions are missing and leftover lines
+    unexpected.
+    """
+    reconciliation = Reconciliation(statement)
+    window = statement.lines.aggregate(first=Min('payment_date'), last=Max('payment_date'))
+    if window['first'] is None:
+        return reconciliation
+    tolerance = timedelta(days=date_tolerance_days)
+
+    expected = Commission.objects.filter(
+        transaction__agent_id=statement.agent_id,
+        commission_structure__agreement__company_id=statement.company_id,
+        expected_payment_date__gte=window['first'] - tolerance,
+        expected_payment_date__lte=window['last'] + tolerance,
+    ).order_by('expected_payment_date', 'id').values_list(
+        'id', 'transaction_id', 'transaction__client_id', 'transaction__product_id', 'expected_payment_date', 'amount'
+    )
+    by_key = defaultdict(list)
+    for row in expected.iterator(chunk_size=5000):
+        by_key[(row[2], row[3], first_of_month(row[4]))].append(row)
+
+    matched_ids = set()
+    lines = statement.lines.order_by('payment_date', 'id').values_list(
+        'id', 'row_number', 'client_id', 'product_id', 'client_name', 'product_name', 'payment_date', 'amount'
+    )
+    for line_id, row_number, client_id, product_id, client_name, product_name, payment_date, amount in lines.iterator(chunk_size=5000):
+        best = None
+        # Lines naming an unknown client or product can't match anything
+        months = _months_between(payment_date - tolerance, payment_date + tolerance) if client_id and product_id else ()
+        for month in months:
+            for candidate in by_key.get((client_id, product_id, month), ()):
+                if candidate[0] in matched_ids or abs(candidate[4] - payment_date) > tolerance:
+                    continue
+                rank = (abs(candidate[4] - payment_date), abs(candidate[5] - amount))
+                if best is None or rank < best[0]:
+                    best = (rank, candidate)
+
+        line = {'line': line_id, 'row': row_number, 'payment_date': payment_date, 'actual': amount}
+        if best is None:
+            reconciliation.buckets['unexpected'].append({**line, 'client_name': client_name, 'product_name': product_name})
+            continue
+        commission_id, transaction_id, _, _, expected_payment_date, expected_amount = best[1]
+        matched_ids.add(commission_id)
+        difference = amount - expected_amount
+        bucket = 'matched' if abs(difference) <= amount_tolerance else 'over_paid' if difference > 0 else 'under_paid'
+        reconciliation.buckets[bucket].append({
+            **line, 'commission': commission_id, 'transaction': transaction_id,
+            'expected_payment_date': expected_payment_date, 'expected': expected_amount, 'difference': difference,
+        })
+
+    for rows in by_key.values():
+        for commission_id, transaction_id, client_id, product_id, expected_payment_date, expected_amount in rows:
+            if commission_id not in matched_ids:
+                reconciliation.buckets['missing'].append({
+                    'commission': commission_id, 'transaction': transaction_id, 'client': client_id, 'product': product_id,
+                    'expected_payment_date': expected_payment_date, 'expected': expected_amount,
+                })
+    reconciliation.buckets['missing'].sort(key=lambda entry: (entry['expected_payment_date'], entry['commission']))
+    return reconciliation
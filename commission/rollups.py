@@ -0,0 +1,66 @@
+# commission/rollups.py
+
+from functools import reduce
+from operator import or_
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from .models import Commission, CommissionRollup
+
+def first_of_month(day):
+    return day.replace(day=1)
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=month_index + 1, day=1)
+
+def rollup_keys(commissions):
+    """The (agent id, month) rollups that rows of the Commission queryset `commissions` count towards."""
+    return set(
+        commissions.order_by().annotate(month=TruncMonth('expected_payment_date'))
+        .values_list('transaction__agent_id', 'month').distinct()
+    )
+
+def _rollups(commissions):
+    totals = commissions.order_by().annotate(
+        agent_id=F('transaction__agent_id'),
+        month=TruncMonth('expected_payment_date'),
+        company_id=F('commission_structure__agreement__company_id'),
+        product_id=F('commission_structure__product_id'),
+        commission_type=F('commission_structure__commission_type'),
+    ).values('agent_id', 'month', 'company_id', 'product_id', 'commission_type').annotate(
+        total=Sum('amount'), count=Count('id')
+    )
+    return [CommissionRollup(**row) for row in totals]
+
+def _lock_agents(agent_ids):
+    # Refreshes of the same agent take turns (in id order, so they can't deadlock): each
+    # reads the ledger only after the previous one has committed its rollup rows
+    list(User.objects.select_for_update().filter(id__in=agent_ids).order_by('id').values_list('id', flat=True))
+
+def refresh_rollups(keys, batch_size=100):
+    """
+    Recompute the rollup rows of every (agent id, month) in `keys` from the
+    ledger. Only the touched agent-months are read and rewritten, so a
+    single ledger change costs a couple of indexed queries.
+    """
+    keys = sorted({(agent_id, first_of_month(month)) for agent_id, month in keys})
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        with db_transaction.atomic():
+            _lock_agents({agent_id for agent_id, _ in batch})
+            rollups = _rollups(Commission.objects.filter(reduce(or_, (
+                Q(transaction__agent_id=agent_id, expected_payment_date__gte=month, expected_payment_date__lt=add_months(month, 1))
+                for agent_id, month in batch
+            ))))
+            CommissionRollup.objects.filter(reduce(or_, (Q(agent_id=agent_id, month=month) for agent_id, month in batch))).delete()
+            CommissionRollup.objects.bulk_create(rollups)
+
+def rebuild_rollups():
+    """Recompute every rollup row from the ledger."""
+    with db_transaction.atomic():
+        _lock_agents(Commission.objects.values('transaction__agent_id'))
+        rollups = _rollups(Commission.objects.all())
+        CommissionRollup.objects.all().delete()
+        CommissionRollup.objects.bulk_create(rollups, batch_size=1000)
@@ -0,0 +1,154 @@
+# commission/search.py
+
+import re
+import threading
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+from .models import Client, MeetingSummary
+
+# Searchable documents: the model behind each one and the fields that are indexed
+DOCUMENTS = {
+    'client': (Client, ('display_name', 'first_name', 'last_name', 'email', 'phone_number')),
+    'meetingsummary': (MeetingSummary, ('content',)),
+}
+
+def tokenize(query):
+    return re.findall(r'\w+', query.casefold())
+
+class DatabaseSearchBackend:
+    """
+    Portable fallback that ORs `icontains` over the indexed fields. There is
+    no index to maintain and no ranking beyond newest first.
+    """
+
+    def index(self, document, instance):
+        pass
+
+    def remove(self, document, object_id):
+        pass
+
+    def rebuild(self, document):
+        pass
+
+    def filter(self, document, queryset, query, lookup='pk'):
+        model, fields = DOCUMENTS[document]
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        matches = model.objects.all()
+        for token in tokens:
+            matches = matches.filter(reduce(or_, (Q(**{f'{field}__icontains': token}) for field in fields)))
+        return queryset.filter(**{f'{lookup}__in': matches.values('pk')})
+
+    def search(self, document, query, queryset, limit=20):
+        return list(self.filter(document, queryset, query).order_by('-pk').values_list('pk', flat=True)[:limit])
+
+class SQLiteFTS5Backend(DatabaseSearchBackend):
+    """
+    Keeps one FTS5 table per document (`commission_<document>_fts`, rowid =
+    object id) in the main SQLite database, updated on save and delete so
+    matches can be joined against querysets in a single statement. Every
+    query token is matched as a prefix, and results rank by bm25.
+    """
+    # The FTS tables are only created on SQLite (migration 0009)
+    vendor = 'sqlite'
+    TOKENIZER = 'unicode61 remove_diacritics 2'
+    PREFIXES = '2 3 4'
+
+    def table(self, document):
+        return f'commission_{document}_fts'
+
+    def install(self, schema_connection=None):
+        with (schema_connection or connection).cursor() as cursor:
+            for document, (_, fields) in DOCUMENTS.items():
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table(document)} USING fts5("
+                    f"{', '.join(fields)}, tokenize='{self.TOKENIZER}', prefix='{self.PREFIXES}')"
+                )
+
+    def index(self, document, instance):
+        _, fields = DOCUMENTS[document]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {self.table(document)}(rowid, {', '.join(fields)}) "
+                f"VALUES (%s{', %s' * len(fields)})",
+                [instance.pk] + [getattr(instance, field) or '' for field in fields]
+            )
+
+    def remove(self, document, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(document)} WHERE rowid = %s', [object_id])
+
+    def rebuild(self, document, schema_connection=None):
+        model, fields = DOCUMENTS[document]
+        columns = ', '.join(fields)
+        values = ', '.join(f"COALESCE({field}, '')" for field in fields)
+        with (schema_connection or connection).cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(document)}')
+            cursor.execute(
+                f'INSERT INTO {self.table(document)}(rowid, {columns}) '
+                f'SELECT id, {values} FROM {model._meta.db_table}'
+            )
+
+    def match_expression(self, query):
+        # Quote every token so user input can't inject FTS5 syntax, and match each as a prefix
+        return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+    def filter(self, document, queryset, query, lookup='pk'):
+        match = self.match_expression(query)
+        if not match:
+            return queryset
+        table = self.table(document)
+        return queryset.filter(**{
+            f'{lookup}__in': RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        })
+
+    def search(self, document, query, queryset, limit=20):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        table = self.table(document)
+        allowed_sql, allowed_params = queryset.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s AND rowid IN ({allowed_sql}) ORDER BY rank LIMIT %s',
+                [match, *allowed_params, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_class = import_string(settings.SEARCH_BACKEND)
+                if getattr(backend_class, 'vendor', connection.vendor) != connection.vendor:
+                    backend_class = DatabaseSearchBackend
+                _backend = backend_class()
+    return _backend
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Filters a viewset by `?search=` through the search backend. The view sets
+    `search_document` (a key of DOCUMENTS) and, when the document is reached
+    through a relation, `search_lookup` (e.g. 'client' on transactions).
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().filter(
+            view.search_document, queryset, query, lookup=getattr(view, 'search_lookup', 'pk')
+        )
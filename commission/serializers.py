@@ -1,13 +1,17 @@
 # commission/serializers.py
 
+from decimal import Decimal
+from django.conf import settings
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from .metadata import parse_decimal
 from .models import (
     InsuranceCompany, Product, Agreement,
-    PaymentTerms, CommissionStructure, Transaction, MeetingSummary, Client,
+    PaymentTerms, CommissionStructure, Transaction, MeetingSummary, Client, CommissionStatement,
 )
 
 class UserSerializer(serializers.ModelSerializer):
@@ -73,6 +77,20 @@ class PaymentTermsSerializer(serializers.ModelSerializer):
         model = PaymentTerms
         fields = ['id', 'payment_type', 'day_of_month', 'specific_date']
 
+    def validate(self, attrs):
+        payment_terms = PaymentTerms(**{**self._current_values(), **attrs})
+        try:
+            payment_terms.clean()
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.message_dict)
+        return attrs
+
+    def _current_values(self):
+        # Partial updates are checked against the fields they leave alone
+        if self.instance is None:
+            return {}
+        return {field: getattr(self.instance, field) for field in ('payment_type', 'day_of_month', 'specific_date')}
+
 class CommissionStructureSerializer(serializers.ModelSerializer):
     payment_terms = PaymentTermsSerializer()
 
@@ -103,8 +121,15 @@ class TransactionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Transaction
-        fields = ['id', 'agent', 'client', 'client_id', 'product', 'created_at', 'metadata']
-        read_only_fields = ['agent']  # Add this line
+        fields = ['id', 'agent', 'client', 'client_id', 'product', 'created_at', 'metadata', 'amount']
+        read_only_fields = ['agent', 'amount']  # Add this line
+
+    def validate_metadata(self, value):
+        # The amount column is derived from metadata, so an amount it can't hold is rejected here
+        amount = value.get('amount') if isinstance(value, dict) else None
+        if amount not in (None, '') and parse_decimal(amount) is None:
+            raise serializers.ValidationError({'amount': 'A valid number is required.'})
+        return value
 
 class MeetingSummarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -114,6 +139,56 @@ class MeetingSummarySerializer(serializers.ModelSerializer):
 class CalculateCommissionSerializer(serializers.Serializer):
     transaction_id = serializers.IntegerField()
 
+class BulkCommissionSerializer(serializers.Serializer):
+    transaction_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    agent = serializers.IntegerField(required=False)
+    product = serializers.IntegerField(required=False)
+    created_after = serializers.DateField(required=False)
+    created_before = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('created_after') and attrs.get('created_before') and attrs['created_after'] > attrs['created_before']:
+            raise serializers.ValidationError({"created_before": "Must not be earlier than created_after."})
+        return attrs
+
+class ForecastSerializer(serializers.Serializer):
+    GROUP_FIELDS = ('company', 'product', 'commission_type')
+
+    start = serializers.DateField(input_formats=['%Y-%m', 'iso-8601'], required=False)
+    months = serializers.IntegerField(min_value=1, max_value=60, default=12)
+    group_by = serializers.CharField(default='commission_type')
+    agent = serializers.IntegerField(required=False)
+
+    def validate_group_by(self, value):
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = set(fields) - set(self.GROUP_FIELDS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}. Use any of {', '.join(self.GROUP_FIELDS)}.")
+        return list(dict.fromkeys(fields))
+
+class ReconciliationSerializer(serializers.Serializer):
+    amount_tolerance = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal(0), default=settings.RECONCILIATION_AMOUNT_TOLERANCE
+    )
+    date_tolerance_days = serializers.IntegerField(
+        min_value=0, max_value=366, default=settings.RECONCILIATION_DATE_TOLERANCE_DAYS
+    )
+
+class StatementUploadSerializer(ReconciliationSerializer):
+    file = serializers.FileField()
+    company = serializers.PrimaryKeyRelatedField(queryset=InsuranceCompany.objects.all())
+
+class CommissionStatementSerializer(serializers.ModelSerializer):
+    lines = serializers.IntegerField(source='line_count', read_only=True)
+
+    class Meta:
+        model = CommissionStatement
+        fields = ['id', 'agent', 'company', 'filename', 'created_at', 'lines']
+
+class TransactionImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    chunk_size = serializers.IntegerField(min_value=1, max_value=10000, default=settings.IMPORT_CHUNK_SIZE)
+
 class CustomAuthTokenSerializer(serializers.Serializer):
     username = serializers.CharField(label="Username")
     password = serializers.CharField(
@@ -1,97 +1,310 @@
 # commission/services.py
 
+import calendar
+import logging
+from collections import defaultdict
+from datetime import date
 from decimal import Decimal
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F, QuerySet
 from django.utils import timezone
-from .models import MeetingSummary, Transaction, Product, CommissionStructure, Client
-from .gateways import GroqGateway
+from .models import MeetingSummary, Transaction, CommissionStructure, Commission
+from .extractors import get_extractor_chain
+from .gateways import CircuitOpenError, LLMUnavailableError
+from .entity_index import resolve_product, resolve_client
+from .rollups import refresh_rollups, rollup_keys
 
-def calculate_commission(transaction):
+logger = logging.getLogger(__name__)
+
+def _on_day(year, month, day):
+    # Days past the month's end (31 in April, 29 February in other years) fall on its last day
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+def _expected_payment_date(payment_terms, today):
+    """The next payment date on `payment_terms` from `today`, or None when the terms are incomplete."""
+    if payment_terms.payment_type == 'DAY_OF_MONTH':
+        if payment_terms.day_of_month is None:
+            return None
+        expected_payment_date = _on_day(today.year, today.month, payment_terms.day_of_month)
+        if expected_payment_date >= today:
+            return expected_payment_date
+        next_month = today.replace(day=28) + timezone.timedelta(days=4)
+        return _on_day(next_month.year, next_month.month, payment_terms.day_of_month)
+    # SPECIFIC_DATE
+    expected_payment_date = payment_terms.specific_date
+    if expected_payment_date is None:
+        return None
+    if expected_payment_date < today:
+        expected_payment_date = _on_day(expected_payment_date.year + 1, expected_payment_date.month, expected_payment_date.day)
+    return expected_payment_date
+
+def _build_commission(transaction, structure, today):
+    amount = Decimal(0)
+
+    if structure.commission_type == 'SCOPE':
+        # Example: Scope commission is a percentage of the transaction amount
+        amount = transaction.amount * (structure.rate / Decimal(100))
+    elif structure.commission_type == 'RECURRING':
+        # Example: Recurring commission is a fixed amount
+        amount = structure.rate
+    # Add more commission type calculations as needed
+
+    expected_payment_date = _expected_payment_date(structure.payment_terms, today)
+    if amount <= 0 or expected_payment_date is None:
+        return None
+
+    return {
+        'transaction': transaction,
+        'commission_structure': structure,
+        'amount': amount,
+        'expected_payment_date': expected_payment_date,
+        'status': 'PENDING'
+    }
+
+def calculate_commissions(transactions, chunk_size=2000):
+    """
+    Yield commission dicts for every transaction in `transactions`.
+
+    All relevant commission structures (with their payment terms) are loaded
+    in a single query and indexed by (agent, product), so the number of
+    database round-trips does not grow with the size of the batch.
+    `transactions` may be a queryset or any iterable of Transaction objects.
+    """
+    if isinstance(transactions, QuerySet):
+        agent_ids = transactions.order_by().values('agent_id')
+        product_ids = transactions.order_by().values('product_id')
+        transactions = transactions.iterator(chunk_size=chunk_size)
+    else:
+        transactions = list(transactions)
+        agent_ids = {transaction.agent_id for transaction in transactions}
+        product_ids = {transaction.product_id for transaction in transactions}
+
+    structures_by_key = defaultdict(list)
     commission_structures = CommissionStructure.objects.filter(
-        agreement__agent=transaction.agent,
-        product=transaction.product
+        agreement__agent__in=agent_ids,
+        product__in=product_ids
+    ).select_related('agreement', 'payment_terms').order_by('id')
+    for structure in commission_structures:
+        structures_by_key[(structure.agreement.agent_id, structure.product_id)].append(structure)
+
+    today = timezone.now().date()
+    for transaction in transactions:
+        for structure in structures_by_key.get((transaction.agent_id, transaction.product_id), ()):
+            commission_data = _build_commission(transaction, structure, today)
+            if commission_data is not None:
+                yield commission_data
+
+def calculate_commission(transaction):
+    return list(calculate_commissions([transaction]))
+
+def _sync_commissions(existing, commissions, rollup_keys_to_refresh=()):
+    """
+    Bring the ledger rows in `existing` in line with freshly computed
+    `commissions`, keeping the status of rows that are still valid, and
+    refresh the forecast rollups of every agent-month that changed (plus
+    `rollup_keys_to_refresh`).
+    """
+    current = {(row.transaction_id, row.commission_structure_id): row for row in existing}
+    to_create = []
+    to_update = []
+    touched = set(rollup_keys_to_refresh)
+
+    for commission_data in commissions:
+        key = (commission_data['transaction'].id, commission_data['commission_structure'].id)
+        amount = commission_data['amount'].quantize(Decimal('0.01'))
+        row = current.pop(key, None)
+        if row is None:
+            to_create.append(Commission(
+                transaction=commission_data['transaction'],
+                commission_structure=commission_data['commission_structure'],
+                amount=amount,
+                expected_payment_date=commission_data['expected_payment_date'],
+                status=commission_data['status']
+            ))
+        elif row.amount != amount or row.expected_payment_date != commission_data['expected_payment_date']:
+            row.amount = amount
+            row.expected_payment_date = commission_data['expected_payment_date']
+            to_update.append(row)
+        else:
+            continue
+        touched.add((commission_data['transaction'].agent_id, commission_data['expected_payment_date']))
+
+    if current or to_update:
+        # The agent-months that changed and removed rows counted towards before this sync
+        touched |= rollup_keys(Commission.objects.filter(id__in=[row.id for row in (*current.values(), *to_update)]))
+
+    # Reads happen above so the write transaction never has to upgrade a read lock
+    with db_transaction.atomic():
+        if current:
+            Commission.objects.filter(id__in=[row.id for row in current.values()]).delete()
+        if to_update:
+            Commission.objects.bulk_update(to_update, ['amount', 'expected_payment_date'])
+        if to_create:
+            Commission.objects.bulk_create(to_create)
+        refresh_rollups(touched)
+
+def refresh_transaction_commissions(transaction):
+    _sync_commissions(
+        Commission.objects.filter(transaction=transaction),
+        calculate_commissions([transaction])
     )
-    commissions = []
 
-    for structure in commission_structures:
-        amount = Decimal(0)
-
-        if structure.commission_type == 'SCOPE':
-            # Example: Scope commission is a percentage of the transaction amount
-            amount = Decimal(transaction.metadata.get('amount', 0)) * (structure.rate / Decimal(100))
-        elif structure.commission_type == 'RECURRING':
-            # Example: Recurring commission is a fixed amount
-            amount = structure.rate
-        # Add more commission type calculations as needed
-
-        if amount > 0:
-            # Calculate expected payment date based on payment terms
-            if structure.payment_terms.payment_type == 'DAY_OF_MONTH':
-                current_date = timezone.now().date()
-                if current_date.day <= structure.payment_terms.day_of_month:
-                    expected_payment_date = current_date.replace(day=structure.payment_terms.day_of_month)
-                else:
-                    next_month = current_date.replace(day=28) + timezone.timedelta(days=4)
-                    expected_payment_date = next_month.replace(day=structure.payment_terms.day_of_month)
-            else:  # SPECIFIC_DATE
-                expected_payment_date = structure.payment_terms.specific_date
-                if expected_payment_date < timezone.now().date():
-                    expected_payment_date = expected_payment_date.replace(year=expected_payment_date.year + 1)
-
-            commission_data = {
-                'transaction': transaction,
-                'commission_structure': structure,
-                'amount': amount,
-                'expected_payment_date': expected_payment_date,
-                'status': 'PENDING'
-            }
-            commissions.append(commission_data)
-
-    return commissions
+def create_transaction_commissions(transactions):
+    """Write the ledger rows for bulk-created `transactions`, which have none yet."""
+    _sync_commissions((), calculate_commissions(transactions))
 
-def process_meeting_summary(user, content):
-    groq_gateway = GroqGateway()
-    extracted_info = groq_gateway.extract_meeting_summary_info(content)
-    
+def refresh_structure_commissions(structure):
+    # A changed commission type moves totals between rollups even when amounts stay put
+    previous_keys = rollup_keys(Commission.objects.filter(commission_structure=structure))
+    transactions = Transaction.objects.filter(
+        agent_id=structure.agreement.agent_id,
+        product_id=structure.product_id
+    )
+    today = timezone.now().date()
+    commissions = (
+        _build_commission(transaction, structure, today)
+        for transaction in transactions.iterator()
+    )
+    _sync_commissions(
+        Commission.objects.filter(commission_structure=structure),
+        (commission_data for commission_data in commissions if commission_data is not None),
+        previous_keys
+    )
+
+def refresh_payment_terms_commissions(payment_terms):
+    # Amounts do not depend on payment terms, so only the dates need to move.
+    commissions = Commission.objects.filter(commission_structure__payment_terms=payment_terms)
+    previous_keys = rollup_keys(commissions)
+    expected_payment_date = _expected_payment_date(payment_terms, timezone.now().date())
+    if expected_payment_date is None:
+        # Incomplete terms yield no commissions, as in _build_commission
+        with db_transaction.atomic():
+            commissions.delete()
+            refresh_rollups(previous_keys)
+        return
+    with db_transaction.atomic():
+        commissions.update(expected_payment_date=expected_payment_date)
+        refresh_rollups(previous_keys | {(agent_id, expected_payment_date) for agent_id, _ in previous_keys})
+
+def rebuild_commissions(transactions, chunk_size=2000):
+    """
+    Resync the ledger for every transaction in `transactions`, chunk by chunk.
+    Returns the number of transactions processed.
+    """
+    transaction_ids = list(transactions.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(transaction_ids), chunk_size):
+        chunk_ids = transaction_ids[start:start + chunk_size]
+        _sync_commissions(
+            Commission.objects.filter(transaction_id__in=chunk_ids),
+            calculate_commissions(list(Transaction.objects.filter(id__in=chunk_ids)))
+        )
+    return len(transaction_ids)
+
+def _create_transaction_from_extracted_info(user, extracted_info):
     # Add error handling for missing keys
     client_name = extracted_info.get('client_name')
     product_name = extracted_info.get('product_name')
     amount = extracted_info.get('amount')
     product_category = extracted_info.get('product_category', 'INSURANCE')
 
-    if client_name and product_name and amount:
-        # Create MeetingSummary
-        summary = MeetingSummary.objects.create(
-            agent=user,
-            content=content,
-            processed_status='SUCCESS'
-        )
-        
-        # Create or get Product
-        product, _ = Product.objects.get_or_create(
-            name=product_name,
-            defaults={'category': product_category}
-        )
-        
-        # Create or get Client
-        client, _ = Client.objects.get_or_create(
-            display_name=client_name,
-            defaults={'first_name': client_name.split()[0], 'last_name': client_name.split()[-1]}
-        )
-        
-        # Create Transaction
-        transaction = Transaction.objects.create(
-            agent=user,
-            client=client,
-            product=product,
-            metadata={'amount': amount}
-        )
-        
-        return summary, transaction
-    else:
-        # Handle the case where required information is missing
-        summary = MeetingSummary.objects.create(
-            agent=user,
-            content=content,
-            processed_status='FAILED'
+    if not (client_name and product_name and amount):
+        return None
+
+    # Resolve names against the entity index; only genuinely new names hit the database
+    product_id = resolve_product(product_name, product_category)
+    client_id = resolve_client(client_name)
+    
+    # Create Transaction
+    return Transaction.objects.create(
+        agent=user,
+        client_id=client_id,
+        product_id=product_id,
+        metadata={'amount': amount}
+    )
+
+def process_meeting_summary(user, content):
+    try:
+        extracted_info = get_extractor_chain().extract(content)
+    except LLMUnavailableError:
+        # Degraded path: keep the summary for the worker pool to retry later
+        logger.warning('LLM unavailable, queueing meeting summary for retry', exc_info=True)
+        return enqueue_meeting_summary(user, content), None
+
+    transaction = _create_transaction_from_extracted_info(user, extracted_info)
+    # Handle the case where required information is missing with a FAILED summary
+    summary = MeetingSummary.objects.create(
+        agent=user,
+        content=content,
+        processed_status='SUCCESS' if transaction else 'FAILED',
+        transaction=transaction
+    )
+    return summary, transaction
+
+def enqueue_meeting_summary(user, content):
+    return MeetingSummary.objects.create(
+        agent=user,
+        content=content,
+        processed_status='PENDING'
+    )
+
+def claim_pending_meeting_summary(batch_size=10):
+    """
+    Atomically move one PENDING summary to PROCESSING and return it, or None
+    when the queue is empty. Safe to call from several workers at once.
+    """
+    # Summaries that were never attempted go before ones requeued after a failed attempt
+    pending_ids = MeetingSummary.objects.filter(
+        processed_status='PENDING'
+    ).order_by(F('processing_started_at').asc(nulls_first=True), 'id').values_list('id', flat=True)[:batch_size]
+    for summary_id in pending_ids:
+        claimed = MeetingSummary.objects.filter(id=summary_id, processed_status='PENDING').update(
+            processed_status='PROCESSING',
+            processing_started_at=timezone.now(),
+            attempts=F('attempts') + 1
         )
-        return summary, None
\ No newline at end of file
+        if claimed:
+            return MeetingSummary.objects.select_related('agent').get(id=summary_id)
+    return None
+
+def process_pending_meeting_summary(summary):
+    try:
+        extracted_info = get_extractor_chain().extract(summary.content)
+        summary.transaction = _create_transaction_from_extracted_info(summary.agent, extracted_info)
+    except CircuitOpenError:
+        # Rejected without reaching the model, so this claim does not use up an attempt
+        logger.warning('Circuit open, requeueing meeting summary %s', summary.id)
+        summary.processed_status = 'PENDING'
+        summary.attempts -= 1
+        summary.save(update_fields=['processed_status', 'attempts'])
+        return summary
+    except LLMUnavailableError:
+        if summary.attempts < settings.MEETING_SUMMARY_MAX_ATTEMPTS:
+            logger.warning('LLM unavailable, requeueing meeting summary %s', summary.id)
+            summary.processed_status = 'PENDING'
+            summary.save(update_fields=['processed_status'])
+            return summary
+        logger.error('Giving up on meeting summary %s after %s attempts', summary.id, summary.attempts)
+        summary.transaction = None
+    except Exception:
+        logger.exception('Processing failed for meeting summary %s', summary.id)
+        summary.transaction = None
+    summary.processed_status = 'SUCCESS' if summary.transaction else 'FAILED'
+    summary.save(update_fields=['transaction', 'processed_status'])
+    return summary
+
+def process_next_meeting_summary():
+    summary = claim_pending_meeting_summary()
+    if summary is not None:
+        process_pending_meeting_summary(summary)
+    return summary
+
+def requeue_stale_meeting_summaries(stale_after):
+    # Summaries left PROCESSING by a worker that died go back to the queue,
+    # unless they have used up their attempts (and may be what killed it)
+    stale = MeetingSummary.objects.filter(
+        processed_status='PROCESSING',
+        processing_started_at__lt=timezone.now() - timezone.timedelta(seconds=stale_after)
+    )
+    stale.filter(attempts__gte=settings.MEETING_SUMMARY_MAX_ATTEMPTS).update(processed_status='FAILED')
+    return stale.update(processed_status='PENDING')
@@ -0,0 +1,146 @@
+# commission/signals.py
+
+import logging
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import (
+    Transaction, CommissionStructure, PaymentTerms, Product, InsuranceCompany, Agreement, Client,
+    ProductAlias, ClientAlias, MeetingSummary, Commission,
+)
+from .entity_index import get_entity_index, register_alias
+from .search import DOCUMENTS, get_search_backend
+from .rollups import refresh_rollups, rollup_keys
+from .metadata import transaction_amount, sync_metadata_values, sync_product_metadata
+from .services import (
+    refresh_transaction_commissions, refresh_structure_commissions, refresh_payment_terms_commissions,
+)
+from .versioning import bump_version, version_key
+
+logger = logging.getLogger(__name__)
+
+def _sync_ledger(refresh, instance):
+    # The ledger can be rebuilt with recompute_commissions, so a failure to sync
+    # it is logged rather than allowed to roll back the write that triggered it
+    try:
+        with transaction.atomic():
+            refresh(instance)
+    except Exception:
+        logger.exception('Could not sync the commission ledger for %s %s', type(instance).__name__, instance.pk)
+
+@receiver(pre_save, sender=Transaction)
+def materialize_transaction_amount(sender, instance, **kwargs):
+    instance.amount = transaction_amount(instance)
+
+@receiver(post_save, sender=Transaction)
+def materialize_transaction_metadata(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or 'metadata' in update_fields):
+        sync_metadata_values([instance])
+
+@receiver(post_save, sender=Transaction)
+def update_transaction_commissions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _sync_ledger(refresh_transaction_commissions, instance)
+
+@receiver(post_save, sender=CommissionStructure)
+def update_structure_commissions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _sync_ledger(refresh_structure_commissions, instance)
+
+@receiver(post_save, sender=PaymentTerms)
+def update_payment_terms_commissions(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        _sync_ledger(refresh_payment_terms_commissions, instance)
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=InsuranceCompany)
+@receiver([post_save, post_delete], sender=PaymentTerms)
+@receiver([post_save, post_delete], sender=CommissionStructure)
+def bump_table_version(sender, **kwargs):
+    bump_version(version_key(sender))
+
+@receiver(pre_save, sender=Agreement)
+def remember_agreement_agent(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        previous = sender.objects.filter(pk=instance.pk).values_list('agent_id', 'company_id').first()
+        instance._previous_agent_id, instance._previous_company_id = previous or (None, None)
+
+@receiver([post_save, post_delete], sender=Agreement)
+def bump_agreement_version(sender, instance, **kwargs):
+    agent_ids = {instance.agent_id, getattr(instance, '_previous_agent_id', None)} - {None}
+    for agent_id in agent_ids:
+        bump_version(version_key(Agreement, agent_id))
+
+@receiver([post_save, post_delete], sender=Transaction)
+def bump_transaction_version(sender, instance, **kwargs):
+    # Agents read their own generation; staff lists span the whole table
+    bump_version(version_key(Transaction, instance.agent_id))
+    bump_version(version_key(Transaction))
+
+@receiver(post_save, sender=Product)
+def register_product_alias(sender, instance, raw=False, **kwargs):
+    # Products created by the resolver register their alias themselves
+    if not raw and not getattr(instance, '_alias_registered', False):
+        register_alias(ProductAlias, instance.pk, instance.name)
+
+@receiver(post_save, sender=Client)
+def register_client_alias(sender, instance, raw=False, **kwargs):
+    if not raw and not getattr(instance, '_alias_registered', False):
+        register_alias(ClientAlias, instance.pk, instance.display_name)
+
+@receiver(post_save, sender=ProductAlias)
+@receiver(post_save, sender=ClientAlias)
+def index_alias(sender, instance, raw=False, **kwargs):
+    index = get_entity_index(sender)
+    entity_id = getattr(instance, f'{index.entity_field}_id')
+    # Only committed aliases enter the index, so a rollback can't leave it pointing at nothing
+    transaction.on_commit(lambda: index.add(instance.alias, entity_id))
+
+@receiver(post_delete, sender=ProductAlias)
+@receiver(post_delete, sender=ClientAlias)
+def unindex_alias(sender, instance, **kwargs):
+    index = get_entity_index(sender)
+    index.discard(instance.alias, getattr(instance, f'{index.entity_field}_id'))
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=MeetingSummary)
+def index_search_document(sender, instance, update_fields=None, **kwargs):
+    document = sender._meta.model_name
+    # Status updates on meeting summaries don't touch the indexed text
+    if update_fields is None or set(update_fields) & set(DOCUMENTS[document][1]):
+        get_search_backend().index(document, instance)
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=MeetingSummary)
+def remove_search_document(sender, instance, **kwargs):
+    get_search_backend().remove(sender._meta.model_name, instance.pk)
+
+@receiver(pre_save, sender=Product)
+def remember_hot_metadata_keys(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_hot_metadata_keys = sender.objects.filter(pk=instance.pk).values_list(
+            'hot_metadata_keys', flat=True
+        ).first()
+
+@receiver(post_save, sender=Product)
+def rematerialize_product_metadata(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created and instance.hot_metadata_keys != getattr(instance, '_previous_hot_metadata_keys', None):
+        sync_product_metadata(instance)
+
+@receiver(post_save, sender=Agreement)
+def move_agreement_rollups(sender, instance, raw=False, created=False, **kwargs):
+    # Rollups are keyed by company, so moving an agreement moves its totals
+    if not raw and not created and instance.company_id != getattr(instance, '_previous_company_id', instance.company_id):
+        refresh_rollups(rollup_keys(Commission.objects.filter(commission_structure__agreement=instance)))
+
+@receiver(pre_delete, sender=Transaction)
+@receiver(pre_delete, sender=CommissionStructure)
+def remember_rollup_keys(sender, instance, **kwargs):
+    instance._rollup_keys = rollup_keys(instance.commissions.all())
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=CommissionStructure)
+def refresh_deleted_rollups(sender, instance, **kwargs):
+    # The cascade has removed the ledger rows by now
+    refresh_rollups(getattr(instance, '_rollup_keys', ()))
@@ -0,0 +1,73 @@
+# tests/fakes.py
+
+import threading
+import time
+from types import SimpleNamespace
+
+class FakeRawResponse:
+    def __init__(self, content, headers):
+        self.headers = headers
+        self._content = content
+
+    def parse(self):
+        if isinstance(self._content, FakeStream):
+            return self._content
+        message = SimpleNamespace(content=self._content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class FakeGroqClient:
+    """
+    Stands in for `groq.Groq`, answering every chat completion with `content`.
+    `responses` may list exceptions to raise (or contents to return) for the
+    first calls before falling back to `content`; likewise `delays` lists
+    seconds to sleep before answering, falling back to `delay`.
+    """
+
+    def __init__(self, content, headers=None, responses=(), delay=0, delays=()):
+        self.content = content
+        self.headers = headers or {}
+        self.responses = list(responses)
+        self.delay = delay
+        self.delays = list(delays)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(
+            create=self.create,
+            with_raw_response=SimpleNamespace(create=self.create_raw),
+        ))
+
+    def create_raw(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.requests.append(kwargs)
+            content = self.responses.pop(0) if self.responses else self.content
+            delay = self.delays.pop(0) if self.delays else self.delay
+        time.sleep(delay)
+        if isinstance(content, Exception):
+            raise content
+        if kwargs.get('stream'):
+            self.stream = FakeStream([content[i:i + 8] for i in range(0, len(content), 8)])
+            return FakeRawResponse(self.stream, self.headers)
+        return FakeRawResponse(content, self.headers)
+
+    def create(self, **kwargs):
+        return self.create_raw(**kwargs).parse()
+
+    def close(self):
+        pass
+
+class FakeStream:
+    def __init__(self, pieces):
+        self._pieces = iter(pieces)
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self._pieces:
+            self.read += 1
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,32 @@
+# tests/query_budget.py
+
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for locking in how many queries a piece of code may run.
+    Unlike assertNumQueries, a budget is a ceiling, and the failure message
+    lists every query so the offending lazy load is easy to spot.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, 1))
+            self.fail(f'{executed} queries executed, budget is {budget}:\n{queries}')
+
+    def assertConstantQueries(self, func, grow, using=DEFAULT_DB_ALIAS):
+        """
+        Call `func`, add rows with `grow()`, call `func` again and fail if the
+        second call ran more queries than the first.
+        """
+        with CaptureQueriesContext(connections[using]) as before:
+            func()
+        grow()
+        with self.assertQueryBudget(len(before.captured_queries), using):
+            func()
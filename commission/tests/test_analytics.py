@@ -0,0 +1,110 @@
+# tests/test_analytics.py
+
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.analytics import build_snapshot, decode_month, encode_month, get_snapshot
+from commission.models import (
+    Agreement, Client, CommissionStructure, InsuranceCompany, PaymentTerms, Product, Transaction,
+)
+
+class AnalyticsSnapshotTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(ANALYTICS_SNAPSHOT_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.acme = InsuranceCompany.objects.create(name='Acme', contact_info='acme@example.com')
+        self.life = Product.objects.create(name='Life', category='INSURANCE')
+        self.pension = Product.objects.create(name='Pension', category='PENSION')
+        self.due = timezone.localdate() + timedelta(days=40)
+        terms = PaymentTerms.objects.create(payment_type='SPECIFIC_DATE', specific_date=self.due)
+        for agent in (self.user, self.other):
+            agreement = Agreement.objects.create(agent=agent, company=self.acme)
+            for product in (self.life, self.pension):
+                CommissionStructure.objects.create(
+                    agent=agent, agreement=agreement, product=product, commission_type='SCOPE',
+                    rate=Decimal('10'), payment_terms=terms
+                )
+        customer = Client.objects.create(display_name='Alice')
+        for agent, product, amount in (
+            (self.user, self.life, '1000.10'), (self.user, self.life, 500), (self.user, self.pension, 200),
+            (self.other, self.life, 3000),
+        ):
+            Transaction.objects.create(agent=agent, client=customer, product=product, metadata={'amount': amount})
+
+    def test_months_round_trip(self):
+        day = timezone.localdate()
+        self.assertEqual(decode_month(encode_month(day)), day.strftime('%Y-%m'))
+
+    def test_group_by_and_filters(self):
+        build_snapshot()
+        snapshot = get_snapshot()
+        rows = snapshot.aggregate('commissions', ['agent', 'product'])
+        self.assertEqual(rows, [
+            {'agent': self.user.id, 'product': self.life.id, 'total': '150.01', 'count': 2},
+            {'agent': self.user.id, 'product': self.pension.id, 'total': '20.00', 'count': 1},
+            {'agent': self.other.id, 'product': self.life.id, 'total': '300.00', 'count': 1},
+        ])
+        month = encode_month(self.due)
+        self.assertEqual(
+            snapshot.aggregate('commissions', ['month'], [('agent', 'in', [self.user.id]), ('month', 'gte', month)]),
+            [{'month': self.due.strftime('%Y-%m'), 'total': '170.01', 'count': 3}]
+        )
+        self.assertEqual(snapshot.aggregate('commissions', [], [('month', 'lt', month)]), [{'total': '0.00', 'count': 0}])
+        self.assertEqual(snapshot.aggregate('transactions', [], [('product', 'in', [self.pension.id])])[0]['total'], '200.00')
+        self.assertEqual(snapshot.aggregate('transactions', ['agent'], [('agent', 'in', [999])]), [])
+
+    def test_rebuild_replaces_the_current_snapshot(self):
+        build_snapshot()
+        first = get_snapshot()
+        Transaction.objects.create(agent=self.user, client=Client.objects.get(), product=self.life, metadata={'amount': 1})
+        call_command('build_analytics_snapshot', stdout=StringIO())
+        call_command('build_analytics_snapshot', stdout=StringIO())
+        second = get_snapshot()
+        self.assertNotEqual(first.meta['generation'], second.meta['generation'])
+        self.assertEqual(second.meta['tables']['transactions']['rows'], 5)
+        self.assertEqual(len([entry for entry in os.listdir(self.directory) if entry.isdigit()]), 2)
+
+    def test_view(self):
+        self.assertEqual(self.client.get(reverse('analytics')).status_code, 503)
+        build_snapshot()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('analytics'), {'group_by': 'product'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['product'], row['total']) for row in response.data['rows']], [
+            (self.life.id, '150.01'), (self.pension.id, '20.00')
+        ])
+        self.assertEqual(response.data['labels']['product'][str(self.pension.id)], 'Pension')
+
+        response = self.client.get(reverse('analytics'), {
+            'table': 'transactions', 'product': f'{self.life.id}', 'month__lte': timezone.localdate().strftime('%Y-%m')
+        })
+        self.assertEqual(response.data['rows'], [{'total': '1500.10', 'count': 2}])
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('analytics'), {'group_by': 'company,commission_type'})
+        self.assertEqual(response.data['rows'], [
+            {'company': self.acme.id, 'commission_type': 'SCOPE', 'total': '470.01', 'count': 4}
+        ])
+
+    def test_invalid_parameters(self):
+        build_snapshot()
+        for params in ({'table': 'users'}, {'group_by': 'client'}, {'product': 'life'}, {'month__gte': '2024-13'}):
+            self.assertEqual(self.client.get(reverse('analytics'), params).status_code, 400, params)
@@ -0,0 +1,44 @@
+# tests/test_chunking.py
+
+from django.test import SimpleTestCase, override_settings
+from commission.chunking import estimate_tokens, merge_extracted_info, split_into_chunks
+from commission.gateways import GroqGateway
+from commission.rate_limit import AdaptiveRateLimiter
+from commission.tests.fakes import FakeGroqClient
+
+class SplitIntoChunksTestCase(SimpleTestCase):
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(split_into_chunks('Client: John Smith', 100), ['Client: John Smith'])
+
+    def test_chunks_respect_budget_and_keep_all_words(self):
+        text = '\n\n'.join(' '.join(f'word{p}_{i}.' for i in range(50)) for p in range(10))
+        chunks = split_into_chunks(text, 60)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(estimate_tokens(chunk) <= 60 for chunk in chunks))
+        self.assertEqual(' '.join(chunks).split(), text.split())
+
+class MergeExtractedInfoTestCase(SimpleTestCase):
+    defaults = {'client_name': 'Unknown', 'product_name': 'Unknown', 'amount': 0}
+
+    def test_majority_wins_and_ties_go_to_first_seen(self):
+        merged = merge_extracted_info([
+            {'client_name': 'John Smith', 'product_name': 'Life', 'amount': 0},
+            {'client_name': 'Unknown', 'product_name': 'Pension', 'amount': 500},
+            {'client_name': 'john smith', 'product_name': 'Unknown', 'amount': 1000},
+            {'client_name': 'Jane Doe'},
+        ], self.defaults)
+        self.assertEqual(merged, {'client_name': 'John Smith', 'product_name': 'Life', 'amount': 500})
+
+    def test_nothing_found_keeps_defaults(self):
+        self.assertEqual(merge_extracted_info([{'client_name': 'Unknown'}], self.defaults), self.defaults)
+
+class LongTranscriptTestCase(SimpleTestCase):
+    @override_settings(GROQ_CHUNK_TOKENS=200)
+    def test_long_transcript_is_extracted_in_chunks(self):
+        client = FakeGroqClient('{"client_name": "John Smith", "product_name": "Life", "amount": 1000}')
+        gateway = GroqGateway(client=client, cache=False, rate_limiter=AdaptiveRateLimiter(rate=1000, burst=10))
+        transcript = '\n\n'.join(f'Paragraph {i}. ' + 'We talked about the policy. ' * 20 for i in range(10))
+        info = gateway.extract_meeting_summary_info(transcript)
+        self.assertEqual(info['client_name'], 'John Smith')
+        self.assertGreater(client.calls, 1)
+        self.assertTrue(all(request['max_tokens'] for request in client.requests))
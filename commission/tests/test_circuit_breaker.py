@@ -0,0 +1,140 @@
+# tests/test_circuit_breaker.py
+
+import time
+from datetime import timedelta
+from unittest import mock
+import httpx
+from groq import APIConnectionError, AuthenticationError
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from commission.circuit_breaker import CircuitBreaker
+from commission.gateways import GroqGateway, LLMUnavailableError
+from commission.rate_limit import AdaptiveRateLimiter
+from commission.models import MeetingSummary
+from commission.services import enqueue_meeting_summary, process_meeting_summary, requeue_stale_meeting_summaries
+from commission.tests.fakes import FakeGroqClient
+from commission.workers import drain_meeting_summaries
+
+CONTENT = '{"client_name": "John Smith", "product_name": "Life", "amount": 1000}'
+REQUEST = httpx.Request('POST', 'http://testserver/openai/v1/chat/completions')
+
+def connection_error():
+    return APIConnectionError(request=REQUEST)
+
+def authentication_error():
+    return AuthenticationError('Invalid API Key', response=httpx.Response(401, request=REQUEST), body=None)
+
+def make_gateway(client, **kwargs):
+    return GroqGateway(client=client, cache=False, rate_limiter=AdaptiveRateLimiter(rate=1000, burst=10), **kwargs)
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.15)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success(0)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=1, slow_call_threshold=1)
+        breaker.record_success(2)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+@override_settings(GROQ_LATENCY_BUDGET=0.3, GROQ_HEDGE=False, GROQ_MAX_RETRIES=0)
+class GatewayResilienceTestCase(SimpleTestCase):
+    def test_latency_budget_fails_fast(self):
+        gateway = make_gateway(FakeGroqClient(CONTENT, delay=2))
+        started_at = time.monotonic()
+        with self.assertRaises(LLMUnavailableError):
+            gateway.extract_meeting_summary_info('summary')
+        self.assertLess(time.monotonic() - started_at, 1)
+
+    def test_open_circuit_skips_the_client(self):
+        client = FakeGroqClient(CONTENT, responses=[connection_error()] * 2)
+        gateway = make_gateway(client, circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        for _ in range(3):
+            with self.assertRaises(LLMUnavailableError):
+                gateway.extract_meeting_summary_info('summary')
+        self.assertEqual(client.calls, 2)
+
+    def test_permanent_errors_propagate_without_opening_the_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        gateway = make_gateway(FakeGroqClient(CONTENT, responses=[authentication_error()]), circuit_breaker=breaker)
+        with self.assertRaises(AuthenticationError):
+            gateway.extract_meeting_summary_info('summary')
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @override_settings(GROQ_HEDGE=True, GROQ_HEDGE_DELAY=0.05)
+    def test_hedged_request_wins_over_slow_one(self):
+        client = FakeGroqClient(CONTENT, delays=[2])
+        gateway = make_gateway(client)
+        info = gateway.extract_meeting_summary_info('summary')
+        self.assertEqual(info['client_name'], 'John Smith')
+        self.assertEqual(client.calls, 2)
+
+@override_settings(GROQ_MAX_RETRIES=0)
+class DegradedPathTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    def test_summary_is_queued_while_llm_is_unavailable(self):
+        gateway = make_gateway(FakeGroqClient(CONTENT, responses=[connection_error()]))
+        with mock.patch('commission.extractors.get_groq_gateway', return_value=gateway):
+            summary, transaction = process_meeting_summary(self.user, 'Met John Smith to sign a life policy')
+            self.assertIsNone(transaction)
+            self.assertEqual(summary.processed_status, 'PENDING')
+
+            self.assertEqual(drain_meeting_summaries(), 1)
+        summary.refresh_from_db()
+        self.assertEqual(summary.processed_status, 'SUCCESS')
+        self.assertEqual(summary.transaction.client.display_name, 'John Smith')
+
+    def test_permanent_error_fails_the_summary(self):
+        summary = enqueue_meeting_summary(self.user, 'Met John Smith to sign a life policy')
+        gateway = make_gateway(FakeGroqClient(CONTENT, responses=[authentication_error()]))
+        with mock.patch('commission.extractors.get_groq_gateway', return_value=gateway):
+            self.assertEqual(drain_meeting_summaries(), 1)
+        summary.refresh_from_db()
+        self.assertEqual((summary.processed_status, summary.attempts), ('FAILED', 1))
+
+    @override_settings(MEETING_SUMMARY_MAX_ATTEMPTS=2)
+    def test_summary_fails_after_max_attempts(self):
+        summary = enqueue_meeting_summary(self.user, 'Met John Smith to sign a life policy')
+        gateway = make_gateway(FakeGroqClient(CONTENT, responses=[connection_error()] * 2))
+        with mock.patch('commission.extractors.get_groq_gateway', return_value=gateway):
+            self.assertEqual(drain_meeting_summaries(), 0)
+            summary.refresh_from_db()
+            self.assertEqual((summary.processed_status, summary.attempts), ('PENDING', 1))
+            self.assertEqual(drain_meeting_summaries(), 1)
+        summary.refresh_from_db()
+        self.assertEqual((summary.processed_status, summary.attempts), ('FAILED', 2))
+
+    @override_settings(MEETING_SUMMARY_MAX_ATTEMPTS=2)
+    def test_open_circuit_requeues_without_using_attempts(self):
+        summary = enqueue_meeting_summary(self.user, 'Met John Smith to sign a life policy')
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        client = FakeGroqClient(CONTENT)
+        gateway = make_gateway(client, circuit_breaker=breaker)
+        with mock.patch('commission.extractors.get_groq_gateway', return_value=gateway):
+            for _ in range(5):
+                self.assertEqual(drain_meeting_summaries(), 0)
+        summary.refresh_from_db()
+        self.assertEqual((summary.processed_status, summary.attempts), ('PENDING', 0))
+        self.assertEqual(client.calls, 0)
+
+    @override_settings(MEETING_SUMMARY_MAX_ATTEMPTS=2)
+    def test_stale_summaries_that_used_their_attempts_fail(self):
+        for attempts in (1, 2):
+            MeetingSummary.objects.create(
+                agent=self.user, content=f'summary {attempts}', processed_status='PROCESSING',
+                processing_started_at=timezone.now() - timedelta(hours=1), attempts=attempts
+            )
+        self.assertEqual(requeue_stale_meeting_summaries(60), 1)
+        self.assertEqual(dict(MeetingSummary.objects.values_list('attempts', 'processed_status')), {1: 'PENDING', 2: 'FAILED'})
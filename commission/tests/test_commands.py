@@ -0,0 +1,65 @@
+# tests/test_commands.py
+
+import json
+import os
+import tempfile
+from io import StringIO
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from commission.models import Agreement, InsuranceCompany, CommissionStructure, Product, PaymentTerms, Transaction, Client, Commission
+
+class RecomputeCommissionsTestCase(TestCase):
+    def setUp(self):
+        self.insurance_company = InsuranceCompany.objects.create(name='Test Insurance Company')
+        self.product = Product.objects.create(name='Test Product', category='INSURANCE')
+        self.payment_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+        self.test_client = Client.objects.create(display_name='Test Client')
+        self.agents = []
+        for i in range(3):
+            agent = User.objects.create_user(username=f'agent{i}', password='12345')
+            agreement = Agreement.objects.create(agent=agent, company=self.insurance_company)
+            CommissionStructure.objects.create(
+                agent=agent, product=self.product, commission_type='SCOPE',
+                rate=10, payment_terms=self.payment_terms, agreement=agreement
+            )
+            for _ in range(2):
+                Transaction.objects.create(agent=agent, client=self.test_client, product=self.product, metadata={'amount': 1000})
+            self.agents.append(agent)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def _call(self, *args, workers=1):
+        out = StringIO()
+        call_command('recompute_commissions', '--workers', str(workers), '--partition-size', '2',
+                     '--checkpoint', self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def test_rebuilds_ledger(self):
+        Commission.objects.all().delete()
+        output = self._call()
+        self.assertIn('3 partitions', output)
+        self.assertIn('transactions/sec', output)
+        self.assertEqual(Commission.objects.count(), 6)
+        self.assertTrue(all(c.amount == Decimal('100.00') for c in Commission.objects.all()))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_partitions_run_in_worker_processes(self):
+        # Forked workers write to their own copy of the in-memory test database, so
+        # this checks the pool and checkpoint handling; the ledger itself is
+        # checked in-process above
+        output = self._call(workers=2)
+        self.assertIn('6 transactions in 3 partitions', output)
+        self.assertEqual(output.count(': 2 transactions'), 3)
+        self.assertIn('Successfully recomputed commissions for 6 transactions', output)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_skips_completed_partitions(self):
+        Commission.objects.all().delete()
+        first = self.agents[0].id
+        with open(self.checkpoint, 'w') as checkpoint_file:
+            json.dump({'completed': [[first, first]]}, checkpoint_file)
+        output = self._call('--resume')
+        self.assertIn('2 partitions (1 already completed)', output)
+        self.assertEqual(Commission.objects.filter(transaction__agent=self.agents[0]).count(), 0)
+        self.assertEqual(Commission.objects.count(), 4)
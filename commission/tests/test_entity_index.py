@@ -0,0 +1,124 @@
+# tests/test_entity_index.py
+
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from commission.entity_index import (
+    EntityIndex, normalize_name, resolve_client, resolve_product, get_entity_index, reset_entity_indexes,
+)
+from commission.models import Client, ClientAlias, Product, ProductAlias, Transaction
+from commission.services import process_meeting_summary
+
+class NormalizeNameTestCase(SimpleTestCase):
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('  JOHN   Smith. '), 'john smith')
+        self.assertEqual(normalize_name('José Núñez'), 'jose nunez')
+        self.assertEqual(normalize_name("O'Brien-Smith"), 'o brien smith')
+        self.assertEqual(normalize_name(None), '')
+
+class EntityIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = EntityIndex(ClientAlias, threshold=0.6)
+        self.index._refreshed_at = float('inf')  # never touch the database
+        self.index.add('john smith', 1)
+        self.index.add('jane doe', 2)
+
+    def test_exact_and_token_order(self):
+        self.assertEqual(self.index.lookup('John Smith'), 1)
+        self.assertEqual(self.index.lookup('Smith, John'), 1)
+        self.assertEqual(self.index.stats()['hits'], 2)
+
+    def test_trigram_match(self):
+        self.assertEqual(self.index.lookup('Jon Smith'), 1)
+        self.assertIsNone(self.index.lookup('Mary Jones'))
+        stats = self.index.stats()
+        self.assertEqual((stats['fuzzy_hits'], stats['misses']), (1, 1))
+
+    def test_trigram_match_keeps_numbers_and_letters_apart(self):
+        index = EntityIndex(ProductAlias, threshold=0.8)
+        index._refreshed_at = float('inf')
+        index.add(normalize_name('Term Life Insurance Plan A'), 1)
+        index.add(normalize_name('Health Insurance Premium 2023'), 2)
+        self.assertIsNone(index.lookup('Term Life Insurance Plan B'))
+        self.assertIsNone(index.lookup('Health Insurance Premium 2024'))
+        self.assertEqual(index.lookup('Health Insurence Premium 2023'), 2)
+
+    def test_discard(self):
+        self.index.discard('john smith', 1)
+        self.assertIsNone(self.index.lookup('John Smith'))
+        self.assertEqual(self.index.lookup('Jane Doe'), 2)
+
+class ResolveTestCase(TestCase):
+    def setUp(self):
+        self.addCleanup(reset_entity_indexes)
+
+    def test_case_and_punctuation_variants_resolve_to_one_client(self):
+        first = resolve_client('John Smith')
+        self.assertEqual(resolve_client('john  smith.'), first)
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual(Client.objects.get().first_name, 'John')
+
+    def test_index_learns_on_commit_and_answers_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product_id = resolve_product('Term Life', 'INSURANCE')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_entity_index(ProductAlias).lookup('TERM LIFE'), product_id)
+
+    def test_refresh_drops_entities_deleted_elsewhere(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted_id = resolve_client('John Smith')
+            kept_id = resolve_client('Jane Doe')
+        index = get_entity_index(ClientAlias)
+        index.refresh()
+        # Another process deletes the client; this one gets no post_delete signal
+        with mock.patch.object(index, 'discard'):
+            Client.objects.filter(id=deleted_id).delete()
+        index.refresh()
+        self.assertIsNone(index.lookup('John Smith'))
+        self.assertEqual(index.lookup('Jane Doe'), kept_id)
+        self.assertNotIn(resolve_client('John Smith'), (deleted_id, kept_id))
+
+    def test_fuzzy_match_is_not_registered_as_an_alias(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            client_id = resolve_client('Jonathan Smithson')
+        with self.settings(ENTITY_MATCH_THRESHOLD=0.6):
+            reset_entity_indexes()
+            get_entity_index(ClientAlias).refresh()
+            self.assertEqual(resolve_client('Jonathon Smithson'), client_id)
+        self.assertFalse(ClientAlias.objects.filter(alias='jonathon smithson').exists())
+        self.assertEqual(Client.objects.count(), 1)
+
+    def test_near_identical_products_stay_distinct(self):
+        names = ['Term Life Insurance Plan A', 'Term Life Insurance Plan B', 'Health Insurance Premium 2023',
+                 'Health Insurance Premium 2024', 'Term Life Insurance Plans A']
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = [resolve_product(name) for name in names]
+        self.assertEqual(len(set(ids)), len(names))
+        self.assertEqual(resolve_product('term life insurance plan b'), ids[1])
+
+    def test_api_created_entities_are_registered(self):
+        product = Product.objects.create(name='Pension Plus', category='PENSION')
+        self.assertEqual(resolve_product('pension plus'), product.id)
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_losing_a_creation_race_uses_the_winner(self):
+        winner = Client.objects.create(display_name='John Smith', first_name='John', last_name='Smith')
+        # Both workers missed the name; the other one inserted first
+        with mock.patch('commission.entity_index._registered_entity_id', side_effect=[None, winner.id]):
+            self.assertEqual(resolve_client('John Smith'), winner.id)
+        self.assertEqual(Client.objects.count(), 1)
+
+    def test_meeting_summaries_reuse_existing_entities(self):
+        user = User.objects.create_user(username='agent', password='12345')
+        Client.objects.create(display_name='John Smith', first_name='John', last_name='Smith')
+        chain = mock.Mock()
+        chain.extract.side_effect = [
+            {'client_name': 'John Smith', 'product_name': 'Term Life', 'amount': 1000},
+            {'client_name': 'john smith', 'product_name': 'TERM LIFE', 'amount': 2000},
+        ]
+        with mock.patch('commission.services.get_extractor_chain', return_value=chain):
+            process_meeting_summary(user, 'first')
+            process_meeting_summary(user, 'second')
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual(Product.objects.count(), 1)
+        self.assertEqual(Transaction.objects.count(), 2)
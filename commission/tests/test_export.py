@@ -0,0 +1,73 @@
+# tests/test_export.py
+
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import (
+    Agreement, Client, Commission, CommissionStructure, InsuranceCompany, PaymentTerms, Product, Transaction,
+)
+
+class ExportViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.life = Product.objects.create(name='Life', category='INSURANCE')
+        self.pension = Product.objects.create(name='Pension', category='PENSION')
+        agreement = Agreement.objects.create(
+            agent=self.user, company=InsuranceCompany.objects.create(name='Acme', contact_info='acme@example.com')
+        )
+        CommissionStructure.objects.create(
+            agent=self.user, agreement=agreement, product=self.life, commission_type='SCOPE', rate=Decimal('10'),
+            payment_terms=PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=10)
+        )
+        customer = Client.objects.create(display_name='John, "Johnny" Smith')
+        self.old = Transaction.objects.create(agent=self.user, client=customer, product=self.life, metadata={'amount': 100})
+        Transaction.objects.filter(id=self.old.id).update(created_at=timezone.now() - timedelta(days=400))
+        self.new = Transaction.objects.create(
+            agent=self.user, client=customer, product=self.pension, metadata={'amount': '20.5', 'note': 'ok'}
+        )
+        Transaction.objects.create(agent=self.other, client=customer, product=self.life, metadata={'amount': 1})
+
+    def _get(self, **params):
+        response = self.client.get(reverse('export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response
+
+    def test_csv(self):
+        response = self._get()
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="transactions.csv"')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([int(row['id']) for row in rows], [self.old.id, self.new.id])
+        self.assertEqual(rows[1]['client_name'], 'John, "Johnny" Smith')
+        self.assertEqual((rows[1]['amount'], json.loads(rows[1]['metadata'])['note']), ('20.5000', 'ok'))
+
+    def test_ndjson_with_filters(self):
+        response = self._get(output='ndjson', product=self.pension.id)
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['id'] for record in records], [self.new.id])
+
+        since = (timezone.now() - timedelta(days=30)).isoformat()
+        response = self._get(output='ndjson', created_at__gte=since)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
+    def test_gzipped_commissions(self):
+        response = self._get(resource='commissions', gzip='true')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b''.join(response.streaming_content)).decode())))
+        commission = Commission.objects.get(transaction=self.old)
+        self.assertEqual([(int(row['id']), row['amount']) for row in rows], [(commission.id, '10.00')])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse('export'), {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export'), {'resource': 'users'}).status_code, 400)
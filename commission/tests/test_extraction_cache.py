@@ -0,0 +1,71 @@
+# tests/test_extraction_cache.py
+
+import os
+import tempfile
+from django.test import SimpleTestCase, override_settings
+from commission.extraction_cache import (
+    BaseExtractionCache, MemoryExtractionCache, SQLiteExtractionCache, load_extraction_cache, make_cache_key,
+)
+from commission.gateways import GroqGateway
+from commission.tests.fakes import FakeGroqClient
+
+class ExtractionCacheTestCase(SimpleTestCase):
+    def test_key_ignores_whitespace_but_not_model_or_prompt_version(self):
+        key = make_cache_key('Client: John  Smith\n', 'model', 1)
+        self.assertEqual(key, make_cache_key(' Client: John Smith', 'model', 1))
+        self.assertNotEqual(key, make_cache_key('Client: John Smith', 'other-model', 1))
+        self.assertNotEqual(key, make_cache_key('Client: John Smith', 'model', 2))
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        cache = MemoryExtractionCache(max_entries=2)
+        cache.set('a', {'amount': 1})
+        cache.set('b', {'amount': 2})
+        cache.get('a')
+        cache.set('c', {'amount': 3})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'amount': 1})
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3})
+
+    def test_memory_cache_expires_entries(self):
+        cache = MemoryExtractionCache(ttl=-1)
+        cache.set('a', {'amount': 1})
+        self.assertIsNone(cache.get('a'))
+
+    def test_sqlite_cache_is_shared_between_instances(self):
+        path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+        SQLiteExtractionCache(path, max_entries=2).set('a', {'amount': 1})
+        cache = SQLiteExtractionCache(path, max_entries=2)
+        self.assertEqual(cache.get('a'), {'amount': 1})
+        cache.set('b', {'amount': 2})
+        cache.set('c', {'amount': 3})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), {'amount': 3})
+
+    def test_sqlite_backend_loads_from_settings(self):
+        path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+        config = {'BACKEND': 'commission.extraction_cache.SQLiteExtractionCache', 'OPTIONS': {'max_entries': 10, 'ttl': 60}}
+        with override_settings(EXTRACTION_CACHE=config, EXTRACTION_CACHE_PATH=path):
+            cache = load_extraction_cache()
+        self.assertEqual(cache.path, path)
+        cache.set('a', {'amount': 1})
+        self.assertEqual(cache.get('a'), {'amount': 1})
+
+    def test_backends_must_implement_storage(self):
+        with self.assertRaises(TypeError):
+            BaseExtractionCache()
+
+    def test_gateway_serves_repeated_content_from_cache(self):
+        client = FakeGroqClient('{"client_name": "John Smith", "product_name": "Life", "amount": 1000}')
+        gateway = GroqGateway(client=client, cache=MemoryExtractionCache())
+        first = gateway.extract_meeting_summary_info('Client: John Smith, Product: Life, Amount: 1000')
+        second = gateway.extract_meeting_summary_info('Client: John Smith,  Product: Life, Amount: 1000 ')
+        self.assertEqual(first, second)
+        self.assertEqual(client.calls, 1)
+
+    def test_gateway_does_not_cache_unparsable_responses(self):
+        client = FakeGroqClient('not json')
+        gateway = GroqGateway(client=client, cache=MemoryExtractionCache())
+        gateway.extract_meeting_summary_info('Client: John Smith')
+        info = gateway.extract_meeting_summary_info('Client: John Smith')
+        self.assertEqual(info['client_name'], 'Unknown')
+        self.assertEqual(client.calls, 2)
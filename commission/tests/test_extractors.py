@@ -0,0 +1,54 @@
+# tests/test_extractors.py
+
+from django.test import SimpleTestCase
+from commission.extractors import ExtractorChain, TemplateExtractor
+
+class StaticExtractor:
+    def __init__(self, name, extracted_info, confidence):
+        self.name = name
+        self.extracted_info = extracted_info
+        self.confidence = confidence
+        self.calls = 0
+
+    def extract(self, content):
+        self.calls += 1
+        return self.extracted_info, self.confidence
+
+class TemplateExtractorTestCase(SimpleTestCase):
+    def test_extracts_wizard_template(self):
+        extracted_info, confidence = TemplateExtractor().extract(
+            'Client: John Smith, Product: Term Life, Category: insurance, Amount: $1,250.50'
+        )
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(extracted_info, {
+            'client_name': 'John Smith',
+            'product_name': 'Term Life',
+            'product_category': 'INSURANCE',
+            'amount': 1250.5,
+        })
+
+    def test_multiline_template(self):
+        extracted_info, confidence = TemplateExtractor().extract('Client Name: Jane Doe\nProduct Name: Pension Plus\nAmount: 3000')
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(extracted_info['product_name'], 'Pension Plus')
+        self.assertEqual(extracted_info['amount'], 3000)
+
+    def test_free_text_has_low_confidence(self):
+        _, confidence = TemplateExtractor().extract('Met John yesterday, he wants a life policy for his family')
+        self.assertEqual(confidence, 0.0)
+
+class ExtractorChainTestCase(SimpleTestCase):
+    def test_falls_back_only_when_confidence_is_low(self):
+        template = StaticExtractor('template', {'client_name': 'John Smith'}, 1 / 3)
+        llm = StaticExtractor('llm', {'client_name': 'John Smith', 'product_name': 'Life', 'amount': 1}, 1.0)
+        chain = ExtractorChain([template, llm])
+        self.assertEqual(chain.extract('summary')['product_name'], 'Life')
+        self.assertEqual(llm.calls, 1)
+
+        template.confidence = 1.0
+        self.assertEqual(chain.extract('summary'), {'client_name': 'John Smith'})
+        self.assertEqual(llm.calls, 1)
+
+        stats = chain.stats()
+        self.assertEqual(stats['template'], dict(stats['template'], attempts=2, hits=1, hit_rate=0.5))
+        self.assertEqual(stats['llm']['attempts'], 1)
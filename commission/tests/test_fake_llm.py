@@ -0,0 +1,37 @@
+# tests/test_fake_llm.py
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+from commission.fake_llm import DEFAULT_RESPONSES, FakeLLMServer, parse_latency
+from commission.gateways import GroqGateway
+from commission.management.commands.load_test_meeting_summaries import percentile
+
+class FakeLLMServerTestCase(SimpleTestCase):
+    def test_parse_latency(self):
+        self.assertEqual(parse_latency('constant:0.25')(), 0.25)
+        self.assertTrue(0.1 <= parse_latency('uniform:0.1,0.2')() <= 0.2)
+        self.assertGreater(parse_latency('lognormal:0.3,0.5')(), 0)
+        with self.assertRaises(ValueError):
+            parse_latency('pareto:1')
+
+    def test_error_rate(self):
+        server = FakeLLMServer(error_rate=1.0).start()
+        self.addCleanup(server.stop)
+        response = httpx.post(f'{server.base_url}/openai/v1/chat/completions', json={'model': 'fake', 'messages': []})
+        self.assertEqual(response.status_code, 500)
+
+    @override_settings(GROQ_API_KEY='test-key', GROQ_MAX_RETRIES=0)
+    def test_gateway_parses_plain_and_fenced_responses(self):
+        server = FakeLLMServer(responses=DEFAULT_RESPONSES).start()
+        self.addCleanup(server.stop)
+        with override_settings(GROQ_BASE_URL=server.base_url):
+            gateway = GroqGateway(cache=False)
+        self.addCleanup(gateway.close)
+        names = [gateway.extract_meeting_summary_info(f'summary {i}')['client_name'] for i in range(2)]
+        self.assertEqual(names, ['John Smith', 'Jane Doe'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 100)
+        self.assertEqual(percentile([], 95), 0.0)
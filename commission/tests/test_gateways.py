@@ -0,0 +1,80 @@
+# tests/test_gateways.py
+
+import json
+import time
+from django.test import SimpleTestCase, override_settings
+from commission import gateways
+from commission.gateways import GroqGateway, get_groq_gateway, close_groq_gateway
+from commission.json_stream import IncrementalJSONObjectParser
+from commission.fake_llm import FakeLLMServer
+from commission.tests.fakes import FakeGroqClient
+
+CONTENT = json.dumps({'client_name': 'John Smith', 'product_name': 'Life', 'amount': 1000, 'product_type': 'Term'})
+
+class GroqGatewayTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeLLMServer(responses=[CONTENT]).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.connections = 0
+        settings_override = override_settings(GROQ_API_KEY='test-key', GROQ_BASE_URL=self.server.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(close_groq_gateway)
+
+    def test_extract_meeting_summary_info(self):
+        gateway = GroqGateway()
+        self.addCleanup(gateway.close)
+        info = gateway.extract_meeting_summary_info('Met John Smith about Life, 1000')
+        self.assertEqual(info['client_name'], 'John Smith')
+        self.assertEqual(info['amount'], 1000)
+
+    def test_shared_gateway_reuses_connections(self):
+        self.assertIs(get_groq_gateway(), get_groq_gateway())
+        for i in range(3):
+            get_groq_gateway().extract_meeting_summary_info(f'Met John Smith about Life, {1000 + i}')
+        self.assertEqual(self.server.connections, 1)
+
+    def test_close_resets_shared_gateway(self):
+        gateway = get_groq_gateway()
+        close_groq_gateway()
+        self.assertIsNone(gateways._gateway)
+        self.assertIsNot(get_groq_gateway(), gateway)
+
+class StreamingTestCase(SimpleTestCase):
+    def test_parser_exposes_members_as_they_complete(self):
+        parser = IncrementalJSONObjectParser()
+        parser.feed('Sure! ```json\n{"client_name": "John, Smith", "nested": {"a": [1, 2]}, "amo')
+        self.assertEqual(parser.result, {'client_name': 'John, Smith', 'nested': {'a': [1, 2]}})
+        parser.feed('unt": 1000}\n``` Let me know if you need anything else.')
+        self.assertTrue(parser.complete)
+        self.assertEqual(parser.result['amount'], 1000)
+
+    @override_settings(GROQ_STREAMING=True)
+    def test_stops_reading_once_required_keys_are_complete(self):
+        client = FakeGroqClient(CONTENT + ' Hope this helps! ' * 20)
+        gateway = GroqGateway(client=client, cache=False)
+        info = gateway.extract_meeting_summary_info('Met John Smith about Life, 1000')
+        self.assertEqual(info, {'client_name': 'John Smith', 'product_name': 'Life', 'amount': 1000})
+        self.assertTrue(client.stream.closed)
+        self.assertLess(client.stream.read, len(CONTENT) // 8)
+
+    @override_settings(GROQ_STREAMING=True, GROQ_API_KEY='test-key')
+    def test_streaming_against_server_returns_before_trailer(self):
+        server = FakeLLMServer(responses=[CONTENT], trailer=' Let me know if you need anything else.', trailer_delay=2).start()
+        self.addCleanup(server.stop)
+        with override_settings(GROQ_BASE_URL=server.base_url):
+            gateway = GroqGateway(cache=False)
+        self.addCleanup(gateway.close)
+        started_at = time.monotonic()
+        info = gateway.extract_meeting_summary_info('Met John Smith about Life, 1000')
+        self.assertLess(time.monotonic() - started_at, 1.5)
+        self.assertEqual(info['amount'], 1000)
+        self.assertTrue(server.requests[0]['stream'])
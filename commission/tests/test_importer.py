@@ -0,0 +1,119 @@
+# tests/test_importer.py
+
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.metadata import sync_metadata_values
+from commission.models import (
+    Agreement, Client, Commission, CommissionStructure, InsuranceCompany, PaymentTerms, Product, Transaction,
+    TransactionMetadataValue,
+)
+
+CSV = (
+    'Client,Product,Amount,Policy Number\n'
+    'John Smith,Term Life,"1,000",P-1\n'
+    'john smith,TERM LIFE,250.5,P-2\n'
+    ',Term Life,10,P-3\n'
+    'Jane Doe,Unknown Plan,10,P-4\n'
+    '\n'
+    'Jane Doe,Term Life,lots,P-5\n'
+    'Jane Doe,Term Life,,P-6\n'
+)
+
+class ImportTransactionsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.client.force_authenticate(user=self.user)
+        company = InsuranceCompany.objects.create(name='Acme', contact_info='acme@example.com')
+        self.product = Product.objects.create(
+            name='Term Life', category='INSURANCE', hot_metadata_keys={'policy number': 'text'}
+        )
+        agreement = Agreement.objects.create(agent=self.user, company=company)
+        CommissionStructure.objects.create(
+            agent=self.user, agreement=agreement, product=self.product, commission_type='SCOPE', rate=Decimal('10'),
+            payment_terms=PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=10)
+        )
+
+    def _upload(self, content, name='transactions.csv', encoding='utf-8-sig', **data):
+        upload = SimpleUploadedFile(name, content.encode(encoding), content_type='text/csv')
+        return self.client.post(reverse('import-transactions'), {'file': upload, **data}, format='multipart')
+
+    def test_import_reports_row_errors_and_keeps_valid_rows(self):
+        response = self._upload(CSV, chunk_size=2)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (6, 3, 3))
+        self.assertEqual(
+            [(error['row'], sorted(error['errors'])) for error in sorted(response.data['errors'], key=lambda e: e['row'])],
+            [(4, ['client']), (5, ['product']), (7, ['amount'])]
+        )
+
+        transactions = Transaction.objects.filter(agent=self.user).order_by('id')
+        self.assertEqual([t.amount for t in transactions], [Decimal('1000'), Decimal('250.5'), Decimal('0')])
+        self.assertEqual(transactions[0].metadata, {'amount': '1,000', 'policy number': 'P-1'})
+        self.assertEqual(Client.objects.filter(display_name__iexact='john smith').count(), 1)
+        self.assertEqual(
+            sorted(Commission.objects.values_list('amount', flat=True)), [Decimal('25.05'), Decimal('100.00')]
+        )
+        self.assertEqual(TransactionMetadataValue.objects.filter(key='policy number').count(), 3)
+
+    def test_unusable_amounts_are_row_errors(self):
+        response = self._upload('client,product,amount\nJohn,Term Life,NaN\nJane,Term Life,1e20\nBob,Term Life,"$5,000"\n')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([(error['row'], list(error['errors'])) for error in response.data['errors']], [
+            (2, ['amount']), (3, ['amount'])
+        ])
+        self.assertEqual(Transaction.objects.get().amount, Decimal('5000'))
+
+    def test_rows_that_fail_to_save_are_reported(self):
+        def sync_or_fail(transactions):
+            if any(transaction.metadata.get('amount') == '13' for transaction in transactions):
+                raise ValueError('unlucky')
+            sync_metadata_values(transactions)
+
+        with mock.patch('commission.importer.sync_metadata_values', side_effect=sync_or_fail):
+            response = self._upload('client,product,amount\nJohn,Term Life,1\nJane,Term Life,13\nBob,Term Life,2\n')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertEqual(sorted(Transaction.objects.values_list('amount', flat=True)), [Decimal('1'), Decimal('2')])
+
+    def test_file_that_breaks_off_keeps_the_rows_before(self):
+        response = self._upload('client,product\nJohn Smith,Term Life\nJosé Núñez,Term Life\n', encoding='cp1252', chunk_size=1)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertIn('UTF-8', response.data['errors'][0]['errors']['file'])
+
+        response = self._upload('client,product,région\nJohn Smith,Term Life,nord\n', encoding='cp1252')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['file'][0])
+
+    def test_imported_transactions_show_up_in_cached_lists(self):
+        self.assertEqual(self.client.get(reverse('transaction-list')).data['results'], [])
+        self._upload('client,product\nJohn Smith,Term Life\n')
+        self.assertEqual(len(self.client.get(reverse('transaction-list')).data['results']), 1)
+
+    def test_bad_files(self):
+        self.assertEqual(self._upload('name,amount\nJohn,1\n').status_code, 400)
+        self.assertEqual(self._upload('client,product\n', name='transactions.txt').status_code, 400)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('client,product,amount\nJohn Smith,Term Life,100\nJane Doe,Nope,1\n')
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_transactions', file.name, agent='agent', stdout=stdout, stderr=stderr)
+        self.assertIn('Imported 1 of 2 rows (1 failed)', stdout.getvalue())
+        self.assertIn('Row 3: product', stderr.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_transactions', file.name, agent='nobody', stdout=stdout)
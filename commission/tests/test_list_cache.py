@@ -0,0 +1,74 @@
+# tests/test_list_cache.py
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import Transaction, Agreement, Client, Product, InsuranceCompany
+from commission.versioning import list_cache_stats
+
+class ListCacheTestCase(TestCase):
+    def setUp(self):
+        caches[settings.LIST_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Life', category='INSURANCE')
+        self.john = Client.objects.create(display_name='John Smith')
+        Transaction.objects.create(agent=self.user, client=self.john, product=self.product)
+
+    def _hits(self, name):
+        return list_cache_stats.stats().get(name, {}).get('hits', 0)
+
+    def test_repeat_reads_come_from_the_cache(self):
+        url = reverse('transaction-list')
+        first = self.client.get(url).data
+        hits = self._hits('transaction')
+        with self.assertNumQueries(1):
+            second = self.client.get(url).data
+        self.assertEqual(second, first)
+        self.assertEqual(self._hits('transaction'), hits + 1)
+
+    def test_query_params_are_part_of_the_key(self):
+        url = reverse('transaction-list')
+        Transaction.objects.create(agent=self.user, client=self.john, product=self.product)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+        self.assertEqual(len(self.client.get(url, {'page_size': 1}).data['results']), 1)
+
+    def test_writes_bump_the_generation(self):
+        url = reverse('transaction-list')
+        self.client.get(url)
+        Transaction.objects.create(agent=self.user, client=self.john, product=self.product)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+        self.john.display_name = 'John A. Smith'
+        self.john.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['client']['display_name'], 'John A. Smith')
+
+    def test_other_agents_writes_keep_the_entry(self):
+        url = reverse('transaction-list')
+        self.client.get(url)
+        Transaction.objects.create(agent=self.other, client=self.john, product=self.product)
+        hits = self._hits('transaction')
+        self.client.get(url)
+        self.assertEqual(self._hits('transaction'), hits + 1)
+
+    def test_entries_are_per_user(self):
+        company = InsuranceCompany.objects.create(name='Acme')
+        Agreement.objects.create(agent=self.user, company=company)
+        Agreement.objects.create(agent=self.other, company=company)
+        url = reverse('agreement-list')
+        self.assertEqual(self.client.get(url).data[0]['agent'], self.user.id)
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(url).data[0]['agent'], self.other.id)
+
+    def test_stats_endpoint(self):
+        self.client.get(reverse('client-list'))
+        self.client.get(reverse('client-list'))
+        admin = User.objects.create_user(username='admin', password='12345', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('list-cache-stats'))
+        self.assertGreater(response.data['views']['client']['hit_ratio'], 0)
@@ -0,0 +1,108 @@
+# tests/test_metadata.py
+
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.metadata import parse_decimal, parse_typed
+from commission.models import Client, Product, Transaction, TransactionMetadataValue
+
+class ParseTestCase(SimpleTestCase):
+    def test_parse_values(self):
+        self.assertEqual(parse_decimal('1,250.5'), Decimal('1250.5000'))
+        self.assertEqual(parse_decimal(300), Decimal('300.0000'))
+        self.assertIsNone(parse_decimal('n/a'))
+        self.assertIsNone(parse_decimal(True))
+        self.assertEqual(parse_decimal('$5,000'), Decimal('5000.0000'))
+        self.assertEqual(parse_decimal('€ 1\u00a0200.75'), Decimal('1200.7500'))
+        self.assertEqual(parse_decimal('-₪300'), Decimal('-300.0000'))
+        for value in ('NaN', 'Infinity', '-inf', '1e20', '99999999999999.99999'):
+            self.assertIsNone(parse_decimal(value), value)
+        self.assertEqual(parse_decimal('99999999999999.9999'), Decimal('99999999999999.9999'))
+        self.assertIsNone(parse_decimal('10000000000', max_digits=12, decimal_places=2))
+        self.assertEqual(str(parse_typed('date', '2024-03-01T10:00:00')), '2024-03-01')
+        self.assertIsNone(parse_typed('date', 'soon'))
+
+class MaterializedMetadataTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(
+            name='Life', category='INSURANCE', hot_metadata_keys={'premium': 'decimal', 'start_date': 'date'}
+        )
+        self.customer = Client.objects.create(display_name='Alice')
+
+    def _transaction(self, **metadata):
+        return Transaction.objects.create(agent=self.user, client=self.customer, product=self.product, metadata=metadata)
+
+    def _ids(self, params):
+        response = self.client.get(reverse('transaction-list'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_amount_follows_metadata(self):
+        transaction = self._transaction(amount='1,000.50')
+        self.assertEqual(Transaction.objects.get(id=transaction.id).amount, Decimal('1000.5'))
+        transaction.metadata = {'amount': 'unknown'}
+        transaction.save()
+        self.assertEqual(Transaction.objects.get(id=transaction.id).amount, 0)
+
+    def test_unusable_amounts_are_rejected(self):
+        self.assertEqual(self._transaction(amount='NaN').amount, 0)
+        self.assertEqual(self._transaction(amount='1e20').amount, 0)
+        self.assertEqual(self._transaction(amount='$5,000').amount, Decimal('5000'))
+        for amount in ('NaN', '1e20', 'lots'):
+            response = self.client.post(reverse('transaction-list'), {
+                'client_id': self.customer.id, 'product': self.product.id, 'metadata': {'amount': amount}
+            }, format='json')
+            self.assertEqual(response.status_code, 400, amount)
+            self.assertIn('metadata', response.data)
+
+    def test_amount_range_filter_and_ordering(self):
+        small, large, medium = self._transaction(amount=100), self._transaction(amount=5000), self._transaction(amount=900)
+        self.assertEqual(sorted(self._ids({'amount__gte': 500})), sorted([large.id, medium.id]))
+        self.assertEqual(self._ids({'ordering': '-amount'}), [large.id, medium.id, small.id])
+
+        response = self.client.get(reverse('transaction-list'), {'ordering': 'amount', 'page_size': 2})
+        ids = [row['id'] for row in response.data['results']]
+        ids += [row['id'] for row in self.client.get(response.data['next']).data['results']]
+        self.assertEqual(ids, [small.id, medium.id, large.id])
+        self.assertEqual(response.data['results'][0]['amount'], '100.0000')
+
+    def test_hot_keys_are_materialized_and_filterable(self):
+        cheap = self._transaction(premium=50, start_date='2024-01-15')
+        dear = self._transaction(premium='1200', start_date='2024-06-01')
+        self.assertEqual(TransactionMetadataValue.objects.filter(transaction=dear).count(), 2)
+        self.assertEqual(self._ids({'metadata__premium__gt': 100}), [dear.id])
+        self.assertEqual(self._ids({'metadata__start_date__lt': '2024-03-01'}), [cheap.id])
+        self.assertEqual(self._ids({'metadata__premium__gte': 10, 'metadata__start_date': '2024-06-01'}), [dear.id])
+
+        dear.metadata = {'premium': 80}
+        dear.save()
+        self.assertEqual(self._ids({'metadata__premium__gt': 100}), [])
+
+    def test_invalid_metadata_filters(self):
+        response = self.client.get(reverse('transaction-list'), {'metadata__colour': 'red'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('transaction-list'), {'metadata__premium__gt': 'lots'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_changing_hot_keys_rematerializes(self):
+        transaction = self._transaction(premium=50, region='north')
+        self.product.hot_metadata_keys = {'region': 'text'}
+        self.product.save()
+        self.assertEqual(
+            list(TransactionMetadataValue.objects.filter(transaction=transaction).values_list('key', 'text_value')),
+            [('region', 'north')]
+        )
+        self.assertEqual(self._ids({'metadata__region': 'north'}), [transaction.id])
+
+    def test_changing_hot_keys_invalidates_cached_lists(self):
+        Product.objects.create(name='Pension', category='PENSION', hot_metadata_keys={'region': 'text'})
+        transaction = self._transaction(premium=50, region='north')
+        self.assertEqual(self._ids({'metadata__region': 'north'}), [])
+        self.product.hot_metadata_keys = {'region': 'text'}
+        self.product.save()
+        self.assertEqual(self._ids({'metadata__region': 'north'}), [transaction.id])
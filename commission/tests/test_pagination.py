@@ -0,0 +1,82 @@
+# tests/test_pagination.py
+
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import Transaction, Client, Product
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Life', category='INSURANCE')
+        self.alice = Client.objects.create(display_name='Alice')
+        self.bob = Client.objects.create(display_name='Bob')
+        # Several transactions share a timestamp, so `id` has to break the ties
+        now = timezone.now()
+        self.transactions = []
+        for i in range(7):
+            transaction = Transaction.objects.create(
+                agent=self.user, client=self.alice if i % 2 else self.bob, product=self.product
+            )
+            Transaction.objects.filter(id=transaction.id).update(created_at=now - timedelta(minutes=i // 3))
+            self.transactions.append(transaction.id)
+
+    def _walk(self, url, params, direction='next'):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            if not response.data[direction]:
+                return ids, response
+            response = self.client.get(response.data[direction])
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids, _ = self._walk(reverse('transaction-list'), {'page_size': 2})
+        expected = list(Transaction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_ordering_filter_switches_direction(self):
+        ids, _ = self._walk(reverse('transaction-list'), {'page_size': 3, 'ordering': 'created_at'})
+        expected = list(Transaction.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back(self):
+        url = reverse('transaction-list')
+        response = self.client.get(url, {'page_size': 2})
+        first_page = [row['id'] for row in response.data['results']]
+        self.assertIsNone(response.data['previous'])
+        response = self.client.get(self.client.get(response.data['next']).data['next'])
+        response = self.client.get(self.client.get(response.data['previous']).data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], first_page)
+        self.assertIsNone(response.data['previous'])
+
+    def test_search_filter_is_applied(self):
+        ids, _ = self._walk(reverse('transaction-list'), {'page_size': 2, 'search': 'Alice'})
+        self.assertEqual(sorted(ids), sorted(Transaction.objects.filter(client=self.alice).values_list('id', flat=True)))
+
+    def test_page_size_query_param(self):
+        response = self.client.get(reverse('client-list'), {'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_deep_pages_seek_instead_of_offset(self):
+        url = reverse('transaction-list')
+        response = self.client.get(url, {'page_size': 2})
+        next_url = self.client.get(response.data['next']).data['next']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(next_url)
+        page_query = [q['sql'] for q in queries if 'commission_transaction' in q['sql']][0]
+        self.assertNotIn('OFFSET', page_query)
+        self.assertIn('LIMIT 3', page_query)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('transaction-list'), {'cursor': 'cD1nYXJiYWdlfDE='})
+        self.assertEqual(response.status_code, 404)
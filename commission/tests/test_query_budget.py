@@ -0,0 +1,106 @@
+# tests/test_query_budget.py
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import (
+    Transaction, Agreement, Client, Product, InsuranceCompany, PaymentTerms, CommissionStructure, MeetingSummary
+)
+from commission.tests.query_budget import QueryBudgetMixin
+
+# Queries each endpoint may run, however many rows it returns. Versioned and
+# cached endpoints spend one extra query reading their version stamps.
+LIST_BUDGETS = {
+    'transaction-list': 2,
+    'commissionstructure-list': 1,
+    'client-list': 2,
+    'meetingsummary-list': 1,
+    'agreement-list': 2,
+    'product-list': 2,
+    'insurancecompany-list': 2,
+    'paymentterms-list': 2,
+    'user-list': 1,
+}
+DETAIL_BUDGETS = {
+    'transaction-detail': (Transaction, 1),
+    'commissionstructure-detail': (CommissionStructure, 1),
+    'client-detail': (Client, 1),
+    'meetingsummary-detail': (MeetingSummary, 1),
+    'agreement-detail': (Agreement, 2),
+}
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.agent = User.objects.create_user(username='agent', password='12345')
+        self.admin = User.objects.create_user(username='admin', password='12345', is_staff=True)
+        self.company = InsuranceCompany.objects.create(name='Acme Insurance')
+        self.agreement = Agreement.objects.create(agent=self.agent, company=self.company)
+        self._create_rows(2)
+
+    def _create_rows(self, count):
+        for _ in range(count):
+            product = Product.objects.create(name='Life', category='INSURANCE')
+            client = Client.objects.create(display_name='John Smith')
+            payment_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+            Agreement.objects.create(agent=self.agent, company=self.company)
+            CommissionStructure.objects.create(
+                agent=self.agent, product=product, commission_type='SCOPE', rate=10,
+                payment_terms=payment_terms, agreement=self.agreement
+            )
+            transaction = Transaction.objects.create(
+                agent=self.agent, client=client, product=product, metadata={'amount': 1000}
+            )
+            MeetingSummary.objects.create(
+                agent=self.agent, content='Met John Smith', processed_status='SUCCESS', transaction=transaction
+            )
+
+    def test_list_endpoints(self):
+        for user in (self.agent, self.admin):
+            self.client.force_authenticate(user=user)
+            for name, budget in LIST_BUDGETS.items():
+                with self.subTest(endpoint=name, user=user.username):
+                    url = reverse(name)
+                    with self.assertQueryBudget(budget):
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_detail_endpoints(self):
+        self.client.force_authenticate(user=self.agent)
+        for name, (model, budget) in DETAIL_BUDGETS.items():
+            with self.subTest(endpoint=name):
+                url = reverse(name, args=[model.objects.first().id])
+                with self.assertQueryBudget(budget):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_not_modified_skips_the_query(self):
+        self.client.force_authenticate(user=self.agent)
+        url = reverse('agreement-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertQueryBudget(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_calculate_commission(self):
+        self.client.force_authenticate(user=self.agent)
+        transaction = Transaction.objects.first()
+        with self.assertQueryBudget(2):
+            response = self.client.post(reverse('calculate-commission'), {'transaction_id': transaction.id})
+        self.assertEqual(len(response.data['commissions']), 1)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        self.client.force_authenticate(user=self.admin)
+        for name in LIST_BUDGETS:
+            with self.subTest(endpoint=name):
+                url = reverse(name)
+                self.assertConstantQueries(lambda: self.client.get(url), lambda: self._create_rows(3))
+
+    def test_bulk_commissions_stream(self):
+        self.client.force_authenticate(user=self.agent)
+        url = reverse('bulk-commissions')
+        stream = lambda: b''.join(self.client.post(url, {}, format='json').streaming_content)
+        with self.assertQueryBudget(1):
+            self.assertTrue(stream())
+        self.assertConstantQueries(stream, lambda: self._create_rows(3))
@@ -0,0 +1,82 @@
+# tests/test_rate_limit.py
+
+import time
+import httpx
+from groq import InternalServerError, RateLimitError
+from django.test import SimpleTestCase, override_settings
+from commission.gateways import GroqGateway
+from commission.rate_limit import AdaptiveRateLimiter, parse_duration
+from commission.tests.fakes import FakeGroqClient
+
+def rate_limit_error(retry_after):
+    request = httpx.Request('POST', 'http://testserver/openai/v1/chat/completions')
+    response = httpx.Response(429, headers={'retry-after': retry_after}, request=request)
+    return RateLimitError('Rate limit reached', response=response, body=None)
+
+def server_error():
+    request = httpx.Request('POST', 'http://testserver/openai/v1/chat/completions')
+    return InternalServerError('Bad gateway', response=httpx.Response(502, request=request), body=None)
+
+class AdaptiveRateLimiterTestCase(SimpleTestCase):
+    def test_parse_duration(self):
+        self.assertAlmostEqual(parse_duration('2m59.56s'), 179.56)
+        self.assertAlmostEqual(parse_duration('500ms'), 0.5)
+        self.assertEqual(parse_duration('7'), 7)
+        self.assertIsNone(parse_duration('soon'))
+        self.assertIsNone(parse_duration(None))
+
+    def test_rate_follows_headers_within_bounds(self):
+        limiter = AdaptiveRateLimiter(rate=10)
+        limiter.update_from_headers({'x-ratelimit-remaining-requests': '5', 'x-ratelimit-reset-requests': '10s'})
+        self.assertEqual(limiter.rate, 0.5)
+        limiter.update_from_headers({'x-ratelimit-remaining-requests': '1000', 'x-ratelimit-reset-requests': '1s'})
+        self.assertEqual(limiter.rate, 10)
+
+    def test_throttle_halves_rate_and_pauses(self):
+        limiter = AdaptiveRateLimiter(rate=100, burst=5)
+        limiter.throttle(retry_after=0.2)
+        self.assertEqual(limiter.rate, 50)
+        started_at = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.2)
+
+class ExtractManyTestCase(SimpleTestCase):
+    def test_yields_every_result(self):
+        client = FakeGroqClient('{"client_name": "John Smith", "product_name": "Life", "amount": 1000}')
+        gateway = GroqGateway(client=client, cache=False, rate_limiter=AdaptiveRateLimiter(rate=1000, burst=10))
+        results = dict(gateway.extract_many([f'summary {i}' for i in range(10)], max_concurrency=4))
+        self.assertEqual(sorted(results), list(range(10)))
+        self.assertEqual(results[3]['client_name'], 'John Smith')
+        self.assertEqual(client.calls, 10)
+
+    def test_retries_after_rate_limit(self):
+        client = FakeGroqClient(
+            '{"client_name": "John Smith", "product_name": "Life", "amount": 1000}',
+            responses=[rate_limit_error('0.1')]
+        )
+        limiter = AdaptiveRateLimiter(rate=1000, burst=10)
+        gateway = GroqGateway(client=client, cache=False, rate_limiter=limiter)
+        info = gateway.extract_meeting_summary_info('summary')
+        self.assertEqual(info['client_name'], 'John Smith')
+        self.assertEqual(client.calls, 2)
+        self.assertLess(limiter.rate, 1000)
+
+    @override_settings(GROQ_API_KEY='test', GROQ_RATE_LIMIT_RETRIES=3, GROQ_MAX_RETRIES=1)
+    def test_rate_limits_are_only_retried_by_the_gateway(self):
+        gateway = GroqGateway(cache=False)
+        self.addCleanup(gateway.close)
+        self.assertEqual(gateway.client.max_retries, 0)
+
+        client = FakeGroqClient('{}', responses=[rate_limit_error('0')] * 4)
+        gateway = GroqGateway(client=client, cache=False, rate_limiter=AdaptiveRateLimiter(rate=1000, burst=10))
+        with self.assertRaises(RateLimitError):
+            gateway._complete([])
+        self.assertEqual(client.calls, 4)
+
+    @override_settings(GROQ_MAX_RETRIES=2)
+    def test_retries_server_errors_with_backoff(self):
+        client = FakeGroqClient('{"client_name": "John Smith"}', responses=[server_error(), server_error()])
+        gateway = GroqGateway(client=client, cache=False, rate_limiter=AdaptiveRateLimiter(rate=1000, burst=10))
+        gateway.RETRY_BACKOFF = 0.01
+        self.assertEqual(gateway._complete([]).choices[0].message.content, '{"client_name": "John Smith"}')
+        self.assertEqual(client.calls, 3)
@@ -0,0 +1,103 @@
+# tests/test_reconciliation.py
+
+from datetime import timedelta
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import (
+    Agreement, Client, CommissionStatement, CommissionStructure, InsuranceCompany, PaymentTerms, Product, Transaction,
+)
+from commission.reconciliation import reconcile
+
+class ReconciliationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.acme = InsuranceCompany.objects.create(name='Acme', contact_info='acme@example.com')
+        globex = InsuranceCompany.objects.create(name='Globex', contact_info='globex@example.com')
+        self.life = Product.objects.create(name='Life', category='INSURANCE')
+        pension = Product.objects.create(name='Pension', category='PENSION')
+        self.due = timezone.localdate() + timedelta(days=40)
+        terms = PaymentTerms.objects.create(payment_type='SPECIFIC_DATE', specific_date=self.due)
+        for company, product in ((self.acme, self.life), (globex, pension)):
+            CommissionStructure.objects.create(
+                agent=self.user, agreement=Agreement.objects.create(agent=self.user, company=company), product=product,
+                commission_type='SCOPE', rate=Decimal('10'), payment_terms=terms
+            )
+        self.transactions = {}
+        for name, amount in (('Alice Cohen', 1000), ('Bob Levi', 500), ('Carol Katz', 300)):
+            customer = Client.objects.create(display_name=name)
+            self.transactions[name] = Transaction.objects.create(
+                agent=self.user, client=customer, product=self.life, metadata={'amount': amount}
+            )
+        # Paid by another company, so never part of an Acme statement
+        Transaction.objects.create(agent=self.user, client=customer, product=pension, metadata={'amount': 900})
+
+    def _upload(self, **params):
+        day = lambda offset: (self.due + timedelta(days=offset)).isoformat()
+        content = (
+            'Client,Product,Payment Date,Amount\n'
+            f'alice cohen,LIFE,{day(2)},100.20\n'
+            f'Bob Levi,Life,{day(-3)},45\n'
+            f'Dave Mizrahi,Life,{day(0)},20\n'
+            f'Bob Levi,Life,someday,45\n'
+        )
+        upload = SimpleUploadedFile('acme.csv', content.encode(), content_type='text/csv')
+        return self.client.post(reverse('statement-list'), {'file': upload, 'company': self.acme.id, **params}, format='multipart')
+
+    def test_upload_reconciles_into_buckets(self):
+        response = self._upload()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['statement']['lines'], 3)
+        self.assertEqual([error['row'] for error in response.data['errors']], [5])
+
+        reconciliation = response.data['reconciliation']
+        self.assertEqual(reconciliation['summary']['matched'], {'count': 1, 'expected': '100.00', 'actual': '100.20'})
+        self.assertEqual(reconciliation['summary']['under_paid']['count'], 1)
+        self.assertEqual(reconciliation['under_paid'][0]['difference'], '-5.00')
+        self.assertEqual(reconciliation['under_paid'][0]['transaction'], self.transactions['Bob Levi'].id)
+        self.assertEqual([entry['transaction'] for entry in reconciliation['missing']], [self.transactions['Carol Katz'].id])
+        self.assertEqual([entry['client_name'] for entry in reconciliation['unexpected']], ['Dave Mizrahi'])
+        self.assertEqual(reconciliation['over_paid'], [])
+
+    def test_unusable_amounts_are_row_errors(self):
+        content = (
+            'Client,Product,Payment Date,Amount\n'
+            f'Alice Cohen,Life,{self.due.isoformat()},NaN\n'
+            f'Alice Cohen,Life,{self.due.isoformat()},10000000000\n'
+            f'Alice Cohen,Life,{self.due.isoformat()},"$100.00"\n'
+        )
+        upload = SimpleUploadedFile('acme.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(reverse('statement-list'), {'file': upload, 'company': self.acme.id}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([(error['row'], list(error['errors'])) for error in response.data['errors']], [
+            (2, ['amount']), (3, ['amount'])
+        ])
+        self.assertEqual(response.data['reconciliation']['summary']['matched']['count'], 1)
+
+    def test_tolerances(self):
+        statement_id = self._upload().data['statement']['id']
+        url = reverse('statement-reconciliation', args=[statement_id])
+
+        summary = self.client.get(url, {'amount_tolerance': '0'}).data['summary']
+        self.assertEqual((summary['matched']['count'], summary['over_paid']['count']), (0, 1))
+
+        summary = self.client.get(url, {'date_tolerance_days': 1}).data['summary']
+        self.assertEqual((summary['matched']['count'], summary['unexpected']['count'], summary['missing']['count']), (0, 3, 3))
+
+    def test_query_count_does_not_grow_with_lines(self):
+        statement = CommissionStatement.objects.get(pk=self._upload().data['statement']['id'])
+        with self.assertNumQueries(3):
+            reconcile(statement, Decimal('0.50'), 7)
+
+    def test_statements_are_private(self):
+        statement_id = self._upload().data['statement']['id']
+        other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(reverse('statement-list')).data, [])
+        self.assertEqual(self.client.get(reverse('statement-reconciliation', args=[statement_id])).status_code, 404)
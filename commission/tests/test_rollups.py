@@ -0,0 +1,134 @@
+# tests/test_rollups.py
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import (
+    Agreement, Client, CommissionRollup, CommissionStructure, InsuranceCompany, PaymentTerms, Product, Transaction,
+)
+from commission import rollups
+from commission.rollups import add_months, rebuild_rollups, refresh_rollups
+
+class RollupTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.acme = InsuranceCompany.objects.create(name='Acme', contact_info='acme@example.com')
+        self.globex = InsuranceCompany.objects.create(name='Globex', contact_info='globex@example.com')
+        self.product = Product.objects.create(name='Life', category='INSURANCE')
+        self.this_month = timezone.localdate().replace(day=1)
+        self.payment_month = add_months(self.this_month, 2)
+        self.terms = PaymentTerms.objects.create(payment_type='SPECIFIC_DATE', specific_date=self.payment_month.replace(day=15))
+        self.agreement = Agreement.objects.create(agent=self.user, company=self.acme)
+        self.structure = CommissionStructure.objects.create(
+            agent=self.user, agreement=self.agreement, product=self.product, commission_type='SCOPE',
+            rate=Decimal('10'), payment_terms=self.terms
+        )
+        self.customer = Client.objects.create(display_name='Alice')
+        self.first = self._transaction(self.user, 1000)
+        self.second = self._transaction(self.user, 500)
+
+    def _transaction(self, agent, amount):
+        return Transaction.objects.create(agent=agent, client=self.customer, product=self.product, metadata={'amount': amount})
+
+    def _rollups(self):
+        return sorted(CommissionRollup.objects.values_list(
+            'agent_id', 'month', 'company_id', 'product_id', 'commission_type', 'total', 'count'
+        ))
+
+    def assertRollupsMatchLedger(self, expected):
+        self.assertEqual(self._rollups(), expected)
+        rebuild_rollups()
+        self.assertEqual(self._rollups(), expected)
+
+    def test_rollups_follow_ledger_changes(self):
+        key = (self.user.id, self.payment_month, self.acme.id, self.product.id)
+        self.assertRollupsMatchLedger([(*key, 'SCOPE', Decimal('150.00'), 2)])
+
+        self.first.metadata = {'amount': 2000}
+        self.first.save()
+        self.assertRollupsMatchLedger([(*key, 'SCOPE', Decimal('250.00'), 2)])
+
+        self.second.delete()
+        self.assertRollupsMatchLedger([(*key, 'SCOPE', Decimal('200.00'), 1)])
+
+        self.structure.commission_type = 'RECURRING'
+        self.structure.save()
+        self.assertRollupsMatchLedger([(*key, 'RECURRING', Decimal('10.00'), 1)])
+
+        self.agreement.company = self.globex
+        self.agreement.save()
+        key = (self.user.id, self.payment_month, self.globex.id, self.product.id)
+        self.assertRollupsMatchLedger([(*key, 'RECURRING', Decimal('10.00'), 1)])
+
+        self.terms.specific_date = add_months(self.payment_month, 1).replace(day=3)
+        self.terms.save()
+        key = (self.user.id, add_months(self.payment_month, 1), self.globex.id, self.product.id)
+        self.assertRollupsMatchLedger([(*key, 'RECURRING', Decimal('10.00'), 1)])
+
+        self.structure.delete()
+        self.assertRollupsMatchLedger([])
+
+    def test_refresh_reads_the_ledger_after_taking_the_lock(self):
+        lock_agents = rollups._lock_agents
+        contended = []
+
+        def wait_for_lock(agent_ids):
+            if not contended:
+                contended.append(agent_ids)
+                # A second refresh of the same agent-month commits while this one waits
+                self._transaction(self.user, 300)
+            lock_agents(agent_ids)
+
+        with mock.patch('commission.rollups._lock_agents', side_effect=wait_for_lock):
+            refresh_rollups([(self.user.id, self.payment_month)])
+        key = (self.user.id, self.payment_month, self.acme.id, self.product.id)
+        self.assertRollupsMatchLedger([(*key, 'SCOPE', Decimal('180.00'), 3)])
+
+    def test_forecast(self):
+        other_agreement = Agreement.objects.create(agent=self.other, company=self.acme)
+        CommissionStructure.objects.create(
+            agent=self.other, agreement=other_agreement, product=self.product, commission_type='SCOPE',
+            rate=Decimal('50'), payment_terms=self.terms
+        )
+        self._transaction(self.other, 1000)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('forecast'), {'months': 4})
+        self.assertEqual(response.status_code, 200)
+        forecast = response.data['forecast']
+        self.assertEqual([month['month'] for month in forecast], [
+            add_months(self.this_month, offset).strftime('%Y-%m') for offset in range(4)
+        ])
+        self.assertEqual([month['total'] for month in forecast], ['0.00', '0.00', '150.00', '0.00'])
+        self.assertEqual(forecast[2]['breakdown'], [{'commission_type': 'SCOPE', 'total': '150.00', 'count': 2}])
+
+        response = self.client.get(reverse('forecast'), {
+            'start': self.payment_month.strftime('%Y-%m'), 'months': 1, 'group_by': 'company,product'
+        })
+        self.assertEqual(response.data['forecast'][0]['breakdown'], [
+            {'company': self.acme.id, 'product': self.product.id, 'total': '150.00', 'count': 2}
+        ])
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('forecast'), {'start': self.payment_month.strftime('%Y-%m'), 'months': 1})
+        self.assertEqual(response.data['forecast'][0]['total'], '650.00')
+
+    def test_invalid_forecast_parameters(self):
+        self.assertEqual(self.client.get(reverse('forecast'), {'group_by': 'status'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('forecast'), {'months': 0}).status_code, 400)
+
+    def test_rebuild_command(self):
+        CommissionRollup.objects.all().delete()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(CommissionRollup.objects.get().total, Decimal('150.00'))
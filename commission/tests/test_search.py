@@ -0,0 +1,109 @@
+# tests/test_search.py
+
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import Client, MeetingSummary, Product, Transaction
+from commission.search import DatabaseSearchBackend, SQLiteFTS5Backend, get_search_backend
+
+class FTS5BackendTestCase(TestCase):
+    def setUp(self):
+        self.backend = SQLiteFTS5Backend()
+        self.john = Client.objects.create(
+            display_name='John Smith', first_name='John', last_name='Smith', email='john@acme.com', phone_number='054-123-4567'
+        )
+        self.jose = Client.objects.create(display_name='José Núñez', first_name='José', last_name='Núñez')
+
+    def _clients(self, query):
+        return list(self.backend.filter('client', Client.objects.all(), query).values_list('display_name', flat=True))
+
+    def test_prefix_and_contact_fields(self):
+        self.assertEqual(self._clients('jo smi'), ['John Smith'])
+        self.assertEqual(self._clients('acme'), ['John Smith'])
+        self.assertEqual(self._clients('4567'), ['John Smith'])
+        self.assertEqual(self._clients('nunez'), ['José Núñez'])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.john.display_name = 'Johnny Walker'
+        self.john.save()
+        self.assertEqual(self._clients('walker'), ['Johnny Walker'])
+        self.assertEqual(self._clients('smith'), ['Johnny Walker'])  # last_name is unchanged
+        self.jose.delete()
+        self.assertEqual(self._clients('nunez'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self._clients('"john" OR NEAR( smith*'), [])
+        self.assertEqual(self._clients('john" smith'), ['John Smith'])
+        self.assertEqual(self.backend.filter('client', Client.objects.all(), '"*').count(), 2)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM commission_client_fts')
+        self.assertEqual(self._clients('john'), [])
+        call_command('rebuild_search_index', 'client', stdout=StringIO())
+        self.assertEqual(self._clients('john'), ['John Smith'])
+
+class DatabaseBackendTestCase(TestCase):
+    def test_every_token_must_match_some_field(self):
+        Client.objects.create(display_name='John Smith', first_name='John', last_name='Smith', email='john@acme.com')
+        Client.objects.create(display_name='John Doe', first_name='John', last_name='Doe')
+        matches = DatabaseSearchBackend().filter('client', Client.objects.all(), 'john acme')
+        self.assertEqual(list(matches.values_list('display_name', flat=True)), ['John Smith'])
+
+    def test_fts5_is_only_used_on_sqlite(self):
+        with mock.patch('commission.search._backend', None), mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertIs(type(get_search_backend()), DatabaseSearchBackend)
+        with mock.patch('commission.search._backend', None):
+            self.assertIs(type(get_search_backend()), SQLiteFTS5Backend)
+
+class SearchViewsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        product = Product.objects.create(name='Life', category='INSURANCE')
+        self.john = Client.objects.create(display_name='John Smith', first_name='John', last_name='Smith')
+        self.jane = Client.objects.create(display_name='Jane Doe', first_name='Jane', last_name='Doe')
+        for client in (self.john, self.jane):
+            Transaction.objects.create(agent=self.user, client=client, product=product)
+
+    def test_transaction_search_goes_through_the_client_index(self):
+        response = self.client.get(reverse('transaction-list'), {'search': 'smi'})
+        self.assertEqual([row['client']['id'] for row in response.data['results']], [self.john.id])
+
+    def test_meeting_summary_content_is_searchable(self):
+        summary = MeetingSummary.objects.create(agent=self.user, content='Discussed a pension rollover', processed_status='PENDING')
+        MeetingSummary.objects.create(agent=self.user, content='Renewed the car policy', processed_status='PENDING')
+        summary.processed_status = 'SUCCESS'
+        summary.save(update_fields=['processed_status'])
+        response = self.client.get(reverse('meetingsummary-list'), {'search': 'pension roll'})
+        self.assertEqual([row['id'] for row in response.data['results']], [summary.id])
+
+    def test_ranked_search(self):
+        once = MeetingSummary.objects.create(
+            agent=self.user, content='Pension came up briefly while reviewing the car, home and travel policies',
+            processed_status='SUCCESS'
+        )
+        often = MeetingSummary.objects.create(
+            agent=self.user, content='Pension review: moved the pension to a new pension fund', processed_status='SUCCESS'
+        )
+        MeetingSummary.objects.create(agent=self.other, content='Pension pension pension', processed_status='SUCCESS')
+        response = self.client.get(reverse('search'), {'q': 'pension'})
+        self.assertEqual([row['id'] for row in response.data['meeting_summaries']], [often.id, once.id])
+        self.assertEqual(response.data['clients'], [])
+
+        response = self.client.get(reverse('search'), {'q': 'doe', 'limit': 1})
+        self.assertEqual([row['id'] for row in response.data['clients']], [self.jane.id])
+
+    def test_search_limit_is_bounded(self):
+        self.assertEqual(len(self.client.get(reverse('search'), {'q': 'j'}).data['clients']), 2)
+        for limit in (-1, 0):
+            response = self.client.get(reverse('search'), {'q': 'j', 'limit': limit})
+            self.assertEqual(len(response.data['clients']), 1, limit)
+        self.assertEqual(self.client.get(reverse('search'), {'q': 'j', 'limit': 'abc'}).status_code, 400)
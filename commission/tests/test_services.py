@@ -0,0 +1,175 @@
+# tests/test_services.py
+
+import importlib
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.apps import apps
+from django.test import TestCase
+from django.contrib.auth.models import User
+from commission.models import Agreement, InsuranceCompany, CommissionStructure, Product, PaymentTerms, Transaction, Client, Commission, CommissionRollup
+from commission.serializers import PaymentTermsSerializer
+from commission.services import _expected_payment_date, calculate_commission, calculate_commissions
+
+class CalculateCommissionsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.other_user = User.objects.create_user(username='otheruser', password='12345')
+        self.insurance_company = InsuranceCompany.objects.create(name='Test Insurance Company')
+        self.product = Product.objects.create(name='Test Product', category='INSURANCE')
+        self.payment_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+        self.agreement = Agreement.objects.create(agent=self.user, company=self.insurance_company)
+        self.other_agreement = Agreement.objects.create(agent=self.other_user, company=self.insurance_company)
+        CommissionStructure.objects.create(
+            agent=self.user, product=self.product, commission_type='SCOPE',
+            rate=10, payment_terms=self.payment_terms, agreement=self.agreement
+        )
+        CommissionStructure.objects.create(
+            agent=self.user, product=self.product, commission_type='RECURRING',
+            rate=25, payment_terms=self.payment_terms, agreement=self.agreement
+        )
+        CommissionStructure.objects.create(
+            agent=self.other_user, product=self.product, commission_type='SCOPE',
+            rate=5, payment_terms=self.payment_terms, agreement=self.other_agreement
+        )
+        self.test_client = Client.objects.create(display_name='Test Client')
+
+    def _create_transactions(self, agent, count):
+        return [
+            Transaction.objects.create(
+                agent=agent, client=self.test_client, product=self.product,
+                metadata={'amount': 1000}
+            )
+            for _ in range(count)
+        ]
+
+    def test_matches_single_transaction_calculation(self):
+        transactions = self._create_transactions(self.user, 3) + self._create_transactions(self.other_user, 2)
+        batched = list(calculate_commissions(Transaction.objects.order_by('id')))
+        expected = [c for transaction in transactions for c in calculate_commission(transaction)]
+        self.assertEqual(
+            [(c['transaction'].id, c['commission_structure'].id, c['amount'], c['expected_payment_date']) for c in batched],
+            [(c['transaction'].id, c['commission_structure'].id, c['amount'], c['expected_payment_date']) for c in expected],
+        )
+        self.assertEqual(len(batched), 3 * 2 + 2 * 1)
+        self.assertEqual(batched[0]['amount'], Decimal('100.00'))
+
+    def test_query_count_is_constant(self):
+        self._create_transactions(self.user, 2)
+        with self.assertNumQueries(2):
+            small = list(calculate_commissions(Transaction.objects.all()))
+        self._create_transactions(self.user, 20)
+        with self.assertNumQueries(2):
+            large = list(calculate_commissions(Transaction.objects.all()))
+        self.assertEqual(len(small), 4)
+        self.assertEqual(len(large), 44)
+        with self.assertNumQueries(0):
+            for commission in large:
+                commission['commission_structure'].payment_terms
+
+
+class CommissionLedgerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.insurance_company = InsuranceCompany.objects.create(name='Test Insurance Company')
+        self.product = Product.objects.create(name='Test Product', category='INSURANCE')
+        self.payment_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+        self.other_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+        self.agreement = Agreement.objects.create(agent=self.user, company=self.insurance_company)
+        self.scope = CommissionStructure.objects.create(
+            agent=self.user, product=self.product, commission_type='SCOPE',
+            rate=10, payment_terms=self.payment_terms, agreement=self.agreement
+        )
+        self.recurring = CommissionStructure.objects.create(
+            agent=self.user, product=self.product, commission_type='RECURRING',
+            rate=25, payment_terms=self.other_terms, agreement=self.agreement
+        )
+        self.test_client = Client.objects.create(display_name='Test Client')
+        self.transaction = Transaction.objects.create(
+            agent=self.user, client=self.test_client, product=self.product,
+            metadata={'amount': 1000}
+        )
+
+    def test_ledger_filled_on_transaction_create(self):
+        amounts = {c.commission_structure_id: c.amount for c in self.transaction.commissions.all()}
+        self.assertEqual(amounts, {self.scope.id: Decimal('100.00'), self.recurring.id: Decimal('25.00')})
+
+    def test_transaction_update_recomputes_its_rows(self):
+        self.transaction.metadata = {'amount': 2000}
+        self.transaction.save()
+        self.assertEqual(Commission.objects.get(commission_structure=self.scope).amount, Decimal('200.00'))
+
+    def test_structure_update_only_touches_its_rows(self):
+        Commission.objects.filter(commission_structure=self.recurring).update(status='PAID')
+        self.scope.rate = 20
+        self.scope.save()
+        self.assertEqual(Commission.objects.get(commission_structure=self.scope).amount, Decimal('200.00'))
+        recurring = Commission.objects.get(commission_structure=self.recurring)
+        self.assertEqual(recurring.amount, Decimal('25.00'))
+        self.assertEqual(recurring.status, 'PAID')
+
+    def test_payment_terms_update_moves_dates(self):
+        self.payment_terms.payment_type = 'SPECIFIC_DATE'
+        self.payment_terms.specific_date = date(2100, 1, 15)
+        self.payment_terms.save()
+        self.assertEqual(Commission.objects.get(commission_structure=self.scope).expected_payment_date, date(2100, 1, 15))
+        self.assertNotEqual(Commission.objects.get(commission_structure=self.recurring).expected_payment_date, date(2100, 1, 15))
+
+    def test_payment_days_past_month_end_are_clamped(self):
+        month_end = PaymentTerms(payment_type='DAY_OF_MONTH', day_of_month=31)
+        self.assertEqual(_expected_payment_date(month_end, date(2023, 2, 10)), date(2023, 2, 28))
+        self.assertEqual(_expected_payment_date(month_end, date(2024, 4, 30)), date(2024, 4, 30))
+        self.assertEqual(_expected_payment_date(PaymentTerms(payment_type='DAY_OF_MONTH', day_of_month=30), date(2024, 1, 31)), date(2024, 2, 29))
+        leap_day = PaymentTerms(payment_type='SPECIFIC_DATE', specific_date=date(2024, 2, 29))
+        self.assertEqual(_expected_payment_date(leap_day, date(2024, 3, 1)), date(2025, 2, 28))
+
+    def test_incomplete_payment_terms_skip_the_ledger(self):
+        self.payment_terms.day_of_month = None
+        self.payment_terms.save()
+        transaction = Transaction.objects.create(
+            agent=self.user, client=self.test_client, product=self.product, metadata={'amount': 500}
+        )
+        self.assertEqual([c.commission_structure_id for c in transaction.commissions.all()], [self.recurring.id])
+        self.assertFalse(Commission.objects.filter(commission_structure=self.scope).exists())
+
+    def test_ledger_failure_keeps_the_transaction(self):
+        with mock.patch('commission.services.calculate_commissions', side_effect=ValueError), self.assertLogs('commission.signals'):
+            transaction = Transaction.objects.create(
+                agent=self.user, client=self.test_client, product=self.product, metadata={'amount': 500}
+            )
+        self.assertTrue(Transaction.objects.filter(pk=transaction.pk).exists())
+
+    def test_largest_amounts_fit_the_ledger(self):
+        self.scope.rate = 50
+        self.scope.save()
+        transaction = Transaction.objects.create(
+            agent=self.user, client=self.test_client, product=self.product, metadata={'amount': '50000000000000'}
+        )
+        self.assertEqual(transaction.commissions.get(commission_structure=self.scope).amount, Decimal('25000000000000.00'))
+        self.assertEqual(CommissionRollup.objects.get(commission_type='SCOPE').total, Decimal('25000000000500.00'))
+
+        self.scope.rate = Decimal('999.99')
+        self.scope.save()
+        transaction.metadata = {'amount': '99999999999999.9999'}
+        transaction.save()
+        self.assertEqual(transaction.commissions.get(commission_structure=self.scope).amount, Decimal('999990000000000.00'))
+
+    def test_migration_backfills_the_ledger(self):
+        Commission.objects.all().delete()
+        CommissionRollup.objects.all().delete()
+        migration = importlib.import_module('commission.migrations.0014_backfill_commission_ledger')
+        migration.backfill_ledger(apps, None)
+        amounts = {c.commission_structure_id: c.amount for c in self.transaction.commissions.all()}
+        self.assertEqual(amounts, {self.scope.id: Decimal('100.00'), self.recurring.id: Decimal('25.00')})
+        self.assertEqual(CommissionRollup.objects.get(commission_type='SCOPE').total, Decimal('100.00'))
+
+    def test_payment_terms_validation(self):
+        for data in (
+            {'payment_type': 'DAY_OF_MONTH'}, {'payment_type': 'DAY_OF_MONTH', 'day_of_month': 32},
+            {'payment_type': 'SPECIFIC_DATE', 'day_of_month': 5},
+        ):
+            self.assertFalse(PaymentTermsSerializer(data=data).is_valid(), data)
+        self.assertTrue(PaymentTermsSerializer(data={'payment_type': 'DAY_OF_MONTH', 'day_of_month': 31}).is_valid())
+        serializer = PaymentTermsSerializer(self.payment_terms, data={'day_of_month': 0}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(serializer.errors), ['day_of_month'])
@@ -0,0 +1,142 @@
+# tests/test_versioning.py
+
+from datetime import timedelta
+from unittest import mock
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from commission.models import Agreement, CommissionStructure, InsuranceCompany, PaymentTerms, Product, ResourceVersion
+from commission.versioning import bump_version, get_versions, version_key
+
+class VersionStampTestCase(TestCase):
+    def test_bump_creates_then_increments(self):
+        bump_version('product')
+        bump_version('product')
+        self.assertEqual(get_versions(['product', 'missing'])['product'][0], 2)
+        self.assertEqual(ResourceVersion.objects.count(), 1)
+
+    def test_saves_and_deletes_bump_the_table(self):
+        product = Product.objects.create(name='Life', category='INSURANCE')
+        product.name = 'Term Life'
+        product.save()
+        product.delete()
+        self.assertEqual(get_versions(['product'])['product'][0], 3)
+
+    def test_agreement_changes_bump_the_agents(self):
+        first = User.objects.create_user(username='first', password='12345')
+        second = User.objects.create_user(username='second', password='12345')
+        agreement = Agreement.objects.create(agent=first, company=InsuranceCompany.objects.create(name='Acme'))
+        agreement.agent = second
+        agreement.save()
+        versions = get_versions([version_key(Agreement, first.id), version_key(Agreement, second.id)])
+        self.assertEqual(versions[version_key(Agreement, first.id)][0], 2)
+        self.assertEqual(versions[version_key(Agreement, second.id)][0], 1)
+
+class ConditionalRequestTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.company = InsuranceCompany.objects.create(name='Acme')
+        self.product = Product.objects.create(name='Life', category='INSURANCE')
+        self._settle()
+
+    def _settle(self):
+        # Last-Modified is only sent once the second of the latest write is over
+        ResourceVersion.objects.update(updated_at=F('updated_at') - timedelta(seconds=2))
+
+    def test_matching_etag_is_not_modified(self):
+        url = reverse('product-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_change_invalidates_etag(self):
+        url = reverse('product-detail', args=[self.product.id])
+        etag = self.client.get(url)['ETag']
+        Product.objects.create(name='Pension', category='PENSION')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_routes_check_the_object_before_304(self):
+        response = self.client.get(reverse('product-detail', args=[self.product.id]))
+        self.assertNotEqual(response['ETag'], self.client.get(reverse('product-list'))['ETag'])
+        missing = reverse('product-detail', args=[self.product.id + 1])
+        self.assertEqual(self.client.get(missing, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 404)
+        self.assertEqual(self.client.get(missing, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 404)
+
+        agreement = Agreement.objects.create(agent=self.other, company=self.company)
+        self._settle()
+        url = reverse('agreement-detail', args=[agreement.id])
+        self.client.force_authenticate(user=self.other)
+        last_modified = self.client.get(url)['Last-Modified']
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 404)
+
+    def test_if_modified_since(self):
+        url = reverse('insurancecompany-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_in_the_current_second_are_not_dated(self):
+        url = reverse('insurancecompany-list')
+        InsuranceCompany.objects.create(name='Globex')
+        written_at = ResourceVersion.objects.get(key=version_key(InsuranceCompany)).updated_at
+        with mock.patch('commission.versioning.timezone.now', return_value=written_at):
+            self.assertNotIn('Last-Modified', self.client.get(url))
+            # A date from earlier in this second can't vouch for the write
+            if_modified_since = http_date(int(written_at.timestamp()))
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=if_modified_since).status_code, 200)
+
+    def test_etag_covers_the_query_string(self):
+        url = reverse('product-list')
+        etag = self.client.get(url, {'category': 'INSURANCE', 'search': 'life'})['ETag']
+        self.assertEqual(self.client.get(url, {'search': 'life', 'category': 'INSURANCE'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'category': 'PENSION'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_agreement_etags_are_per_agent(self):
+        url = reverse('agreement-list')
+        Agreement.objects.create(agent=self.user, company=self.company)
+        etag = self.client.get(url)['ETag']
+        Agreement.objects.create(agent=self.other, company=self.company)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_payment_terms_follow_the_agents_structures(self):
+        url = reverse('paymentterms-list')
+        payment_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+        response = self.client.get(url)
+        self.assertEqual((response.status_code, response.data), (200, []))
+
+        agreement = Agreement.objects.create(agent=self.user, company=self.company)
+        CommissionStructure.objects.create(
+            agent=self.user, product=self.product, commission_type='SCOPE', rate=10,
+            payment_terms=payment_terms, agreement=agreement
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([terms['id'] for terms in response.data], [payment_terms.id])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('paymentterms-detail', args=[payment_terms.id])).status_code, 200)
+        self.assertEqual(self.client.post(url, {'payment_type': 'DAY_OF_MONTH', 'day_of_month': 5}).status_code, 403)
+
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(url).data, [])
+        self.client.force_authenticate(user=User.objects.create_user(username='admin', password='12345', is_staff=True))
+        self.assertEqual(self.client.post(url, {'payment_type': 'DAY_OF_MONTH', 'day_of_month': 5}).status_code, 201)
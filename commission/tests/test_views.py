@@ -1,11 +1,17 @@
 # tests/test_views.py
 
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth.models import User
-from commission.models import Transaction, Agreement, Client, Product, InsuranceCompany, PaymentTerms, CommissionStructure
+from commission.models import Transaction, Agreement, Client, Product, InsuranceCompany, PaymentTerms, CommissionStructure, MeetingSummary
+from commission.gateways import GroqGateway
+from commission.tests.fakes import FakeGroqClient
+from commission.workers import drain_meeting_summaries
 import json
 
 class ViewTestCase(TestCase):
@@ -55,6 +61,43 @@ class ViewTestCase(TestCase):
         self.assertIn('summary', response.data)
         self.assertIn('transaction', response.data)
 
+    def test_submit_meeting_summary_creates_one_transaction(self):
+        gateway = GroqGateway(
+            client=FakeGroqClient('{"client_name": "test client", "product_name": "Test Product", "amount": 1000}'),
+            cache=False
+        )
+        with mock.patch('commission.extractors.get_groq_gateway', return_value=gateway):
+            response = self.client.post(reverse('submit-meeting-summary'), {'content': 'Met the test client'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(response.data['transaction']['id'], response.data['summary']['transaction'])
+        self.assertEqual(response.data['transaction']['client']['id'], self.test_client.id)
+        self.assertEqual(Product.objects.count(), 1)
+
+    @override_settings(MEETING_SUMMARY_ASYNC=True, MEETING_SUMMARY_WORKERS=0)
+    def test_submit_meeting_summary_async(self):
+        url = reverse('submit-meeting-summary')
+        response = self.client.post(url, {'content': 'Met John Smith to sign a 1000 life policy'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        summary_id = response.data['id']
+        self.assertEqual(MeetingSummary.objects.get(id=summary_id).processed_status, 'PENDING')
+
+        status_url = reverse('meetingsummary-processing-status', args=[summary_id])
+        self.assertTrue(response.data['status_url'].endswith(status_url))
+        self.assertEqual(self.client.get(status_url).data['processed_status'], 'PENDING')
+
+        gateway = GroqGateway(
+            client=FakeGroqClient('{"client_name": "John Smith", "product_name": "Life", "amount": 1000}'),
+            cache=False
+        )
+        with mock.patch('commission.extractors.get_groq_gateway', return_value=gateway):
+            self.assertEqual(drain_meeting_summaries(), 1)
+
+        response = self.client.get(status_url)
+        self.assertEqual(response.data['processed_status'], 'SUCCESS')
+        transaction = Transaction.objects.get(id=response.data['transaction'])
+        self.assertEqual(transaction.client.display_name, 'John Smith')
+
     def test_transaction_list(self):
         url = reverse('transaction-list')
         response = self.client.get(url)
@@ -88,4 +131,71 @@ class ViewTestCase(TestCase):
         url = reverse('change-password')
         data = {'old_password': '12345', 'new_password': 'newpassword123'}
         response = self.client.put(url, data)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BulkCommissionViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='agent', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.life = Product.objects.create(name="Life", category="INSURANCE")
+        self.pension = Product.objects.create(name="Pension", category="PENSION")
+        company = InsuranceCompany.objects.create(name="Acme")
+        payment_terms = PaymentTerms.objects.create(payment_type='DAY_OF_MONTH', day_of_month=1)
+        for agent in (self.user, self.other):
+            agreement = Agreement.objects.create(agent=agent, company=company)
+            for product in (self.life, self.pension):
+                for commission_type in ('SCOPE', 'RECURRING'):
+                    CommissionStructure.objects.create(
+                        agent=agent, product=product, commission_type=commission_type, rate=10,
+                        payment_terms=payment_terms, agreement=agreement
+                    )
+        client = Client.objects.create(display_name="John Smith")
+        self.transactions = [
+            Transaction.objects.create(agent=self.user, client=client, product=product, metadata={'amount': 1000})
+            for product in (self.life, self.life, self.pension)
+        ]
+        Transaction.objects.create(agent=self.other, client=client, product=self.life, metadata={'amount': 1000})
+
+    def _records(self, data):
+        response = self.client.post(reverse('bulk-commissions'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_streams_each_transaction_and_structure_once(self):
+        records = self._records({'transaction_ids': [t.id for t in self.transactions]})
+        by_type = {}
+        for record in records:
+            by_type.setdefault(record['type'], []).append(record)
+        self.assertEqual(len(by_type['commission']), 6)
+        self.assertEqual([r['id'] for r in by_type['transaction']], [t.id for t in self.transactions])
+        self.assertEqual(len(by_type['commission_structure']), 4)
+        self.assertEqual(by_type['commission'][0]['amount'], '100.00')
+        # References always point at an entity sent earlier in the stream
+        sent = set()
+        for record in records:
+            if record['type'] == 'commission':
+                self.assertIn(('transaction', record['transaction']), sent)
+                self.assertIn(('commission_structure', record['commission_structure']), sent)
+            else:
+                sent.add((record['type'], record['id']))
+
+    def test_filters_by_product_and_date_range(self):
+        today = timezone.localdate()
+        records = self._records({'product': self.pension.id, 'created_after': str(today), 'created_before': str(today)})
+        self.assertEqual([r['id'] for r in records if r['type'] == 'transaction'], [self.transactions[2].id])
+        records = self._records({'created_after': str(today + timedelta(days=1))})
+        self.assertEqual(records, [])
+
+    def test_agents_only_see_their_own_transactions(self):
+        records = self._records({'agent': self.other.id})
+        self.assertEqual(records, [])
+
+    def test_rejects_inverted_date_range(self):
+        response = self.client.post(reverse('bulk-commissions'), {
+            'created_after': '2024-02-01', 'created_before': '2024-01-01'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -4,10 +4,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserRegistrationView, UserProfileView, ChangePasswordView,
-    SubmitMeetingSummaryView, CalculateCommissionView, CustomAuthToken,
+    SubmitMeetingSummaryView, CalculateCommissionView, BulkCommissionView, ImportTransactionsView, ExportView, ForecastView, AnalyticsView, ExtractionStatsView, ListCacheStatsView, SearchView, CustomAuthToken,
     LogoutView, UserViewSet, InsuranceCompanyViewSet, ProductViewSet,
     AgreementViewSet, PaymentTermsViewSet, CommissionStructureViewSet,
-    TransactionViewSet, MeetingSummaryViewSet, ClientViewSet
+    TransactionViewSet, MeetingSummaryViewSet, ClientViewSet, CommissionStatementViewSet
 )
 
 router = DefaultRouter()
@@ -20,6 +20,7 @@ router.register(r'commission-structures', CommissionStructureViewSet)
 router.register(r'transactions', TransactionViewSet, basename='transaction')
 router.register(r'meeting-summaries', MeetingSummaryViewSet)
 router.register(r'clients', ClientViewSet)
+router.register(r'statements', CommissionStatementViewSet, basename='statement')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -27,7 +28,15 @@ urlpatterns = [
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
     path('submit-meeting-summary/', SubmitMeetingSummaryView.as_view(), name='submit-meeting-summary'),
+    path('extraction-stats/', ExtractionStatsView.as_view(), name='extraction-stats'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('list-cache-stats/', ListCacheStatsView.as_view(), name='list-cache-stats'),
     path('calculate-commission/', CalculateCommissionView.as_view(), name='calculate-commission'),
+    path('import/', ImportTransactionsView.as_view(), name='import-transactions'),
+    path('analytics/', AnalyticsView.as_view(), name='analytics'),
+    path('forecast/', ForecastView.as_view(), name='forecast'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('bulk-commissions/', BulkCommissionView.as_view(), name='bulk-commissions'),
     path('login/', CustomAuthToken.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
 ]
\ No newline at end of file
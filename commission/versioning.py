@@ -0,0 +1,147 @@
+# commission/versioning.py
+
+import hashlib
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from .models import ResourceVersion
+
+def version_key(model, agent_id=None):
+    key = model._meta.model_name
+    return key if agent_id is None else f'{key}:{agent_id}'
+
+def bump_version(key):
+    now = timezone.now()
+    if ResourceVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            ResourceVersion.objects.create(key=key, version=1, updated_at=now)
+    except IntegrityError:
+        # Another writer created the row first
+        ResourceVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now)
+
+def get_versions(keys):
+    return {
+        key: (version, updated_at)
+        for key, version, updated_at in ResourceVersion.objects.filter(key__in=keys).values_list('key', 'version', 'updated_at')
+    }
+
+def get_request_versions(request, keys):
+    # Both mixins below may need the same stamps; read them once per request
+    memo = request.__dict__.setdefault('_version_stamps', {})
+    if tuple(keys) not in memo:
+        memo[tuple(keys)] = get_versions(keys)
+    return memo[tuple(keys)]
+
+def _stamp(keys, versions):
+    return ';'.join(f'{key}={versions.get(key, (0, None))[0]}' for key in keys)
+
+class VersionedResourceMixin:
+    """
+    Tags list and detail responses with an ETag and Last-Modified built from
+    the version stamps in `get_version_keys()`, and answers a matching
+    conditional request with 304 Not Modified without running the serializer.
+    Lists need a single lookup; detail routes also resolve their object, so a
+    missing or forbidden one is still a 404 or 403.
+    """
+    version_keys = ()
+
+    def get_version_keys(self):
+        return list(self.version_keys)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self._conditional_response(
+            lambda request, *args, **kwargs: Response(self.get_serializer(instance).data), request, *args, **kwargs
+        )
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        # Read the versions before the data, so a concurrent write can only make the ETag older than the body
+        keys = sorted(self.get_version_keys())
+        versions = get_request_versions(request, keys)
+        query = sorted(request.query_params.lists())
+        identity = f'{request.accepted_renderer.format}|{request.path}|{query}|{_stamp(keys, versions)}'
+        etag = quote_etag(hashlib.md5(identity.encode()).hexdigest())
+        modified = [updated_at for _, updated_at in versions.values()]
+        last_modified = int(max(modified).timestamp()) if modified else None
+        # Last-Modified has whole-second precision, so a date is only handed out once
+        # its second is over; a later write in that second would otherwise still match it.
+        # get_conditional_response already ignores If-Modified-Since when an ETag is sent.
+        if last_modified is not None and last_modified >= int(timezone.now().timestamp()):
+            last_modified = None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
+
+class ListCacheStats:
+    def __init__(self):
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def record(self, name, hit):
+        with self._lock:
+            self._counts[name]['hits' if hit else 'misses'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: dict(counts, hit_ratio=counts['hits'] / (counts['hits'] + counts['misses']))
+                for name, counts in self._counts.items()
+            }
+
+list_cache_stats = ListCacheStats()
+
+class CachedListMixin:
+    """
+    Caches serialized list responses per user and query string under the
+    generation counters in `get_list_cache_keys()`. Writes bump a counter
+    (see signals.py) rather than deleting entries, so stale entries are
+    simply never asked for again and age out of the bounded cache.
+    """
+    list_cache_keys = ()
+
+    def get_list_cache_keys(self):
+        return list(self.list_cache_keys)
+
+    def list(self, request, *args, **kwargs):
+        keys = sorted(self.get_list_cache_keys())
+        versions = get_request_versions(request, keys)
+        if len(versions) < len(keys):
+            # A counter that was never bumped can't vouch for what is cached under it
+            return super().list(request, *args, **kwargs)
+
+        # updated_at keeps a counter that restarts (a restored database) from hitting old entries
+        timestamps = ';'.join(versions[key][1].isoformat() for key in keys)
+        query = sorted(request.query_params.lists())
+        identity = (f'{self.basename}|{request.user.id}|{request.accepted_renderer.format}|'
+                    f'{request.build_absolute_uri(request.path)}|{query}|{_stamp(keys, versions)}|{timestamps}')
+        cache_key = 'list:' + hashlib.md5(identity.encode()).hexdigest()
+        cache = caches[settings.LIST_CACHE_ALIAS]
+
+        data = cache.get(cache_key)
+        list_cache_stats.record(self.basename, data is not None)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(cache_key, response.data)
+        return response
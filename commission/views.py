@@ -1,32 +1,81 @@
 # commission/views.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .services import process_meeting_summary, calculate_commission
+from .services import process_meeting_summary, enqueue_meeting_summary
+from .workers import get_meeting_summary_pool
+from .extractors import get_extractor_chain
+from .entity_index import resolve_client
+from .pagination import KeysetCursorPagination
+from .analytics import TABLES as ANALYTICS_TABLES, get_snapshot, parse_month
+from .exporter import (
+    COMMISSION_COLUMNS, TRANSACTION_COLUMNS, commission_rows, encode_csv, encode_ndjson, gzip_stream, transaction_rows,
+)
+from .importer import ImportFormatError, import_transactions, read_rows
+from .metadata import MetadataFilter
+from .reconciliation import ingest_statement, reconcile
+from .rollups import add_months, first_of_month
+from .search import FullTextSearchFilter, get_search_backend
+from .versioning import VersionedResourceMixin, CachedListMixin, list_cache_stats, version_key
 from .serializers import (
     MeetingSummarySerializer, TransactionSerializer, UserProfileSerializer,
     ChangePasswordSerializer, UserRegistrationSerializer, UserSerializer,
     InsuranceCompanySerializer, ProductSerializer, AgreementSerializer, PaymentTermsSerializer,
-    CommissionStructureSerializer, ClientSerializer
+    CommissionStructureSerializer, ClientSerializer, BulkCommissionSerializer, TransactionImportSerializer, ForecastSerializer,
+    StatementUploadSerializer, ReconciliationSerializer, CommissionStatementSerializer
 )
 from rest_framework import generics, permissions, status
 from django.core.mail import send_mail
 from django.conf import settings
 from rest_framework.permissions import IsAuthenticated
-from .models import Agreement, InsuranceCompany, CommissionStructure, Product, PaymentTerms, Transaction, MeetingSummary, Client
+from .models import Agreement, InsuranceCompany, CommissionStructure, Product, PaymentTerms, Transaction, MeetingSummary, Client, Commission, CommissionRollup, CommissionStatement
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
 from django.contrib.auth.models import User
 from .serializers import CustomAuthTokenSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 
-from rest_framework import viewsets
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.reverse import reverse
 from django.contrib.auth.models import User
 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
 class IsOwnerOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.user.is_staff or obj.agent == request.user
+        return request.user.is_staff or obj.agent_id == request.user.id
+
+class IsAdminOrReadOnly(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.method in permissions.SAFE_METHODS or request.user.is_staff
+
+class TransactionQueryMixin:
+    """The caller's transactions and the filters both the API and exports accept."""
+    filter_backends = [DjangoFilterBackend, MetadataFilter, FullTextSearchFilter, OrderingFilter]
+    filterset_fields = {
+        'agent': ['exact'],
+        'product': ['exact'],
+        'created_at': ['exact', 'gte', 'lt'],
+        'amount': ['exact', 'gte', 'lte'],
+    }
+    search_document = 'client'
+    search_lookup = 'client'
+    ordering_fields = ['created_at', 'amount']
+
+    def get_queryset(self):
+        queryset = Transaction.objects.select_related('client', 'product')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(agent=self.request.user)
 
 class AgreementListView(generics.ListAPIView):
     serializer_class = AgreementSerializer
@@ -101,24 +150,23 @@ class SubmitMeetingSummaryView(APIView):
         if not content:
             return Response({'error': 'Meeting summary content is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        result = process_meeting_summary(request.user, content)
-        summary, transaction_data = result[:2]  # Take only the first two values
+        if settings.MEETING_SUMMARY_ASYNC:
+            summary = enqueue_meeting_summary(request.user, content)
+            return self._accepted(request, summary)
+
+        summary, transaction = process_meeting_summary(request.user, content)
+        if summary.processed_status == 'PENDING':
+            # The LLM is unavailable; the worker pool will retry the summary
+            return self._accepted(request, summary)
         
-        if not transaction_data:
+        if not transaction:
             # If no transaction was created, create one with basic information
-            client = Client.objects.create(display_name="Unknown Client")
             product = Product.objects.first()  # Assuming there's at least one product
             transaction = Transaction.objects.create(
                 agent=request.user,
-                client=client,
+                client_id=resolve_client("Unknown Client"),
                 product=product
             )
-        else:
-            transaction = Transaction.objects.create(
-                agent=request.user,
-                client=Client.objects.get_or_create(display_name=transaction_data.get('client_name', 'Unknown Client'))[0],
-                product=Product.objects.get_or_create(name=transaction_data.get('product_name', 'Unknown Product'))[0]
-            )
         
         response_data = {
             'summary': MeetingSummarySerializer(summary).data,
@@ -127,24 +175,220 @@ class SubmitMeetingSummaryView(APIView):
 
         return Response(response_data, status=status.HTTP_201_CREATED)
 
+    def _accepted(self, request, summary):
+        get_meeting_summary_pool().notify()
+        return Response({
+            'id': summary.id,
+            'processed_status': summary.processed_status,
+            'status_url': reverse('meetingsummary-processing-status', args=[summary.id], request=request)
+        }, status=status.HTTP_202_ACCEPTED)
+
+class ExtractionStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'tiers': get_extractor_chain().stats()})
+
+class SearchView(APIView):
+    """Best-ranked clients and (own) meeting summaries for `?q=`, up to `?limit=` of each."""
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        summaries = MeetingSummary.objects.all()
+        if not request.user.is_staff:
+            summaries = summaries.filter(agent=request.user)
+        backend = get_search_backend()
+        return Response({
+            'clients': ClientSerializer(
+                _in_order(Client.objects.all(), backend.search('client', query, Client.objects.all(), limit)), many=True
+            ).data,
+            'meeting_summaries': MeetingSummarySerializer(
+                _in_order(summaries, backend.search('meetingsummary', query, summaries, limit)), many=True
+            ).data,
+        })
+
+def _in_order(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    return [objects[object_id] for object_id in ids if object_id in objects]
+
+class ListCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'views': list_cache_stats.stats()})
+
+class ImportTransactionsView(APIView):
+    """
+    Creates the caller's transactions from an uploaded CSV or XLSX file with
+    `client`, `product` and optional `amount` columns; any other columns are
+    stored as metadata. Invalid rows are reported without stopping the import.
+    """
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        serializer = TransactionImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        try:
+            result = import_transactions(
+                request.user, read_rows(upload, upload.name), chunk_size=serializer.validated_data['chunk_size']
+            )
+        except ImportFormatError as error:
+            return Response({'file': [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+class ExportView(TransactionQueryMixin, generics.GenericAPIView):
+    """
+    Streams the caller's transactions (`?resource=transactions`, the default)
+    or their commissions (`?resource=commissions`) as CSV or NDJSON
+    (`?output=csv|ndjson`), gzipped on the fly with `?gzip=true`. Accepts the
+    same filters as the transaction list. Rows are read in chunks, so memory
+    use does not grow with the size of the export.
+    """
+    EXPORTS = {
+        'transactions': (transaction_rows, TRANSACTION_COLUMNS),
+        'commissions': (commission_rows, COMMISSION_COLUMNS),
+    }
+    CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+    def get(self, request):
+        resource = request.query_params.get('resource', 'transactions')
+        output = request.query_params.get('output', 'csv')
+        if resource not in self.EXPORTS:
+            return Response({'resource': [f'Expected one of {", ".join(self.EXPORTS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+        if output not in self.CONTENT_TYPES:
+            return Response({'output': [f'Expected one of {", ".join(self.CONTENT_TYPES)}.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        transactions = self.filter_queryset(self.get_queryset())
+        if not transactions.ordered:
+            transactions = transactions.order_by('id')
+        rows, columns = self.EXPORTS[resource]
+        content = encode_csv(rows(transactions), columns) if output == 'csv' else encode_ndjson(rows(transactions))
+        filename = f'{resource}.{output}'
+        if request.query_params.get('gzip') in ('1', 'true'):
+            response = StreamingHttpResponse(gzip_stream(content), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(content, content_type=self.CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+class ForecastView(APIView):
+    """
+    Expected commission income per payment month from `?start=` (YYYY-MM,
+    default this month) for `?months=`, broken down by `?group_by=` (any of
+    company, product, commission_type). Reads the rollup table only. Staff
+    see every agent unless they pass `?agent=`.
+    """
+
+    def get(self, request):
+        serializer = ForecastSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        start = first_of_month(params.get('start') or timezone.localdate())
+        end = add_months(start, params['months'])
+        group_by = params['group_by']
+
+        rollups = CommissionRollup.objects.filter(month__gte=start, month__lt=end)
+        if not request.user.is_staff:
+            rollups = rollups.filter(agent=request.user)
+        elif 'agent' in params:
+            rollups = rollups.filter(agent_id=params['agent'])
+        rows = rollups.values('month', *group_by).annotate(total=Sum('total'), count=Sum('count')).order_by('month', *group_by)
+
+        months = {add_months(start, offset): [] for offset in range(params['months'])}
+        for row in rows:
+            months[row.pop('month')].append(row)
+        return Response({
+            'start': start.strftime('%Y-%m'),
+            'months': params['months'],
+            'group_by': group_by,
+            'forecast': [
+                {
+                    'month': month.strftime('%Y-%m'),
+                    'total': _money(sum(row['total'] for row in breakdown)),
+                    'count': sum(row['count'] for row in breakdown),
+                    'breakdown': [{**row, 'total': _money(row['total'])} for row in breakdown],
+                }
+                for month, breakdown in months.items()
+            ],
+        })
+
+class AnalyticsView(APIView):
+    """
+    Totals and counts from the columnar analytics snapshot, never the
+    database: `?table=commissions|transactions`, `?group_by=` any of the
+    table's columns (agent, product, company, commission_type, status,
+    month), comma-separated `?product=1,2`-style filters and
+    `?month__gte=YYYY-MM` (also `__lt`, `__lte`). Agents only see their own rows.
+    """
+    ID_COLUMNS = ('agent', 'product', 'company')
+
+    def get(self, request):
+        table = request.query_params.get('table', 'commissions')
+        if table not in ANALYTICS_TABLES:
+            raise ValidationError({'table': f'Expected one of {", ".join(ANALYTICS_TABLES)}.'})
+        columns = [column for column in ANALYTICS_TABLES[table]['columns'] if column != 'amount']
+        group_by = [column.strip() for column in request.query_params.get('group_by', '').split(',') if column.strip()]
+        if set(group_by) - set(columns):
+            raise ValidationError({'group_by': f'Expected any of {", ".join(columns)}.'})
+
+        filters = []
+        for column in columns:
+            if column != 'month' and column in request.query_params:
+                values = request.query_params[column].split(',')
+                if column in self.ID_COLUMNS:
+                    if not all(value.isdigit() for value in values):
+                        raise ValidationError({column: 'Expected comma-separated ids.'})
+                    values = [int(value) for value in values]
+                filters.append((column, 'in', values))
+        for lookup in ('gte', 'lt', 'lte'):
+            if f'month__{lookup}' in request.query_params:
+                month = parse_month(request.query_params[f'month__{lookup}'])
+                if month is None:
+                    raise ValidationError({f'month__{lookup}': 'Expected YYYY-MM.'})
+                filters.append(('month', lookup, month))
+        if not request.user.is_staff:
+            filters.append(('agent', 'in', [request.user.id]))
+
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return Response({'error': 'No analytics snapshot has been built yet.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            'built_at': snapshot.meta['built_at'],
+            'table': table,
+            'group_by': group_by,
+            'rows': snapshot.aggregate(table, group_by, filters),
+            'labels': {column: snapshot.meta['labels'][column] for column in group_by if column in snapshot.meta['labels']},
+        })
+
 class CalculateCommissionView(APIView):
     def post(self, request):
         transaction_id = request.data.get('transaction_id')
         try:
-            transaction = Transaction.objects.get(id=transaction_id)
-            if transaction.agent != request.user and not request.user.is_staff:
+            transaction = Transaction.objects.select_related('client').get(id=transaction_id)
+            if transaction.agent_id != request.user.id and not request.user.is_staff:
                 return Response({"error": "You don't have permission to calculate commission for this transaction"}, status=status.HTTP_403_FORBIDDEN)
-            commissions = calculate_commission(transaction)
+            # Commissions are materialized into the ledger when the transaction or its structures change
+            commissions = transaction.commissions.select_related(
+                'commission_structure__payment_terms'
+            ).order_by('commission_structure_id')
             
             # Serialize the commission data
+            serialized_transaction = TransactionSerializer(transaction).data
             serialized_commissions = []
             for commission in commissions:
                 serialized_commission = {
-                    'transaction': TransactionSerializer(commission['transaction']).data,
-                    'commission_structure': CommissionStructureSerializer(commission['commission_structure']).data,
-                    'amount': str(commission['amount']),  # Convert Decimal to string
-                    'expected_payment_date': commission['expected_payment_date'].isoformat(),
-                    'status': commission['status']
+                    'transaction': serialized_transaction,
+                    'commission_structure': CommissionStructureSerializer(commission.commission_structure).data,
+                    'amount': str(commission.amount),  # Convert Decimal to string
+                    'expected_payment_date': commission.expected_payment_date.isoformat(),
+                    'status': commission.status
                 }
                 serialized_commissions.append(serialized_commission)
             
@@ -152,6 +396,78 @@ class CalculateCommissionView(APIView):
         except Transaction.DoesNotExist:
             return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
 
+class BulkCommissionView(APIView):
+    """
+    Streams commissions for many transactions as newline-delimited JSON.
+    Each transaction and commission structure is sent once, as a
+    `{"type": "transaction"|"commission_structure", "id": ..., "data": ...}`
+    line ahead of the first commission that references it by id.
+    """
+    chunk_size = 2000
+
+    def post(self, request):
+        serializer = BulkCommissionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transactions = self._filter_transactions(request, serializer.validated_data)
+        commissions = Commission.objects.filter(transaction__in=transactions).select_related(
+            'transaction__client', 'commission_structure__payment_terms'
+        ).order_by('transaction_id', 'commission_structure_id')
+        response = StreamingHttpResponse(self._stream(commissions), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def _filter_transactions(self, request, filters):
+        transactions = Transaction.objects.all()
+        if not request.user.is_staff:
+            transactions = transactions.filter(agent=request.user)
+        if 'transaction_ids' in filters:
+            transactions = transactions.filter(id__in=filters['transaction_ids'])
+        if 'agent' in filters:
+            transactions = transactions.filter(agent_id=filters['agent'])
+        if 'product' in filters:
+            transactions = transactions.filter(product_id=filters['product'])
+        # Compare against datetimes rather than `created_at__date` so the index is usable
+        if 'created_after' in filters:
+            transactions = transactions.filter(created_at__gte=_start_of_day(filters['created_after']))
+        if 'created_before' in filters:
+            transactions = transactions.filter(created_at__lt=_start_of_day(filters['created_before'] + timedelta(days=1)))
+        return transactions.values('id')
+
+    def _stream(self, commissions):
+        encoder = JSONEncoder()
+        last_transaction_id = None
+        seen_structures = set()
+        for commission in commissions.iterator(chunk_size=self.chunk_size):
+            if commission.transaction_id != last_transaction_id:
+                last_transaction_id = commission.transaction_id
+                yield _ndjson(encoder, {
+                    'type': 'transaction', 'id': commission.transaction_id,
+                    'data': TransactionSerializer(commission.transaction).data
+                })
+            if commission.commission_structure_id not in seen_structures:
+                seen_structures.add(commission.commission_structure_id)
+                yield _ndjson(encoder, {
+                    'type': 'commission_structure', 'id': commission.commission_structure_id,
+                    'data': CommissionStructureSerializer(commission.commission_structure).data
+                })
+            yield _ndjson(encoder, {
+                'type': 'commission',
+                'transaction': commission.transaction_id,
+                'commission_structure': commission.commission_structure_id,
+                'amount': str(commission.amount),
+                'expected_payment_date': commission.expected_payment_date.isoformat(),
+                'status': commission.status
+            })
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def _money(amount):
+    return str(Decimal(amount).quantize(Decimal('0.01')))
+
+def _ndjson(encoder, record):
+    return encoder.encode(record) + '\n'
+
 class CustomAuthToken(ObtainAuthToken):
     serializer_class = CustomAuthTokenSerializer
     def post(self, request, *args, **kwargs):
@@ -177,22 +493,29 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
-class InsuranceCompanyViewSet(viewsets.ModelViewSet):
+class InsuranceCompanyViewSet(VersionedResourceMixin, viewsets.ModelViewSet):
     queryset = InsuranceCompany.objects.all()
     serializer_class = InsuranceCompanySerializer
+    version_keys = [version_key(InsuranceCompany)]
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(VersionedResourceMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    version_keys = [version_key(Product)]
 
-class AgreementViewSet(viewsets.ModelViewSet):
+class AgreementViewSet(VersionedResourceMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = AgreementSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['company']
 
     def get_queryset(self):
-        return Agreement.objects.filter(agent=self.request.user)
+        return Agreement.objects.filter(agent=self.request.user).select_related('agent', 'company')
+
+    def get_version_keys(self):
+        return [version_key(Agreement, self.request.user.id)]
+
+    get_list_cache_keys = get_version_keys
 
     def perform_create(self, serializer):
         serializer.save(agent=self.request.user)
@@ -214,18 +537,24 @@ class AgreementViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class PaymentTermsViewSet(viewsets.ModelViewSet):
+class PaymentTermsViewSet(VersionedResourceMixin, viewsets.ModelViewSet):
     queryset = PaymentTerms.objects.all()
     serializer_class = PaymentTermsSerializer
-    permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
+    # Payment terms are shared by every structure that uses them, so only staff edit them
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
 
     def get_queryset(self):
         if self.request.user.is_staff:
             return PaymentTerms.objects.all()
-        return PaymentTerms.objects.filter(agent=self.request.user)
+        # Agents see the terms of the structures on their agreements
+        return PaymentTerms.objects.filter(
+            id__in=CommissionStructure.objects.filter(agreement__agent=self.request.user).values('payment_terms_id')
+        )
 
-    def perform_create(self, serializer):
-        serializer.save(agent=self.request.user)
+    def get_version_keys(self):
+        if self.request.user.is_staff:
+            return [version_key(PaymentTerms)]
+        return [version_key(PaymentTerms), version_key(CommissionStructure), version_key(Agreement, self.request.user.id)]
 
 class CommissionStructureViewSet(viewsets.ModelViewSet):
     queryset = CommissionStructure.objects.all()
@@ -233,25 +562,23 @@ class CommissionStructureViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
 
     def get_queryset(self):
+        queryset = CommissionStructure.objects.select_related('agent', 'product', 'payment_terms')
         if self.request.user.is_staff:
-            return CommissionStructure.objects.all()
-        return CommissionStructure.objects.filter(agent=self.request.user)
+            return queryset
+        return queryset.filter(agent=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(agent=self.request.user)
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(TransactionQueryMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['agent', 'product', 'created_at']
-    search_fields = ['client__display_name']
-    ordering_fields = ['created_at']
+    pagination_class = KeysetCursorPagination
 
-    def get_queryset(self):
-        if self.request.user.is_staff:
-            return Transaction.objects.all()
-        return Transaction.objects.filter(agent=self.request.user)
+    def get_list_cache_keys(self):
+        # Transactions embed their client, so client edits invalidate these lists too
+        agent_id = None if self.request.user.is_staff else self.request.user.id
+        return [version_key(Transaction, agent_id), version_key(Client)]
 
     def perform_create(self, serializer):
         serializer.save(agent=self.request.user)
@@ -264,10 +591,86 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 class MeetingSummaryViewSet(viewsets.ModelViewSet):
-    queryset = MeetingSummary.objects.all()
+    queryset = MeetingSummary.objects.select_related('agent')
     serializer_class = MeetingSummarySerializer
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    search_document = 'meetingsummary'
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def processing_status(self, request, pk=None):
+        summary = self.get_object()
+        return Response({
+            'id': summary.id,
+            'processed_status': summary.processed_status,
+            'transaction': summary.transaction_id
+        })
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(CachedListMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    search_document = 'client'
+    list_cache_keys = [version_key(Client)]
+
+class CommissionStatementViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                                 viewsets.GenericViewSet):
+    """
+    Company commission statements. POST a CSV or XLSX file with `client`,
+    `product`, `payment_date` and `amount` columns plus the paying `company`
+    to stage it and reconcile it against the ledger in one go;
+    `GET <id>/reconciliation/` reconciles it again, e.g. with other
+    `amount_tolerance` / `date_tolerance_days`.
+    """
+    serializer_class = CommissionStatementSerializer
+    permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
+
+    def get_queryset(self):
+        queryset = CommissionStatement.objects.annotate(line_count=Count('lines')).order_by('-created_at', '-id')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(agent=self.request.user)
+
+    def create(self, request):
+        upload = StatementUploadSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        params = upload.validated_data
+        try:
+            with db_transaction.atomic():
+                statement = CommissionStatement.objects.create(
+                    agent=request.user, company=params['company'], filename=params['file'].name
+                )
+                result = ingest_statement(statement, read_rows(params['file'], params['file'].name))
+        except ImportFormatError as error:
+            return Response({'file': [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+        statement = self.get_queryset().get(pk=statement.pk)
+        return Response({
+            'statement': self.get_serializer(statement).data,
+            'errors': result.errors,
+            'reconciliation': self._reconciliation(statement, params),
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def reconciliation(self, request, pk=None):
+        params = ReconciliationSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(self._reconciliation(self.get_object(), params.validated_data))
+
+    def _reconciliation(self, statement, params):
+        reconciliation = reconcile(statement, params['amount_tolerance'], params['date_tolerance_days'])
+        # Matched lines are only counted; the discrepancies are listed in full
+        return {
+            'amount_tolerance': str(params['amount_tolerance']),
+            'date_tolerance_days': params['date_tolerance_days'],
+            'summary': {bucket: _decimals_as_strings(totals) for bucket, totals in reconciliation.summary().items()},
+            **{
+                bucket: [_decimals_as_strings(entry) for entry in entries]
+                for bucket, entries in reconciliation.buckets.items() if bucket != 'matched'
+            },
+        }
+
+def _decimals_as_strings(record):
+    # The JSON renderer would turn Decimals into floats
+    return {key: str(value) if isinstance(value, Decimal) else value for key, value in record.items()}
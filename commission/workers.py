@@ -0,0 +1,99 @@
+# commission/workers.py
+
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections, connection
+from .services import process_next_meeting_summary, requeue_stale_meeting_summaries
+
+logger = logging.getLogger(__name__)
+
+class MeetingSummaryWorkerPool:
+    """
+    Threads that drain the PENDING meeting summaries from the database.
+    The MeetingSummary table is the queue, so no external broker is needed;
+    `notify` wakes the workers early instead of waiting for the next poll.
+    """
+
+    def __init__(self, workers=None, poll_interval=None, stale_after=None):
+        self.workers = settings.MEETING_SUMMARY_WORKERS if workers is None else workers
+        self.poll_interval = settings.MEETING_SUMMARY_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.stale_after = settings.MEETING_SUMMARY_STALE_AFTER if stale_after is None else stale_after
+        self._threads = []
+        self._wake = threading.Condition()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads or not self.workers:
+                return
+            self._stopped.clear()
+            requeue_stale_meeting_summaries(self.stale_after)
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'meeting-summary-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        self.start()
+        with self._wake:
+            self._wake.notify()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        with self._wake:
+            self._wake.notify_all()
+        with self._lock:
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                close_old_connections()
+                try:
+                    summary = process_next_meeting_summary()
+                except Exception:
+                    logger.exception('Meeting summary worker failed')
+                    summary = None
+                # Nothing to do, or the summary went back to the queue because the LLM is unavailable
+                if summary is None or summary.processed_status == 'PENDING':
+                    with self._wake:
+                        self._wake.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+def drain_meeting_summaries():
+    """
+    Process PENDING summaries in the current thread until the queue is empty
+    or the LLM becomes unavailable.
+    """
+    processed = 0
+    while True:
+        summary = process_next_meeting_summary()
+        if summary is None or summary.processed_status == 'PENDING':
+            return processed
+        processed += 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_meeting_summary_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MeetingSummaryWorkerPool()
+    return _pool
+
+@atexit.register
+def stop_meeting_summary_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.stop(timeout=5)
+            _pool = None
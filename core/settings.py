@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import dotenv
 import os
+from decimal import Decimal
 
 dotenv.load_dotenv()
 
@@ -24,6 +25,106 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL')  # None uses the SDK default endpoint
+GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', '30'))
+GROQ_CONNECT_TIMEOUT = float(os.getenv('GROQ_CONNECT_TIMEOUT', '5'))
+# Retries of connection errors and 5xx responses; 429s get GROQ_RATE_LIMIT_RETRIES retries instead
+GROQ_MAX_RETRIES = int(os.getenv('GROQ_MAX_RETRIES', '2'))
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', '20'))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('GROQ_MAX_KEEPALIVE_CONNECTIONS', '10'))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv('GROQ_KEEPALIVE_EXPIRY', '60'))
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv('GROQ_REQUESTS_PER_MINUTE', '30'))
+GROQ_MAX_CONCURRENCY = int(os.getenv('GROQ_MAX_CONCURRENCY', '8'))
+GROQ_RATE_LIMIT_RETRIES = int(os.getenv('GROQ_RATE_LIMIT_RETRIES', '3'))
+# Summaries longer than GROQ_CHUNK_TOKENS are split and extracted chunk by chunk
+GROQ_CHUNK_TOKENS = int(os.getenv('GROQ_CHUNK_TOKENS', '3000'))
+GROQ_MAX_OUTPUT_TOKENS = int(os.getenv('GROQ_MAX_OUTPUT_TOKENS', '512'))
+# Each extraction must finish within GROQ_LATENCY_BUDGET seconds. Repeated failures or slow
+# calls open the circuit, and summaries are then stored PENDING for the worker pool to retry.
+GROQ_LATENCY_BUDGET = float(os.getenv('GROQ_LATENCY_BUDGET', '15'))
+GROQ_SLOW_CALL_THRESHOLD = float(os.getenv('GROQ_SLOW_CALL_THRESHOLD', '8'))
+GROQ_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('GROQ_CIRCUIT_FAILURE_THRESHOLD', '5'))
+GROQ_CIRCUIT_RESET_TIMEOUT = float(os.getenv('GROQ_CIRCUIT_RESET_TIMEOUT', '30'))
+# Hedging sends a second request when the first is slower than the given percentile of recent calls
+GROQ_HEDGE = os.getenv('GROQ_HEDGE', 'False') == 'True'
+GROQ_HEDGE_PERCENTILE = float(os.getenv('GROQ_HEDGE_PERCENTILE', '95'))
+GROQ_HEDGE_DELAY = float(os.getenv('GROQ_HEDGE_DELAY', '2'))  # used until enough latencies are recorded
+# Stream completions and stop reading once client_name, product_name and amount are complete
+GROQ_STREAMING = os.getenv('GROQ_STREAMING', 'False') == 'True'
+
+# When True, /api/submit-meeting-summary/ stores the summary as PENDING and returns 202;
+# MEETING_SUMMARY_WORKERS in-process threads (or `manage.py process_meeting_summaries`) run the extraction.
+MEETING_SUMMARY_ASYNC = os.getenv('MEETING_SUMMARY_ASYNC', 'False') == 'True'
+MEETING_SUMMARY_WORKERS = int(os.getenv('MEETING_SUMMARY_WORKERS', '2'))
+MEETING_SUMMARY_POLL_INTERVAL = float(os.getenv('MEETING_SUMMARY_POLL_INTERVAL', '5'))
+MEETING_SUMMARY_STALE_AFTER = int(os.getenv('MEETING_SUMMARY_STALE_AFTER', '600'))
+# A summary still unprocessed after this many claims is marked FAILED instead of requeued
+MEETING_SUMMARY_MAX_ATTEMPTS = int(os.getenv('MEETING_SUMMARY_MAX_ATTEMPTS', '5'))
+
+# Extractors tried in order by process_meeting_summary; the LLM is only called when the
+# cheaper tiers find fewer than MEETING_SUMMARY_MIN_CONFIDENCE of the required fields.
+MEETING_SUMMARY_EXTRACTORS = [
+    'commission.extractors.TemplateExtractor',
+    'commission.extractors.LLMExtractor',
+]
+MEETING_SUMMARY_MIN_CONFIDENCE = float(os.getenv('MEETING_SUMMARY_MIN_CONFIDENCE', '1.0'))
+
+# Cache of LLM extraction results, keyed on a hash of the content, model and prompt version.
+# Use 'commission.extraction_cache.SQLiteExtractionCache' to share it across workers; it is stored
+# at EXTRACTION_CACHE_PATH unless a 'path' option is given.
+EXTRACTION_CACHE = {
+    'BACKEND': os.getenv('EXTRACTION_CACHE_BACKEND', 'commission.extraction_cache.MemoryExtractionCache'),
+    'OPTIONS': {
+        'max_entries': int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', '1024')),
+        'ttl': int(os.getenv('EXTRACTION_CACHE_TTL', '86400')),
+    },
+}
+EXTRACTION_CACHE_PATH = os.getenv('EXTRACTION_CACHE_PATH', str(BASE_DIR / 'extraction_cache.sqlite3'))
+
+# Extracted product and client names are matched against a process-local index of
+# known names; fuzzy (trigram) matches of client names need at least ENTITY_MATCH_THRESHOLD similarity
+# and the same digit and single-letter tokens. Product names are never matched fuzzily.
+# Names registered or deleted by other processes are picked up every ENTITY_INDEX_REFRESH_INTERVAL seconds.
+ENTITY_MATCH_THRESHOLD = float(os.getenv('ENTITY_MATCH_THRESHOLD', '0.85'))
+ENTITY_INDEX_REFRESH_INTERVAL = float(os.getenv('ENTITY_INDEX_REFRESH_INTERVAL', '30'))
+
+# Full-text search over client names/contacts and meeting-summary content. The FTS5
+# backend needs SQLite and falls back to commission.search.DatabaseSearchBackend elsewhere.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'commission.search.SQLiteFTS5Backend')
+
+# Transaction imports (/api/import/ and the import_transactions command) are written
+# IMPORT_CHUNK_SIZE rows per bulk insert and database transaction.
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+
+# Company statements are reconciled against the commission ledger: a paid line matches
+# an expected commission paid within RECONCILIATION_DATE_TOLERANCE_DAYS of its expected
+# date, and counts as correctly paid within RECONCILIATION_AMOUNT_TOLERANCE.
+RECONCILIATION_AMOUNT_TOLERANCE = Decimal(os.getenv('RECONCILIATION_AMOUNT_TOLERANCE', '0.50'))
+RECONCILIATION_DATE_TOLERANCE_DAYS = int(os.getenv('RECONCILIATION_DATE_TOLERANCE_DAYS', '7'))
+
+# Dashboard and report aggregates are answered from a columnar NumPy snapshot of
+# transactions and commissions, memory-mapped from ANALYTICS_SNAPSHOT_DIR. Refresh it
+# periodically (e.g. from cron) with `manage.py build_analytics_snapshot`.
+ANALYTICS_SNAPSHOT_DIR = os.getenv('ANALYTICS_SNAPSHOT_DIR', str(BASE_DIR / 'analytics_snapshot'))
+
+# Per-agent list responses for transactions, agreements and clients are cached
+# here, keyed by generation counters that writes bump. Point LIST_CACHE_BACKEND
+# at django.core.cache.backends.filebased.FileBasedCache (with a directory as
+# LIST_CACHE_LOCATION) to share entries between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'list_responses': {
+        'BACKEND': os.getenv('LIST_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('LIST_CACHE_LOCATION', 'list-responses'),
+        'TIMEOUT': int(os.getenv('LIST_CACHE_TIMEOUT', '600')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('LIST_CACHE_MAX_ENTRIES', '1000')),
+        },
+    },
+}
+LIST_CACHE_ALIAS = 'list_responses'
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY')
@@ -59,6 +160,11 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# Transaction, client and meeting-summary lists are cursor-paginated; clients may
+# ask for up to API_MAX_PAGE_SIZE rows with `?page_size=`.
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '500'))
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
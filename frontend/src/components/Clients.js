@@ -171,6 +171,7 @@ const AddClientModal = ({ isOpen, onClose, fetchClients }) => {
 
 const Clients = () => {
   const [clients, setClients] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [isConfirmationModalOpen, setIsConfirmationModalOpen] = useState(false);
@@ -183,7 +184,18 @@ const Clients = () => {
   const fetchClients = async () => {
     try {
       const response = await getClients();
-      setClients(response);
+      setClients(response.results);
+      setNextPage(response.next);
+    } catch (error) {
+      console.error('Error fetching clients:', error);
+    }
+  };
+
+  const loadMoreClients = async () => {
+    try {
+      const response = await getClients({ page: nextPage });
+      setClients([...clients, ...response.results]);
+      setNextPage(response.next);
     } catch (error) {
       console.error('Error fetching clients:', error);
     }
@@ -260,6 +272,7 @@ const Clients = () => {
           ))}
         </tbody>
       </Table>
+      {nextPage && <Button onClick={loadMoreClients}>Load more</Button>}
       <AddClientModal isOpen={isModalOpen} onClose={() => setIsModalOpen(false)} fetchClients={fetchClients} />
       <ConfirmationModal
         isOpen={isConfirmationModalOpen}
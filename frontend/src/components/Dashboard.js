@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import styled from 'styled-components';
 import { FaFileContract, FaUsers, FaMoneyBillWave, FaClipboardList, FaPlus, FaChartLine, FaFileAlt } from 'react-icons/fa';
 import { MdNotifications } from 'react-icons/md';
@@ -6,6 +6,7 @@ import StatCard from './dashboard/StatCard';
 import PieChartCard from './dashboard/PieChartCard';
 import BarChartCard from './dashboard/BarChartCard';
 import QuickActions from './dashboard/QuickActions';
+import { getAnalytics } from '../services/api';
 
 const DashboardContainer = styled.div`
   padding: 2rem;
@@ -47,21 +48,25 @@ const Dashboard = () => {
     { title: 'Pending Transactions', value: 7, icon: FaClipboardList },
   ];
 
-  const productData = [
-    { title: 'Life Insurance', value: 400, color: '#0088FE' },
-    { title: 'Health Insurance', value: 300, color: '#00C49F' },
-    { title: 'Auto Insurance', value: 300, color: '#FFBB28' },
-    { title: 'Home Insurance', value: 200, color: '#FF8042' },
-  ];
+  const [productData, setProductData] = useState([]);
+  const [monthlyCommissions, setMonthlyCommissions] = useState([]);
 
-  const monthlyCommissions = [
-    { name: 'Jan', amount: 4000 },
-    { name: 'Feb', amount: 3000 },
-    { name: 'Mar', amount: 5000 },
-    { name: 'Apr', amount: 4500 },
-    { name: 'May', amount: 6000 },
-    { name: 'Jun', amount: 5500 },
-  ];
+  useEffect(() => {
+    const colors = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884D8'];
+    getAnalytics({ groupBy: ['product'] })
+      .then(({ rows, labels }) => setProductData(rows.map((row, index) => ({
+        title: labels.product[row.product] || `Product ${row.product}`,
+        value: Number(row.total),
+        color: colors[index % colors.length],
+      }))))
+      .catch((error) => console.error('Error fetching product analytics:', error));
+    getAnalytics({ groupBy: ['month'] })
+      .then(({ rows }) => setMonthlyCommissions(rows.slice(-6).map((row) => ({
+        name: row.month,
+        amount: Number(row.total),
+      }))))
+      .catch((error) => console.error('Error fetching monthly analytics:', error));
+  }, []);
 
   const quickActions = [
     { title: 'New Agreement', icon: FaPlus, action: () => console.log('Create new agreement') },
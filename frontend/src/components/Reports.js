@@ -1,5 +1,6 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import styled from 'styled-components';
+import { getForecast } from '../services/api';
 
 const ReportsContainer = styled.div`
   padding: 2rem;
@@ -18,10 +19,47 @@ const ReportItem = styled.li`
   margin-bottom: 1rem;
 `;
 
+const ForecastTable = styled.table`
+  border-collapse: collapse;
+  margin-bottom: 2rem;
+
+  th, td {
+    padding: 0.5rem 1rem;
+    text-align: left;
+  }
+`;
+
 const Reports = () => {
+  const [forecast, setForecast] = useState([]);
+
+  useEffect(() => {
+    getForecast({ months: 12 })
+      .then((data) => setForecast(data.forecast))
+      .catch((error) => console.error('Error fetching forecast:', error));
+  }, []);
+
   return (
     <ReportsContainer>
       <Title>Reports</Title>
+      <h2>Commission Forecast</h2>
+      <ForecastTable>
+        <thead>
+          <tr>
+            <th>Month</th>
+            <th>Commissions</th>
+            <th>Expected</th>
+          </tr>
+        </thead>
+        <tbody>
+          {forecast.map((month) => (
+            <tr key={month.month}>
+              <td>{month.month}</td>
+              <td>{month.count}</td>
+              <td>{month.total}</td>
+            </tr>
+          ))}
+        </tbody>
+      </ForecastTable>
       <ReportList>
         <ReportItem>Monthly Sales Report</ReportItem>
         <ReportItem>Client Acquisition Report</ReportItem>
@@ -38,13 +38,96 @@ export const createAgreement = async (agreementData) => {
   return response.data;
 };
 
-export const getTransactions = async () => {
-  const response = await api.get('/transactions/');
+// List endpoints are cursor-paginated and return { next, previous, results }.
+// Pass the `next`/`previous` URL back as `page` to move between pages.
+const getPage = async (path, { page, pageSize, ordering, search } = {}) => {
+  const response = page
+    ? await api.get(page)
+    : await api.get(path, { params: { page_size: pageSize, ordering, search } });
   return response.data;
 };
 
-export const getClients = async () => {
-  const response = await api.get('/clients/');
+export const getTransactions = async (options) => getPage('/transactions/', options);
+
+export const getClients = async (options) => getPage('/clients/', options);
+
+// Expected commission income per month: { start, months, group_by, forecast: [{ month, total, count, breakdown }] }
+export const getForecast = async ({ start, months = 12, groupBy = 'commission_type' } = {}) => {
+  const response = await api.get('/forecast/', { params: { start, months, group_by: groupBy } });
+  return response.data;
+};
+
+// Streams commissions for many transactions, calling onRecord with each
+// transaction, commission_structure and commission record as it arrives.
+export const streamCommissions = async (filters, onRecord) => {
+  const response = await fetch(`${api.defaults.baseURL}/bulk-commissions/`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Authorization: `Token ${localStorage.getItem('token')}`,
+    },
+    body: JSON.stringify(filters),
+  });
+  if (!response.ok) {
+    throw new Error(`Commission report failed with status ${response.status}`);
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter((line) => line).forEach((line) => onRecord(JSON.parse(line)));
+    if (done) {
+      return;
+    }
+  }
+};
+
+// Uploads a CSV or XLSX file of transactions; resolves to
+// {rows, created, failed, errors: [{row, errors}]}.
+export const importTransactions = async (file) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  const response = await api.post('/import/', formData, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+  });
+  return response.data;
+};
+
+// Downloads an export as a Blob. params: resource ('transactions' or
+// 'commissions'), output ('csv' or 'ndjson'), gzip, and any transaction filter.
+export const exportTransactions = async (params = {}) => {
+  const response = await api.get('/export/', { params, responseType: 'blob' });
+  return response.data;
+};
+
+// Uploads a company commission statement and resolves to
+// { statement, errors, reconciliation: { summary, over_paid, under_paid, missing, unexpected } }.
+export const uploadStatement = async (file, companyId) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  formData.append('company', companyId);
+  const response = await api.post('/statements/', formData, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+  });
+  return response.data;
+};
+
+export const getReconciliation = async (statementId, tolerances = {}) => {
+  const response = await api.get(`/statements/${statementId}/reconciliation/`, {
+    params: { amount_tolerance: tolerances.amount, date_tolerance_days: tolerances.days },
+  });
+  return response.data;
+};
+
+// Aggregates from the analytics snapshot: { built_at, table, group_by, rows: [{ ...groups, total, count }], labels }
+export const getAnalytics = async ({ table = 'commissions', groupBy = [], ...filters } = {}) => {
+  const response = await api.get('/analytics/', {
+    params: { table, group_by: groupBy.join(','), ...filters },
+  });
   return response.data;
 };
 